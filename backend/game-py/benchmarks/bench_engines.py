@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the game rule engines.
+
+Run from backend/game-py:
+  python -m benchmarks.bench_engines
+  python -m benchmarks.bench_engines --filter snake --seconds 2 --output bench.json
+  python -m benchmarks.bench_engines --compare bench.json   # exit 1 on slowdowns
+
+Each case reports ops/sec, mean time per op, peak traced allocation per op and,
+where the case wraps env methods, the mean time spent in each phase per op.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from engine.games.doudizhu.environment import DoudizhuEnvironment
+from engine.games.doudizhu.rules import MoveAnalyzer
+from engine.games.doudizhu.types import CARDS
+from engine.games.snake import rules as snake_rules
+from engine.games.snake.board import SnakeBoard
+from engine.games.snake.environment import SnakeEnvironment
+from engine.games.snake.occupancy import Occupancy
+from engine.games.snake.solver import SnakeSolver
+from engine.games.snake.vector import SnakeVectorEnv
+from engine.games.snake.zobrist import TranspositionTable, ZobristKeys
+from engine.games.tetris import rules as tetris_rules
+from engine.games.tetris.environment import TetrisEnvironment
+from engine.games.tetris.replay import ReplaySimulator
+from engine.games.tetris.vector import TetrisVectorEnv
+
+Op = Callable[[], Any]
+
+
+class PhaseTimer:
+    """Accumulates time spent in wrapped methods of an object."""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+
+    def wrap(self, obj: Any, method_name: str) -> None:
+        method = getattr(obj, method_name)
+        totals = self.totals
+        totals[method_name] = 0.0
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                totals[method_name] += time.perf_counter() - start
+
+        setattr(obj, method_name, timed)
+
+    def reset(self) -> None:
+        for name in self.totals:
+            self.totals[name] = 0.0
+
+
+@dataclass
+class Case:
+    name: str
+    params: Dict[str, Any]
+    build: Callable[[random.Random], Tuple[Op, Optional[PhaseTimer]]]
+
+    @property
+    def key(self) -> str:
+        suffix = ",".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.name}[{suffix}]" if suffix else self.name
+
+
+@dataclass
+class Result:
+    key: str
+    ops: int
+    seconds: float
+    ops_per_sec: float
+    us_per_op: float
+    alloc_peak_bytes_per_op: float
+    phases_us_per_op: Dict[str, float] = field(default_factory=dict)
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, **params: Any):
+    """Register a case builder: ``build(rng, **params) -> (op, phase_timer | None)``."""
+    def decorator(build: Callable[..., Tuple[Op, Optional[PhaseTimer]]]):
+        CASES.append(Case(name, params, lambda rng: build(rng, **params)))
+        return build
+    return decorator
+
+
+def measure(case_: Case, seconds: float, alloc_samples: int, seed: int) -> Result:
+    op, timer = case_.build(random.Random(seed))
+    for _ in range(50):  # warm-up
+        op()
+    if timer is not None:
+        timer.reset()
+
+    ops = 0
+    batch = 64
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        for _ in range(batch):
+            op()
+        ops += batch
+        if time.perf_counter() >= deadline:
+            break
+    elapsed = time.perf_counter() - start
+    phases = {name: total / ops * 1e6 for name, total in timer.totals.items()} if timer is not None else {}
+
+    tracemalloc.start()
+    peak_total = 0
+    for _ in range(alloc_samples):
+        tracemalloc.reset_peak()
+        base, _peak = tracemalloc.get_traced_memory()
+        op()
+        _current, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - base
+    tracemalloc.stop()
+
+    return Result(
+        key=case_.key,
+        ops=ops,
+        seconds=elapsed,
+        ops_per_sec=ops / elapsed,
+        us_per_op=elapsed / ops * 1e6,
+        alloc_peak_bytes_per_op=peak_total / max(1, alloc_samples),
+        phases_us_per_op=phases,
+    )
+
+
+# ===== Snake =====
+
+for _size in (15, 100, 200):
+    @case("snake.rules.step_state", grid=_size)
+    def _snake_step_state(rng: random.Random, grid: int) -> Tuple[Op, Optional[PhaseTimer]]:
+        state = [snake_rules.reset_state(grid, grid, rng)]
+
+        def op() -> None:
+            action = rng.choice(snake_rules.legal_moves(state[0]))
+            next_state, _reward, done, _info = snake_rules.step_state(state[0], action, rng)
+            state[0] = snake_rules.reset_state(grid, grid, rng) if done else next_state
+
+        return op, None
+
+    @case("snake.rules.step_state", grid=_size, index="occupancy")
+    def _snake_step_state_indexed(rng: random.Random, grid: int, index: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        occupancy = Occupancy(grid, grid)
+        state = [snake_rules.reset_state(grid, grid, rng, occupancy)]
+
+        def op() -> None:
+            action = rng.choice(snake_rules.legal_moves(state[0]))
+            next_state, _reward, done, _info = snake_rules.step_state(state[0], action, rng, occupancy=occupancy)
+            state[0] = snake_rules.reset_state(grid, grid, rng, occupancy) if done else next_state
+
+        return op, None
+
+    @case("snake.rules.spawn_food", grid=_size)
+    def _snake_spawn_food(rng: random.Random, grid: int) -> Tuple[Op, Optional[PhaseTimer]]:
+        state = snake_rules.reset_state(grid, grid, rng)
+        return (lambda: snake_rules.spawn_food(state, rng)), None
+
+    @case("snake.rules.spawn_food", grid=_size, index="occupancy")
+    def _snake_spawn_food_indexed(rng: random.Random, grid: int, index: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        occupancy = Occupancy(grid, grid)
+        state = snake_rules.reset_state(grid, grid, rng, occupancy)
+        return (lambda: snake_rules.spawn_food(state, rng, occupancy)), None
+
+    @case("snake.env.step", grid=_size)
+    def _snake_env_step(rng: random.Random, grid: int) -> Tuple[Op, Optional[PhaseTimer]]:
+        env = SnakeEnvironment(grid_w=grid, grid_h=grid, seed=rng.randrange(1 << 30))
+        env.reset()
+        timer = PhaseTimer()
+        timer.wrap(env, "_to_state_dict")
+
+        def op() -> None:
+            env.step(rng.randrange(4))
+
+        return op, timer
+
+    for _mode in ("planes", "window", "rays"):
+        @case("snake.env.step", grid=_size, obs_mode=_mode)
+        def _snake_env_step_encoded(rng: random.Random, grid: int, obs_mode: str) -> Tuple[Op, Optional[PhaseTimer]]:
+            env = SnakeEnvironment(grid_w=grid, grid_h=grid, seed=rng.randrange(1 << 30), obs_mode=obs_mode)
+            env.reset()
+            timer = PhaseTimer()
+            timer.wrap(env, "_to_state_dict")
+
+            def op() -> None:
+                env.step(rng.randrange(4))
+
+            return op, timer
+
+
+def _serpentine_state(grid: int, length: int) -> snake_rules.SnakeState:
+    """A snake of ``length`` folded row by row from the top-left corner, head last laid."""
+    cells = [(x if y % 2 == 0 else grid - 1 - x, y) for y in range(grid) for x in range(grid)][:length]
+    head_x, head_y = cells[-1]
+    food = next(cell for cell in ((x, grid - 1) for x in range(grid)) if cell not in cells)
+    direction = 1 if head_y % 2 == 0 else 3
+    return snake_rules.SnakeState(grid, grid, tuple(reversed(cells)), food, direction, 0, 0)
+
+
+for _length in (10, 1000):
+    @case("snake.search.expand", grid=50, length=_length, impl="step_state")
+    def _snake_expand_pure(rng: random.Random, grid: int, length: int, impl: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        state = _serpentine_state(grid, length)
+        moves = snake_rules.legal_moves(state)
+
+        def op() -> None:
+            for action in moves:
+                snake_rules.step_state(state, action, rng, spawn_mode="defer")
+
+        return op, None
+
+    @case("snake.search.expand", grid=50, length=_length, impl="board")
+    def _snake_expand_board(rng: random.Random, grid: int, length: int, impl: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        board = SnakeBoard.from_state(_serpentine_state(grid, length))
+        moves = board.legal_moves()
+
+        def op() -> None:
+            for action in moves:
+                board.step(action)
+                board.undo()
+
+        return op, None
+
+    @case("snake.search.expand", grid=50, length=_length, impl="board+tt")
+    def _snake_expand_board_tt(rng: random.Random, grid: int, length: int, impl: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        board = SnakeBoard.from_state(_serpentine_state(grid, length), keys=ZobristKeys(grid, grid))
+        table = TranspositionTable()
+        moves = board.legal_moves()
+
+        def op() -> None:
+            for action in moves:
+                board.step(action)
+                if table.get(board.hash) is None:
+                    table.put(board.hash, 0.0)
+                board.undo()
+
+        return op, None
+
+
+@case("snake.solver.act", grid=15)
+def _snake_solver_act(rng: random.Random, grid: int) -> Tuple[Op, Optional[PhaseTimer]]:
+    board = SnakeBoard.from_state(snake_rules.reset_state(grid, grid, rng))
+    solver = SnakeSolver(grid, grid)
+
+    def op() -> None:
+        _reward, done, _info = board.step(solver.act(board), rng)
+        board.forget()
+        if done:
+            board.load(snake_rules.reset_state(grid, grid, rng))
+
+    return op, None
+
+
+for _num_envs in (256, 4096):
+    @case("snake.vector.step", num_envs=_num_envs, grid=15)
+    def _snake_vector_step(rng: random.Random, num_envs: int, grid: int) -> Tuple[Op, Optional[PhaseTimer]]:
+        env = SnakeVectorEnv(num_envs=num_envs, grid_w=grid, grid_h=grid, seed=rng.randrange(1 << 30))
+        env.reset()
+        actions = np.random.default_rng(rng.randrange(1 << 30)).integers(0, 4, size=(64, num_envs))
+        index = [0]
+        timer = PhaseTimer()
+        timer.wrap(env, "_to_state_dict")
+
+        def op() -> None:
+            env.step(actions[index[0] & 63])
+            index[0] += 1
+
+        return op, timer
+
+
+# ===== Tetris =====
+
+for _w, _h in ((10, 20), (20, 40)):
+    @case("tetris.env.step", grid=f"{_w}x{_h}")
+    @case("tetris.env.step", grid=f"{_w}x{_h}", scene_mode="delta")
+    def _tetris_env_step(rng: random.Random, grid: str, scene_mode: str = "full") -> Tuple[Op, Optional[PhaseTimer]]:
+        w, h = (int(part) for part in grid.split("x"))
+        env = TetrisEnvironment(grid_w=w, grid_h=h, seed=rng.randrange(1 << 30), scene_mode=scene_mode)
+        env.reset()
+        timer = PhaseTimer()
+        for name in ("_lock_piece", "_to_state_dict", "_move", "_rotate"):
+            timer.wrap(env, name)
+
+        def op() -> None:
+            env.step(rng.choice((-1, 0, 1, 2, 3, 4, 5)))
+
+        return op, timer
+
+    @case("tetris.env.hard_drop", grid=f"{_w}x{_h}", fields="reward,done")
+    @case("tetris.env.hard_drop", grid=f"{_w}x{_h}", fields="observation,reward,done", obs_mode="features")
+    def _tetris_hard_drop(
+        rng: random.Random, grid: str, fields: str, obs_mode: str = "scene"
+    ) -> Tuple[Op, Optional[PhaseTimer]]:
+        w, h = (int(part) for part in grid.split("x"))
+        env = TetrisEnvironment(
+            grid_w=w, grid_h=h, seed=rng.randrange(1 << 30), fields=fields.split(","), obs_mode=obs_mode
+        )
+        env.reset()
+        timer = PhaseTimer()
+        timer.wrap(env, "_lock_piece")
+
+        def op() -> None:
+            env.step(rng.choice((0, 1, 2)))
+            env.step(5)
+
+        return op, timer
+
+    @case("tetris.env.place", grid=f"{_w}x{_h}", fields="reward,done")
+    def _tetris_place(rng: random.Random, grid: str, fields: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        w, h = (int(part) for part in grid.split("x"))
+        env = TetrisEnvironment(grid_w=w, grid_h=h, seed=rng.randrange(1 << 30), fields=fields.split(","))
+        env.reset()
+        timer = PhaseTimer()
+        for name in ("_find_placements", "_lock_piece"):
+            timer.wrap(env, name)
+
+        def op() -> None:
+            count = len(env.placements()["placements"])
+            if count:
+                env.place(rng.randrange(count))
+            else:
+                env.reset()
+
+        return op, timer
+
+    @case("tetris.rules.step_state", grid=f"{_w}x{_h}")
+    def _tetris_rules_step(rng: random.Random, grid: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        w, h = (int(part) for part in grid.split("x"))
+        state = [tetris_rules.reset_state(w, h, seed=rng.randrange(1 << 30))]
+
+        def op() -> None:
+            next_state, _reward, done, _info = tetris_rules.step_state(state[0], rng.choice((-1, 0, 1, 2, 3, 4, 5)))
+            state[0] = tetris_rules.reset_state(w, h, rng_state=next_state.rng_state) if done else next_state
+
+        return op, None
+
+    @case("tetris.env.clone", grid=f"{_w}x{_h}")
+    def _tetris_clone(rng: random.Random, grid: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        w, h = (int(part) for part in grid.split("x"))
+        env = TetrisEnvironment(grid_w=w, grid_h=h, seed=rng.randrange(1 << 30))
+        env.reset()
+        return env.clone, None
+
+    @case("tetris.replay.seek", grid=f"{_w}x{_h}", ops=5000, checkpoint_every=100)
+    def _tetris_replay_seek(
+        rng: random.Random, grid: str, ops: int, checkpoint_every: int
+    ) -> Tuple[Op, Optional[PhaseTimer]]:
+        w, h = (int(part) for part in grid.split("x"))
+        env = TetrisEnvironment(grid_w=w, grid_h=h, seed=rng.randrange(1 << 30), fields=(), record=True)
+        env.reset()
+        for _ in range(ops - 1):
+            env.step(rng.choice((-1, 0, 1, 2, 3, 4, 5)))
+        simulator = ReplaySimulator(env.replay(), checkpoint_every=checkpoint_every)
+        simulator.state_at(len(simulator))  # lay down every checkpoint
+
+        def op() -> None:
+            simulator.state_at(rng.randrange(len(simulator) + 1))
+
+        return op, None
+
+
+for _num_envs in (256, 4096):
+    @case("tetris.vector.step", num_envs=_num_envs, grid="10x20")
+    def _tetris_vector_step(rng: random.Random, num_envs: int, grid: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        w, h = (int(part) for part in grid.split("x"))
+        env = TetrisVectorEnv(num_envs=num_envs, grid_w=w, grid_h=h, seed=rng.randrange(1 << 30))
+        env.reset()
+        actions = np.random.default_rng(rng.randrange(1 << 30)).integers(-1, 6, size=(64, num_envs))
+        timer = PhaseTimer()
+        timer.wrap(env, "_to_state_dict")
+        index = [0]
+
+        def op() -> None:
+            env.step(actions[index[0] & 63])
+            index[0] += 1
+
+        return op, timer
+
+
+# ===== Doudizhu =====
+
+_LAIZI = {"classic": [], "tiandi_laizi": [7, 8]}
+
+
+def _random_plays(rng: random.Random, count: int) -> List[List[int]]:
+    plays = []
+    for _ in range(count):
+        hand = rng.sample(CARDS, 17)
+        plays.append(sorted(rng.sample(hand, rng.choice((1, 2, 3, 4, 5, 6)))))
+    return plays
+
+
+for _mode in ("classic", "tiandi_laizi"):
+    @case("doudizhu.get_move_type", mode=_mode)
+    def _ddz_move_type(rng: random.Random, mode: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        plays = _random_plays(rng, 1024)
+        laizi = _LAIZI[mode]
+        index = [0]
+
+        def op() -> None:
+            MoveAnalyzer.get_move_type(plays[index[0] & 1023], laizi_ranks=laizi)
+            index[0] += 1
+
+        return op, None
+
+    @case("doudizhu.can_beat", mode=_mode)
+    def _ddz_can_beat(rng: random.Random, mode: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        laizi = _LAIZI[mode]
+        moves = [m for m in (MoveAnalyzer.get_move_type(p, laizi_ranks=laizi) for p in _random_plays(rng, 4096)) if m]
+        pairs = [(rng.choice(moves), rng.choice(moves)) for _ in range(1024)]
+        index = [0]
+
+        def op() -> None:
+            current, previous = pairs[index[0] & 1023]
+            MoveAnalyzer.can_beat(current, previous)
+            index[0] += 1
+
+        return op, None
+
+    @case("doudizhu.env.reset", mode=_mode)
+    def _ddz_reset(rng: random.Random, mode: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        env = DoudizhuEnvironment(seed=rng.randrange(1 << 30), mode=mode)
+        timer = PhaseTimer()
+        timer.wrap(env, "_to_state_dict")
+        return env.reset, timer
+
+
+# ===== Gym =====
+
+for _format in ("png", "none"):
+    @case("gym.env.step", env_id="CartPole-v1", render=_format)
+    def _gym_step(rng: random.Random, env_id: str, render: str) -> Tuple[Op, Optional[PhaseTimer]]:
+        from engine.frame_encoding import FrameOptions
+        from engine.gym_wrapper import GymEnvironment
+
+        env = GymEnvironment(env_id, frame_options=FrameOptions.from_config({"format": render}))
+        env.reset()
+        timer = PhaseTimer()
+        timer.wrap(env, "_encode_frame")
+
+        def op() -> None:
+            env.step(rng.randrange(2))
+
+        return op, timer
+
+
+def compare(results: List[Result], baseline_path: str, threshold: float) -> int:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["key"]: r for r in json.load(f)["results"]}
+
+    regressions = 0
+    print(f"\nvs {baseline_path} (slowdown threshold {threshold:.0%})")
+    for result in results:
+        old = baseline.get(result.key)
+        if old is None:
+            print(f"  {result.key:<58} new")
+            continue
+        ratio = result.ops_per_sec / old["ops_per_sec"]
+        flag = "SLOWER" if ratio < 1.0 - threshold else ("faster" if ratio > 1.0 + threshold else "")
+        regressions += flag == "SLOWER"
+        print(f"  {result.key:<58} {ratio:6.2f}x {flag}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Agent Studio game rule engines.")
+    parser.add_argument("--filter", default="", help="Only run cases whose key contains this substring")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Timed run length per case")
+    parser.add_argument("--alloc-samples", type=int, default=200, help="Ops traced with tracemalloc per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--compare", default=None, help="Baseline JSON from a previous --output")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    results: List[Result] = []
+    print(f"{'case':<58} {'ops/s':>12} {'us/op':>9} {'alloc B/op':>11}  phases (us/op)")
+    for case_ in CASES:
+        if args.filter not in case_.key:
+            continue
+        try:
+            result = measure(case_, args.seconds, args.alloc_samples, args.seed)
+        except ImportError as e:
+            print(f"{case_.key:<58} skipped: {e}")
+            continue
+        results.append(result)
+        phases = " ".join(f"{name}={value:.1f}" for name, value in result.phases_us_per_op.items())
+        print(
+            f"{result.key:<58} {result.ops_per_sec:>12,.0f} {result.us_per_op:>9.2f} "
+            f"{result.alloc_peak_bytes_per_op:>11,.0f}  {phases}"
+        )
+
+    if args.output:
+        payload = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seconds": args.seconds,
+            "results": [asdict(r) for r in results],
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        print(f"\n[OK] wrote {args.output}")
+
+    if args.compare:
+        return compare(results, args.compare, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,197 @@
+"""Off-loop execution of blocking session calls.
+
+Env ``step``/``reset`` are synchronous and can be slow (Gym frame encoding,
+large boards), so the API runs them on worker lanes instead of the event loop.
+Each lane is a single worker and a session is pinned to one lane by hashing its
+id, so calls on one session stay ordered while unrelated sessions progress in
+parallel.
+
+Thread lanes host ordinary in-process envs. Env ids listed in
+``process_env_ids`` are instead built inside a process lane and represented in
+the API process by a ``RemoteSession`` proxy, which moves CPU-heavy envs out
+from under the GIL.
+
+Batch jobs that are not session calls (``map_cpu``) run on a separate pool of
+``cpu_workers`` workers: processes when process lanes are configured, threads
+otherwise. Session lanes, thread or process, never queue a batch job, so a long
+one cannot hold up a session's step.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import functools
+import multiprocessing
+import os
+import zlib
+
+from .projection import Fields
+from .session_manager import build_env, new_session_id
+
+Call = Tuple[str, Callable[..., Any], Tuple[Any, ...]]
+Outcome = Tuple[bool, Any]  # (ok, result or exception)
+
+# Envs owned by this process when it serves as a process lane.
+_worker_sessions: Dict[str, Any] = {}
+
+# Methods only some envs have; a RemoteSession exposes those its env has, so
+# ``hasattr`` checks behave as for an in-process env.
+OPTIONAL_METHODS = ("placements", "place", "replay")
+
+
+def _worker_create(session_id: str, env_id: str, config: Optional[Dict[str, Any]]) -> Tuple[str, ...]:
+    session = _worker_sessions[session_id] = build_env(env_id, config)
+    return tuple(name for name in OPTIONAL_METHODS if hasattr(session, name))
+
+
+def _worker_call(session_id: str, method: str, *args: Any) -> Any:
+    session = _worker_sessions.get(session_id)
+    if session is None:
+        raise LookupError("Session not found")
+    return getattr(session, method)(*args)
+
+
+def _worker_close(session_id: str) -> None:
+    session = _worker_sessions.pop(session_id, None)
+    if session is not None:
+        session.close()
+
+
+class RemoteSession:
+    """Proxy for an env living in a process lane. Calls block until it replies."""
+
+    def __init__(self, pool: ProcessPoolExecutor, session_id: str, env_id: str, config: Optional[Dict[str, Any]]):
+        self._pool = pool
+        self.session_id = session_id
+        self.env_id = env_id
+        self.capabilities = pool.submit(_worker_create, session_id, env_id, config).result()
+        for name in self.capabilities:
+            setattr(self, name, functools.partial(self.call, name))
+
+    def call(self, method: str, *args: Any) -> Any:
+        return self._pool.submit(_worker_call, self.session_id, method, *args).result()
+
+    def reset(self, fields: Fields = None) -> Dict[str, Any]:
+        return self.call("reset", fields)
+
+    def step(self, action: Any, fields: Fields = None) -> Dict[str, Any]:
+        return self.call("step", action, fields)
+
+    def close(self) -> None:
+        self._pool.submit(_worker_close, self.session_id).result()
+
+
+def _run_in_order(calls: Sequence[Tuple[Callable[..., Any], Tuple[Any, ...]]]) -> List[Outcome]:
+    outcomes: List[Outcome] = []
+    for fn, args in calls:
+        try:
+            outcomes.append((True, fn(*args)))
+        except Exception as e:
+            outcomes.append((False, e))
+    return outcomes
+
+
+class SessionExecutor:
+    """Runs session calls on single-worker lanes chosen by session id."""
+
+    def __init__(
+        self,
+        thread_lanes: int = 4,
+        process_lanes: int = 0,
+        process_env_ids: Iterable[str] = (),
+        cpu_workers: int = 2,
+    ):
+        self._threads: List[ThreadPoolExecutor] = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"session-lane-{i}")
+            for i in range(max(1, thread_lanes))
+        ]
+        context = multiprocessing.get_context("spawn")
+        self._processes: List[ProcessPoolExecutor] = [
+            ProcessPoolExecutor(max_workers=1, mp_context=context) for _ in range(max(0, process_lanes))
+        ]
+        self.process_env_ids = set(process_env_ids)
+        # Created on first map_cpu call; processes when the deployment already uses them.
+        self._cpu_workers = max(1, cpu_workers)
+        self._cpu_pool: Optional[Executor] = None
+
+    @staticmethod
+    def _index(session_id: str, lanes: int) -> int:
+        return zlib.crc32(session_id.encode("utf-8")) % lanes
+
+    def lane(self, session_id: str) -> Executor:
+        return self._threads[self._index(session_id, len(self._threads))]
+
+    def _build(self, session_id: str, env_id: str, config: Optional[Dict[str, Any]]) -> Any:
+        if self._processes and (env_id in self.process_env_ids or "*" in self.process_env_ids):
+            pool = self._processes[self._index(session_id, len(self._processes))]
+            return RemoteSession(pool, session_id, env_id, config)
+        return build_env(env_id, config)
+
+    async def run(self, session_id: str, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.lane(session_id), fn, *args)
+
+    async def create(self, env_id: str, config: Optional[Dict[str, Any]] = None) -> Tuple[str, Any]:
+        """Build a new env on its lane. The caller registers it with the manager."""
+        session_id = new_session_id()
+        session = await self.run(session_id, self._build, session_id, env_id, config)
+        return session_id, session
+
+    @property
+    def cpu_workers(self) -> int:
+        return self._cpu_workers
+
+    async def map_cpu(self, fn: Callable[[Any], Any], items: Sequence[Any]) -> List[Any]:
+        """Run ``fn(item)`` for each item on the CPU pool, never on a session lane.
+
+        The pool is a process pool when process lanes are configured (``fn`` and
+        the items must then be picklable) and a thread pool otherwise.
+        """
+        if self._cpu_pool is None:
+            if self._processes:
+                context = multiprocessing.get_context("spawn")
+                self._cpu_pool = ProcessPoolExecutor(max_workers=self._cpu_workers, mp_context=context)
+            else:
+                self._cpu_pool = ThreadPoolExecutor(max_workers=self._cpu_workers, thread_name_prefix="cpu-pool")
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(loop.run_in_executor(self._cpu_pool, fn, item) for item in items))
+
+    async def run_many(self, calls: Sequence[Call]) -> List[Outcome]:
+        """Run calls grouped by lane: one job per lane, in submission order within it."""
+        by_lane: Dict[int, List[int]] = {}
+        for i, (session_id, _fn, _args) in enumerate(calls):
+            by_lane.setdefault(self._index(session_id, len(self._threads)), []).append(i)
+
+        loop = asyncio.get_running_loop()
+        jobs = [
+            loop.run_in_executor(self._threads[lane], _run_in_order, [(calls[i][1], calls[i][2]) for i in indices])
+            for lane, indices in by_lane.items()
+        ]
+        outcomes: List[Outcome] = [(False, None)] * len(calls)
+        for indices, lane_outcomes in zip(by_lane.values(), await asyncio.gather(*jobs)):
+            for i, outcome in zip(indices, lane_outcomes):
+                outcomes[i] = outcome
+        return outcomes
+
+    def shutdown(self) -> None:
+        for pool in self._threads:
+            pool.shutdown(wait=False, cancel_futures=True)
+        for pool in self._processes:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _env_list(raw: str) -> List[str]:
+    return [part.strip() for part in raw.split(",") if part.strip()]
+
+
+# Global instance
+session_executor = SessionExecutor(
+    thread_lanes=int(os.environ.get("GAME_THREAD_LANES", str(os.cpu_count() or 4))),
+    process_lanes=int(os.environ.get("GAME_PROCESS_LANES", "0")),
+    process_env_ids=_env_list(os.environ.get("GAME_PROCESS_ENVS", "")),
+    cpu_workers=int(os.environ.get("GAME_CPU_WORKERS", "2")),
+)
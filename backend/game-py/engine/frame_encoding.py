@@ -0,0 +1,84 @@
+"""Frame encoding options for frame-rendered (Gym) sessions.
+
+Options come from the ``render`` key of a session's start config, e.g.
+``{"render": {"format": "jpeg", "quality": 70, "every": 4, "scale": 0.5}}``.
+
+- ``format``: ``png`` (default), ``jpeg``, ``webp``, ``raw`` (RGB bytes) or
+  ``none`` (the env is created without a renderer at all).
+- ``quality``: 1-100, used by ``jpeg`` and ``webp``.
+- ``every``: encode every k-th step; other steps carry ``frame: null``.
+  The reset frame is always encoded.
+- ``scale``: downscale factor in (0, 1].
+- ``legacy_frame``: also copy the frame to the top-level ``frame`` field.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Dict, Optional
+import base64
+
+import numpy as np
+from PIL import Image
+
+FRAME_FORMATS = ("png", "jpeg", "webp", "raw", "none")
+_MIME_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp", "raw": "application/octet-stream"}
+
+
+@dataclass(frozen=True)
+class FrameOptions:
+    format: str = "png"
+    quality: int = 80
+    every: int = 1
+    scale: float = 1.0
+    legacy_frame: bool = False
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "FrameOptions":
+        config = config or {}
+        options = cls(
+            format=str(config.get("format", "png")).lower(),
+            quality=int(config.get("quality", 80)),
+            every=int(config.get("every", 1)),
+            scale=float(config.get("scale", 1.0)),
+            legacy_frame=bool(config.get("legacy_frame", False)),
+        )
+        if options.format not in FRAME_FORMATS:
+            raise ValueError(f"Unknown frame format: {options.format}")
+        if not 1 <= options.quality <= 100:
+            raise ValueError("Frame quality must be in [1, 100]")
+        if options.every < 1:
+            raise ValueError("Frame interval 'every' must be >= 1")
+        if not 0.0 < options.scale <= 1.0:
+            raise ValueError("Frame scale must be in (0, 1]")
+        return options
+
+    @property
+    def enabled(self) -> bool:
+        return self.format != "none"
+
+
+def encode_frame(frame: np.ndarray, options: FrameOptions) -> Dict[str, Any]:
+    """Encode an RGB array into the ``render`` fields for a frame session."""
+    img = Image.fromarray(frame)
+    if options.scale < 1.0:
+        size = (max(1, round(img.width * options.scale)), max(1, round(img.height * options.scale)))
+        img = img.resize(size, Image.BILINEAR)
+
+    if options.format == "raw":
+        data = img.tobytes()
+        fields: Dict[str, Any] = {"shape": [img.height, img.width, len(img.getbands())]}
+    else:
+        buffered = BytesIO()
+        if options.format == "png":
+            img.save(buffered, format="PNG")
+        else:
+            img.save(buffered, format=options.format.upper(), quality=options.quality)
+        data = buffered.getvalue()
+        fields = {}
+
+    encoded = base64.b64encode(data).decode("utf-8")
+    fields["frame"] = f"data:{_MIME_TYPES[options.format]};base64,{encoded}"
+    fields["encoding"] = options.format
+    return fields
@@ -0,0 +1,250 @@
+"""Session protocol for the /ws/game WebSocket.
+
+One socket multiplexes any number of sessions. Every client message is a JSON
+object with an ``op`` and an optional client-chosen ``id`` echoed in the reply:
+
+- ``{"op": "start", "env_id": "Snake", "config": {...}}``
+- ``{"op": "step", "session_id": "...", "action": 1}``
+- ``{"op": "reset", "session_id": "..."}``
+- ``{"op": "placements", "session_id": "..."}`` / ``{"op": "place", "session_id": "...", "index": 3}``
+  (Tetris macro actions; ``place`` is published to subscribers as a ``step``)
+- ``{"op": "close", "session_id": "..."}``
+- ``{"op": "subscribe", "session_id": "..."}`` / ``{"op": "unsubscribe", ...}``
+
+``start``, ``step`` and ``reset`` accept ``"fields"`` to project the returned
+state (see ``engine.projection``).
+
+Replies look like ``{"id": ..., "op": ..., "ok": true, "session_id": ..., "state": ...}``
+or ``{"id": ..., "op": ..., "ok": false, "error": "..."}``. Messages are handled
+concurrently (up to ``MAX_IN_FLIGHT`` per socket), so a slow call on one session
+does not hold up the others; replies for different sessions can arrive out of
+order and are matched by ``id``. Calls on one session still run in the order
+they were sent: messages are handled by tasks started in arrival order, and
+each task queues its call on the session's lane before it first yields. Subscribers receive
+``{"op": "event", "event": "step" | "reset" | "close", "session_id": ..., "state": ...}``
+whenever the session advances, whichever client (HTTP or socket) drove it.
+
+Text frames carry JSON. Binary frames carry msgpack (see
+``engine.serialization``; NumPy arrays travel as raw buffers), or UTF-8 JSON
+when msgpack is not installed. Replies use the frame type of the request and
+events use the frame type of the ``subscribe`` request unless it passes
+``"binary"``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Set, Tuple
+import asyncio
+import json
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from . import metrics
+from .executor import SessionExecutor
+from .projection import parse_fields
+from .serialization import decode_msgpack, encode_json, encode_msgpack, msgpack
+from .session_manager import SessionManager
+
+# Events are dropped for a subscriber whose outbound queue is this far behind.
+EVENT_QUEUE_LIMIT = 256
+# Messages handled at once per socket; reading pauses while this many are pending.
+MAX_IN_FLIGHT = 32
+# Ops that address an existing session (everything but ``start``).
+SESSION_OPS = ("subscribe", "unsubscribe", "close", "step", "reset", "placements", "place")
+
+
+class SessionHub:
+    """Fan-out of session events to subscribed sockets."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Dict["GameSocket", bool]] = {}
+
+    def subscribe(self, session_id: str, socket: "GameSocket", binary: bool) -> None:
+        self._subscribers.setdefault(session_id, {})[socket] = binary
+
+    def unsubscribe(self, session_id: str, socket: "GameSocket") -> None:
+        subs = self._subscribers.get(session_id)
+        if subs is None:
+            return
+        subs.pop(socket, None)
+        if not subs:
+            del self._subscribers[session_id]
+
+    def drop(self, socket: "GameSocket") -> None:
+        for session_id in list(self._subscribers):
+            self.unsubscribe(session_id, socket)
+
+    def publish(
+        self,
+        session_id: str,
+        event: str,
+        state: Optional[Dict[str, Any]] = None,
+        source: Optional["GameSocket"] = None,
+    ) -> None:
+        subs = self._subscribers.get(session_id)
+        if not subs:
+            return
+        message = {"op": "event", "event": event, "session_id": session_id, "state": state}
+        for socket, binary in list(subs.items()):
+            if socket is not source:
+                socket.push(message, binary)
+
+
+class GameSocket:
+    """Serves the session protocol on one accepted WebSocket."""
+
+    def __init__(self, websocket: WebSocket, manager: SessionManager, executor: SessionExecutor, hub: SessionHub):
+        self.websocket = websocket
+        self.manager = manager
+        self.executor = executor
+        self.hub = hub
+        self.owned: Set[str] = set()
+        self._outbox: "asyncio.Queue[Tuple[Dict[str, Any], bool]]" = asyncio.Queue()
+        self._slots = asyncio.Semaphore(MAX_IN_FLIGHT)
+        self._pending: Set["asyncio.Task[None]"] = set()
+
+    def push(self, message: Dict[str, Any], binary: bool) -> None:
+        """Queue an unsolicited event; dropped if this client is too far behind."""
+        if self._outbox.qsize() < EVENT_QUEUE_LIMIT:
+            self._outbox.put_nowait((message, binary))
+
+    async def serve(self) -> None:
+        writer = asyncio.create_task(self._write_loop())
+        try:
+            while True:
+                raw = await self.websocket.receive()
+                if raw["type"] == "websocket.disconnect":
+                    break
+                binary = raw.get("bytes") is not None
+                payload = raw["bytes"] if binary else raw.get("text")
+                await self._slots.acquire()
+                task = asyncio.create_task(self._reply(payload, binary))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            writer.cancel()
+            self.hub.drop(self)
+            # The server may cancel this handler once the client is gone, so the
+            # cleanup runs as its own task and is only shielded here.
+            await asyncio.shield(asyncio.ensure_future(self._close_all()))
+
+    async def _close_all(self) -> None:
+        """Close every owned session, after in-flight calls (which may start more) finish."""
+        if self._pending:
+            await asyncio.wait(self._pending)
+        await asyncio.gather(*(self._close(session_id) for session_id in list(self.owned)), return_exceptions=True)
+        self.owned.clear()
+
+    async def _reply(self, payload: Any, binary: bool) -> None:
+        try:
+            self._outbox.put_nowait((await self.handle(payload, binary), binary))
+        finally:
+            self._slots.release()
+
+    async def _write_loop(self) -> None:
+        while True:
+            message, binary = await self._outbox.get()
+            if binary:
+                data = encode_msgpack(message) if msgpack is not None else encode_json(message)
+                await self.websocket.send_bytes(data)
+            else:
+                await self.websocket.send_text(encode_json(message).decode("utf-8"))
+
+    async def _close(self, session_id: str) -> None:
+        session = self.manager.pop_session(session_id)
+        if session is not None:
+            await self.executor.run(session_id, self.manager.close_sessions, [session])
+        self.owned.discard(session_id)
+        self.hub.publish(session_id, "close", source=self)
+
+    async def handle(self, payload: Any, binary: bool = False) -> Dict[str, Any]:
+        try:
+            if binary and msgpack is not None:
+                message = decode_msgpack(payload)
+            else:
+                message = json.loads(payload)
+        except Exception as e:
+            return {"op": "error", "ok": False, "error": f"Invalid message: {e}"}
+        if not isinstance(message, dict):
+            return {"op": "error", "ok": False, "error": "Message must be a JSON object"}
+
+        op = message.get("op")
+        reply: Dict[str, Any] = {"id": message.get("id"), "op": op}
+        try:
+            reply.update(await self._dispatch(op, message, binary))
+            reply["ok"] = True
+        except Exception as e:
+            if op == "start" or op in SESSION_OPS:
+                metrics.ERRORS.inc(f"ws_{op}")
+            reply["ok"] = False
+            reply["error"] = str(e)
+        return reply
+
+    async def _run(self, op: str, session_id: str, session: Any, *args: Any) -> Any:
+        """Call ``session.<op>`` on its lane, timed like the HTTP routes."""
+        env_id = self.manager.env_ids.get(session_id, "unknown")
+        return await self.executor.run(session_id, metrics.timed_call, op, env_id, getattr(session, op), *args)
+
+    async def _dispatch(self, op: Any, message: Dict[str, Any], binary: bool) -> Dict[str, Any]:
+        fields = parse_fields(message.get("fields"))
+        if op == "start":
+            env_id = message.get("env_id", "CartPole-v1")
+            session_id, session = await self.executor.create(env_id, message.get("config"))
+            self.manager.add_session(env_id, session, session_id)
+            self.owned.add(session_id)
+            try:
+                state = await self._run("reset", session_id, session, fields)
+            except Exception:
+                # The client never learns this id, so don't leave the session behind.
+                await self._close(session_id)
+                raise
+            return {"session_id": session_id, "state": state}
+
+        session_id = message.get("session_id")
+        if op in SESSION_OPS and not isinstance(session_id, str):
+            raise ValueError("session_id is required")
+
+        if op == "subscribe":
+            if self.manager.get_session(session_id) is None:
+                raise LookupError("Session not found")
+            self.hub.subscribe(session_id, self, bool(message.get("binary", binary)))
+            return {"session_id": session_id}
+        if op == "unsubscribe":
+            self.hub.unsubscribe(session_id, self)
+            return {"session_id": session_id}
+        if op == "close":
+            await self._close(session_id)
+            return {"session_id": session_id}
+
+        session = self.manager.get_session(session_id)
+        if op == "placements":
+            if session is None:
+                raise LookupError("Session not found")
+            if not hasattr(session, "placements"):
+                raise ValueError("Session does not support placements")
+            return {"session_id": session_id, **await self._run("placements", session_id, session)}
+        if op == "step":
+            if session is None:
+                raise LookupError("Session not found")
+            state = await self._run("step", session_id, session, message.get("action", -1), fields)
+        elif op == "reset":
+            if session is None:
+                raise LookupError("Session not found")
+            state = await self._run("reset", session_id, session, fields)
+        elif op == "place":
+            if session is None:
+                raise LookupError("Session not found")
+            if not hasattr(session, "place"):
+                raise ValueError("Session does not support placements")
+            state = await self._run("place", session_id, session, message.get("index", -1), fields)
+            op = "step"
+        else:
+            raise ValueError(f"Unknown op: {op!r}")
+        self.hub.publish(session_id, op, state, source=self)
+        return {"session_id": session_id, "state": state}
+
+
+# Global instance
+session_hub = SessionHub()
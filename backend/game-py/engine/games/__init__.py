@@ -1,6 +1,6 @@
 """Games module - each game is a separate submodule."""
-from .snake import SnakeEnvironment
-from .tetris import TetrisEnvironment
+from .snake import SnakeEnvironment, SnakeVectorEnv
+from .tetris import TetrisEnvironment, TetrisVectorEnv
 from .doudizhu import DoudizhuEnvironment
 
-__all__ = ["SnakeEnvironment", "TetrisEnvironment", "DoudizhuEnvironment"]
+__all__ = ["SnakeEnvironment", "SnakeVectorEnv", "TetrisEnvironment", "TetrisVectorEnv", "DoudizhuEnvironment"]
@@ -1,8 +1,11 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import random
 from dataclasses import dataclass, field
 
+from ...metrics import STATE_BUILD_SECONDS, timed
+from ...projection import Fields, parse_fields, wants
+
 from .types import CardType, Move, RANK_STR
 from .rules import new_deck, distribute_cards, sort_hand, MoveAnalyzer
 
@@ -24,13 +27,14 @@ class DoudizhuEnvironment:
     Simplified Doudizhu Environment.
     Supports Classic and Tiandi LaiZi modes.
     """
-    def __init__(self, seed: Optional[int] = None, mode: str = "classic"):
+    def __init__(self, seed: Optional[int] = None, mode: str = "classic", fields: Optional[Iterable[str]] = None):
         self._rng = random.Random(seed)
         self.mode = mode
+        self.fields = parse_fields(fields)
         self._state: Optional[DoudizhuState] = None
         self._done = False
         
-    def reset(self) -> Dict[str, Any]:
+    def reset(self, fields: Fields = None) -> Dict[str, Any]:
         deck = new_deck()
         self._rng.shuffle(deck)
         
@@ -80,14 +84,14 @@ class DoudizhuEnvironment:
         )
         self._done = False
         
-        return self._to_state_dict(reward=0.0)
+        return self._to_state_dict(reward=0.0, fields=fields)
 
-    def step(self, action: List[int]) -> Dict[str, Any]:
+    def step(self, action: List[int], fields: Fields = None) -> Dict[str, Any]:
         """
         Action is a list of card integers.
         """
         if self._state is None or self._done:
-            return self.reset()
+            return self.reset(fields)
 
         state = self._state
         current_player = state.current_player
@@ -108,7 +112,7 @@ class DoudizhuEnvironment:
         info = {"valid": True, "msg": "ok"}
         
         if not has_cards:
-            return self._to_state_dict(reward=-10.0, info={"valid": False, "msg": "Target cards not in hand"})
+            return self._to_state_dict(reward=-10.0, info={"valid": False, "msg": "Target cards not in hand"}, fields=fields)
 
         # Analyze Move
         move = MoveAnalyzer.get_move_type(action, laizi_ranks=state.laizi_ranks)
@@ -140,7 +144,7 @@ class DoudizhuEnvironment:
                     info["msg"] = "Move does not beat previous move"
 
         if not valid_logic:
-            return self._to_state_dict(reward=-1.0, info=info)
+            return self._to_state_dict(reward=-1.0, info=info, fields=fields)
             
         # Logic is Valid
         if len(action) > 0:
@@ -167,51 +171,56 @@ class DoudizhuEnvironment:
             
         state.current_player = (state.current_player + 1) % 3
         
-        return self._to_state_dict(reward=reward, info=info)
+        return self._to_state_dict(reward=reward, info=info, fields=fields)
 
-    def _to_state_dict(self, reward: float = 0.0, info: Dict = {}) -> Dict[str, Any]:
+    @timed(STATE_BUILD_SECONDS, lambda env: "Doudizhu")
+    def _to_state_dict(self, reward: float = 0.0, info: Dict = {}, fields: Fields = None) -> Dict[str, Any]:
         if self._state is None:
             return {}
             
         s = self._state
-        
-        scene = {
-            "landlord": s.landlord,
-            "holeCards": [RANK_STR[c] for c in s.hole_cards],
-            "laizi": [RANK_STR[c] for c in s.laizi_ranks], # New field
-            "players": [
-                {
-                    "id": i,
-                    "role": "landlord" if i == s.landlord else "peasant",
-                    "handCount": len(s.hands[i]),
-                    "hand": [RANK_STR[c] for c in s.hands[i]],
-                    "isTurn": i == s.current_player
-                }
-                for i in range(3)
-            ],
-            "lastMove": {
-                "player": s.last_move_player,
-                "cards": [RANK_STR[c] for c in s.last_move.cards] if s.last_move else [],
-                "type": s.last_move.type.name if s.last_move else "None"
-            },
-            "winner": s.winner
-        }
-        
-        obs = {
-            "my_hand": s.hands[s.current_player],
-            "last_move": s.last_move.cards if s.last_move else [],
-            "role": "landlord" if s.current_player == s.landlord else "peasant",
-            "laizi_ranks": s.laizi_ranks
-        }
+        fields = self.fields if fields is None else fields
+        result: Dict[str, Any] = {}
 
-        return {
-            "observation": obs,
-            "reward": reward,
-            "done": self._done,
-            "truncated": False,
-            "info": info,
-            "render": {"mode": "scene", "scene": scene}
-        }
+        if wants(fields, "observation"):
+            result["observation"] = {
+                "my_hand": list(s.hands[s.current_player]),
+                "last_move": list(s.last_move.cards) if s.last_move else [],
+                "role": "landlord" if s.current_player == s.landlord else "peasant",
+                "laizi_ranks": list(s.laizi_ranks)
+            }
+        if wants(fields, "reward"):
+            result["reward"] = reward
+        if wants(fields, "done"):
+            result["done"] = self._done
+        if wants(fields, "truncated"):
+            result["truncated"] = False
+        if wants(fields, "info"):
+            result["info"] = info
+        if wants(fields, "render"):
+            scene = {
+                "landlord": s.landlord,
+                "holeCards": [RANK_STR[c] for c in s.hole_cards],
+                "laizi": [RANK_STR[c] for c in s.laizi_ranks], # New field
+                "players": [
+                    {
+                        "id": i,
+                        "role": "landlord" if i == s.landlord else "peasant",
+                        "handCount": len(s.hands[i]),
+                        "hand": [RANK_STR[c] for c in s.hands[i]],
+                        "isTurn": i == s.current_player
+                    }
+                    for i in range(3)
+                ],
+                "lastMove": {
+                    "player": s.last_move_player,
+                    "cards": [RANK_STR[c] for c in s.last_move.cards] if s.last_move else [],
+                    "type": s.last_move.type.name if s.last_move else "None"
+                },
+                "winner": s.winner
+            }
+            result["render"] = {"mode": "scene", "scene": scene}
+        return result
     
     def close(self):
         pass
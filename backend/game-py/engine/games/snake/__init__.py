@@ -1,5 +1,10 @@
 """Snake game module."""
+from .board import SnakeBoard
+from .encoders import SnakeEncoder
 from .environment import SnakeEnvironment
 from .rules import SnakeState, Direction
+from .vector import SnakeVectorEnv
+from .zobrist import TranspositionTable, ZobristKeys
 
-__all__ = ["SnakeEnvironment", "SnakeState", "Direction"]
+__all__ = ["SnakeEnvironment", "SnakeVectorEnv", "SnakeBoard", "SnakeEncoder", "SnakeState", "Direction",
+           "ZobristKeys", "TranspositionTable"]
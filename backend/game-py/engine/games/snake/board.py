@@ -0,0 +1,266 @@
+"""Mutable Snake board with O(1) step and undo, for tree search.
+
+``rules.step_state`` copies the body tuple on every move, so its cost grows
+with the snake. ``SnakeBoard`` keeps the body in a ring buffer sized to the
+grid (head at ``head_ptr``, tail ``length - 1`` slots behind) next to an
+``Occupancy`` index, so a move writes the new head, releases the tail and
+touches nothing else. Each ``step`` or ``set_food`` pushes an undo record and
+``undo`` pops it, which is what a depth-first planner needs::
+
+    for action in board.legal_moves():
+        reward, done, info = board.step(action)
+        ...
+        board.undo()
+
+Transitions match ``rules.step_state`` exactly: rewards, terminal states and,
+when an ``rng`` is passed, the spawned food for the same RNG state. Without an
+``rng`` a step that eats behaves like ``spawn_mode="defer"``. ``undo`` does
+not rewind the ``rng``. ``from_state``/``to_state`` convert to and from the
+frozen ``SnakeState``.
+
+Built with ``keys`` (a ``ZobristKeys``), the board also keeps ``hash`` equal
+to ``keys.hash_state(board.to_state())`` through steps and undos.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+import random
+
+from .occupancy import Cell, Occupancy
+from .rules import STARVATION_STEPS, SnakeState, is_opposite
+from .zobrist import NO_LINK, ZobristKeys
+
+_DELTAS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+# Undo record tags
+_NOOP = 0
+_STEP = 1
+_FOOD = 2
+
+
+class SnakeBoard:
+    def __init__(
+        self,
+        grid_w: int,
+        grid_h: int,
+        *,
+        allow_180: bool = False,
+        wrap_walls: bool = False,
+        die_on_self_collision: bool = True,
+        keys: Optional[ZobristKeys] = None,
+    ):
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.allow_180 = allow_180
+        self.wrap_walls = wrap_walls
+        self.die_on_self_collision = die_on_self_collision
+        self.occupancy = Occupancy(grid_w, grid_h)
+        self._body: List[Optional[Cell]] = [None] * (grid_w * grid_h)
+        self._head_ptr = 0
+        self.length = 0
+        self.food: Optional[Cell] = None
+        self.direction = 1
+        self.score = 0
+        self.steps_since_eat = 0
+        self.keys = keys
+        self.hash = 0
+        self._journal: List[Tuple[Any, ...]] = []
+
+    @classmethod
+    def from_state(cls, state: SnakeState, **options: Any) -> "SnakeBoard":
+        board = cls(state.grid_w, state.grid_h, **options)
+        board.load(state)
+        return board
+
+    def load(self, state: SnakeState) -> None:
+        """Replace the position with ``state`` and clear the undo history."""
+        length = len(state.snake)
+        for i, cell in enumerate(state.snake):
+            self._body[length - 1 - i] = cell
+        self._head_ptr = length - 1
+        self.length = length
+        self.occupancy.clear(state.snake)
+        self.food = state.food
+        self.direction = state.direction
+        self.score = state.score
+        self.steps_since_eat = state.steps_since_eat
+        self.hash = self.keys.hash_state(state) if self.keys is not None else 0
+        self._journal.clear()
+
+    def to_state(self) -> SnakeState:
+        return SnakeState(
+            grid_w=self.grid_w,
+            grid_h=self.grid_h,
+            snake=self.snake(),
+            food=self.food,
+            direction=self.direction,
+            score=self.score,
+            steps_since_eat=self.steps_since_eat,
+        )
+
+    def snake(self) -> Tuple[Cell, ...]:
+        """Body cells, head first (O(length))."""
+        cap = len(self._body)
+        return tuple(self._body[(self._head_ptr - i) % cap] for i in range(self.length))
+
+    @property
+    def head(self) -> Cell:
+        return self._body[self._head_ptr]
+
+    @property
+    def tail(self) -> Cell:
+        return self._body[(self._head_ptr - self.length + 1) % len(self._body)]
+
+    @property
+    def depth(self) -> int:
+        """Number of undo records on the stack."""
+        return len(self._journal)
+
+    def forget(self) -> None:
+        """Drop the undo history, keeping the position (for long forward-only runs)."""
+        self._journal.clear()
+
+    def legal_moves(self) -> List[int]:
+        if self.allow_180:
+            return [0, 1, 2, 3]
+        return [action for action in (0, 1, 2, 3) if not is_opposite(action, self.direction)]
+
+    def set_food(self, food: Optional[Cell]) -> None:
+        if food is not None:
+            if not (0 <= food[0] < self.grid_w and 0 <= food[1] < self.grid_h):
+                raise ValueError("Food out of bounds")
+            if self.occupancy.is_occupied(food):
+                raise ValueError("Food cannot be placed on snake body")
+        self._journal.append((_FOOD, self.food, self.hash))
+        if self.keys is not None:
+            self.hash ^= self.keys.food(self.food) ^ self.keys.food(food)
+        self.food = food
+
+    def step(self, action: int, rng: Optional[random.Random] = None) -> Tuple[float, bool, Dict[str, object]]:
+        """Advance one tick in place; returns ``(reward, done, info)`` like ``step_state``."""
+        new_direction = self.direction
+        if action in (0, 1, 2, 3):
+            if self.allow_180 or not is_opposite(action, self.direction):
+                new_direction = action
+
+        dx, dy = _DELTAS[new_direction]
+        head_x, head_y = self._body[self._head_ptr]
+        nx = head_x + dx
+        ny = head_y + dy
+        if self.wrap_walls:
+            nx %= self.grid_w
+            ny %= self.grid_h
+        elif not (0 <= nx < self.grid_w and 0 <= ny < self.grid_h):
+            self._journal.append((_NOOP,))
+            return -10.0, True, {"eaten": False, "reason": "wall"}
+        new_head = (nx, ny)
+
+        will_eat = self.food is not None and new_head == self.food
+        on_body = self.occupancy.is_occupied(new_head)
+        # Moving into the current tail is allowed if not eating.
+        if on_body and self.die_on_self_collision and (will_eat or new_head != self.tail):
+            self._journal.append((_NOOP,))
+            return -10.0, True, {"eaten": False, "reason": "self"}
+
+        steps_since_eat = self.steps_since_eat + 1
+        if steps_since_eat >= STARVATION_STEPS:
+            self._journal.append((_NOOP,))
+            return -100.0, True, {"eaten": False, "reason": "starvation"}
+
+        body = self._body
+        cap = len(body)
+        old_ptr = self._head_ptr
+        old_length = self.length
+        old_head = body[old_ptr]
+        record_head = (_STEP, self.direction, self.food, self.score, self.steps_since_eat, old_length, self.hash)
+        keys = self.keys
+        if keys is not None:
+            self.hash ^= (
+                keys.direction(self.direction)
+                ^ keys.direction(new_direction)
+                ^ keys.segment(new_head, keys.link(old_head, new_head))
+            )
+
+        self._head_ptr = (old_ptr + 1) % cap
+        body[self._head_ptr] = new_head
+        self.occupancy.occupy(new_head)
+        self.direction = new_direction
+        self.steps_since_eat = steps_since_eat
+
+        if not will_eat:
+            if on_body and not self.die_on_self_collision:
+                # Bite: keep the head and old segments 0..k-2, as step_state does.
+                k = 1
+                while body[(old_ptr - k) % cap] != new_head:
+                    k += 1
+                removed_from = k - 1
+                removed = tuple(body[(old_ptr - i) % cap] for i in range(removed_from, old_length))
+            else:
+                removed_from = old_length - 1
+                removed = (body[(old_ptr - removed_from) % cap],)
+            if keys is not None:
+                self._unhash_removed(old_ptr, old_length, removed_from, removed)
+            for cell in removed:
+                self.occupancy.release(cell)
+            self.length = removed_from + 1
+            self._journal.append(record_head + (removed_from, removed))
+            return -0.1, False, {"eaten": False}
+
+        self._journal.append(record_head + (0, ()))
+        self.length = old_length + 1
+        self.score += 1
+        self.steps_since_eat = 0
+        food = None
+        if self.length < cap and rng is not None:
+            food = self.occupancy.sample(rng)
+        if keys is not None:
+            self.hash ^= keys.food(self.food) ^ keys.food(food)
+        self.food = food
+        if self.length == cap:
+            return 100.0, True, {"eaten": True, "won": True}
+        if rng is None:
+            return 10.0, False, {"eaten": True, "pending_food": True, "free_count": self.occupancy.free_count}
+        if food is None:
+            return 100.0, True, {"eaten": True, "won": True}
+        return 10.0, False, {"eaten": True}
+
+    def undo(self) -> None:
+        """Revert the most recent ``step`` or ``set_food``."""
+        record = self._journal.pop()
+        tag = record[0]
+        if tag == _NOOP:
+            return
+        if tag == _FOOD:
+            _tag, self.food, self.hash = record
+            return
+
+        _tag, direction, food, score, steps_since_eat, length, self.hash, removed_from, removed = record
+        body = self._body
+        cap = len(body)
+        self.occupancy.release(body[self._head_ptr])
+        self._head_ptr = (self._head_ptr - 1) % cap
+        for i, cell in enumerate(removed):
+            body[(self._head_ptr - removed_from - i) % cap] = cell
+            self.occupancy.occupy(cell)
+        self.length = length
+        self.direction = direction
+        self.food = food
+        self.score = score
+        self.steps_since_eat = steps_since_eat
+
+    def _unhash_removed(self, old_ptr: int, old_length: int, removed_from: int, removed: Tuple[Cell, ...]) -> None:
+        """Drop the keys of segments leaving the tail and re-key the new tail."""
+        keys = self.keys
+        body = self._body
+        cap = len(body)
+        h = self.hash
+        for offset, cell in enumerate(removed):
+            i = removed_from + offset
+            if i == old_length - 1:
+                h ^= keys.segment(cell, NO_LINK)
+            else:
+                h ^= keys.segment(cell, keys.link(body[(old_ptr - i - 1) % cap], cell))
+        tail = body[(old_ptr - removed_from + 1) % cap]  # old segment removed_from - 1, or the new head
+        h ^= keys.segment(tail, keys.link(removed[0], tail)) ^ keys.segment(tail, NO_LINK)
+        self.hash = h
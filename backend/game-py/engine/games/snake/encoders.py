@@ -0,0 +1,213 @@
+"""Tensor observations for ``SnakeEnvironment``, maintained incrementally.
+
+The default Snake observation is the body as a list of ``[x, y]`` pairs, which
+clients turn into grids themselves every tick. ``SnakeEncoder`` keeps that grid
+inside the env instead and offers three array observations built from it:
+
+- ``planes``: (7, H, W) uint8 one-hot planes, in ``PLANES`` order: head, body
+  (without the head), food, then one plane per direction marking the head cell
+  when the snake faces that way;
+- ``window``: (2r+1, 2r+1) int8 crop of ``CELL_*`` values centred on the head
+  and rotated so the snake faces up; cells past a wall read ``CELL_WALL``;
+- ``rays``: float32 vector of 8 rays cast from the head (forward first, then
+  clockwise, relative to the heading), each giving ``1 / distance`` to the
+  nearest wall, body segment and food (0 when none), followed by a one-hot of
+  the absolute direction.
+
+A move changes at most the new head, the old head, the cells that left the
+tail and the food, so ``update`` costs O(1) per step (O(bitten segments) after
+a non-lethal bite) rather than O(W*H). Crops only read the cells they cover;
+on walled boards each ray is one strided slice of the flat grid, with wall and
+food distances computed directly.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .rules import SnakeState
+from .vector import CELL_BODY, CELL_EMPTY, CELL_FOOD, CELL_HEAD
+
+CELL_WALL = 4
+
+OBS_MODES = ("scene", "planes", "window", "rays")
+PLANES = ("head", "body", "food", "up", "right", "down", "left")
+
+_PLANE_HEAD = 0
+_PLANE_BODY = 1
+_PLANE_FOOD = 2
+_PLANE_DIRECTION = 3
+
+# (dx, dy) of the 8 rays for a snake facing up, clockwise from forward.
+_RAYS = ((0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1))
+RAY_FEATURES = len(_RAYS) * 3 + 4
+
+
+def _rotate(dx: int, dy: int, direction: int) -> Tuple[int, int]:
+    """Turn an up-relative offset clockwise by ``direction`` quarter turns."""
+    for _ in range(direction):
+        dx, dy = -dy, dx
+    return dx, dy
+
+
+_RAYS_BY_DIRECTION = tuple(tuple(_rotate(dx, dy, direction) for dx, dy in _RAYS) for direction in range(4))
+_DIRECTION_ONE_HOT = tuple(tuple(1.0 if d == direction else 0.0 for d in range(4)) for direction in range(4))
+
+
+class SnakeEncoder:
+    """Grid and plane views of a Snake position, updated from state transitions."""
+
+    def __init__(self, grid_w: int, grid_h: int, wrap_walls: bool = False, window_radius: int = 5):
+        if window_radius < 0:
+            raise ValueError("window_radius must be non-negative")
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.wrap_walls = wrap_walls
+        self.window_radius = window_radius
+        self.cells = np.zeros((grid_h, grid_w), dtype=np.int8)
+        self._flat = bytearray(grid_w * grid_h)  # cells, for scalar reads
+        self._planes = np.zeros((len(PLANES), grid_h, grid_w), dtype=np.uint8)
+        # Walled boards read crops from a copy padded with CELL_WALL.
+        pad = 0 if wrap_walls else window_radius
+        self._padded = np.full((grid_h + 2 * pad, grid_w + 2 * pad), CELL_WALL, dtype=np.int8)
+        self._pad = pad
+        self._head: Optional[Tuple[int, int]] = None
+        self._food: Optional[Tuple[int, int]] = None
+        self._direction = 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.cells.nbytes + len(self._flat) + self._planes.nbytes + self._padded.nbytes
+
+    def reset(self, state: SnakeState) -> None:
+        """Rebuild from ``state`` in O(W*H)."""
+        self.cells.fill(CELL_EMPTY)
+        self._flat[:] = bytes(len(self._flat))
+        self._planes.fill(0)
+        self._padded.fill(CELL_WALL)
+        pad = self._pad
+        self._padded[pad:pad + self.grid_h, pad:pad + self.grid_w] = CELL_EMPTY
+        for cell in state.snake[1:]:
+            self._set(cell, CELL_BODY)
+        self._head = None
+        self._food = None
+        self._move_head(state.snake[0], state.direction)
+        self._set_food(state.food)
+
+    def update(self, prev: SnakeState, nxt: SnakeState) -> None:
+        """Apply the transition ``prev`` -> ``nxt = step_state(prev, ...)``."""
+        old, new = prev.snake, nxt.snake
+        if new is not old:
+            for cell in old[len(new) - 1:]:
+                self._set(cell, CELL_EMPTY)
+            if len(new) > 1:
+                self._set(new[1], CELL_BODY)
+            self._move_head(new[0], nxt.direction)
+        if nxt.food != self._food:
+            self._set_food(nxt.food)
+
+    def observe(self, mode: str) -> np.ndarray:
+        if mode == "planes":
+            return self._planes.copy()
+        if mode == "window":
+            return self.window()
+        if mode == "rays":
+            return self.rays()
+        raise ValueError(f"Unknown observation mode: {mode}")
+
+    def window(self) -> np.ndarray:
+        r = self.window_radius
+        x, y = self._head if self._head is not None else (0, 0)
+        if self.wrap_walls:
+            rows = np.arange(y - r, y + r + 1) % self.grid_h
+            cols = np.arange(x - r, x + r + 1) % self.grid_w
+            crop = self.cells[np.ix_(rows, cols)]
+        else:
+            crop = self._padded[y:y + 2 * r + 1, x:x + 2 * r + 1]
+        # Turn the crop so the heading points up.
+        return np.ascontiguousarray(np.rot90(crop, k=self._direction))
+
+    def rays(self) -> np.ndarray:
+        if self._head is None:
+            return np.zeros(RAY_FEATURES, dtype=np.float32)
+        cast = self._wrapped_ray if self.wrap_walls else self._walled_ray
+        features = []
+        for dx, dy in _RAYS_BY_DIRECTION[self._direction]:
+            wall, body, food = cast(dx, dy)
+            features += (1.0 / wall if wall else 0.0, 1.0 / body if body else 0.0, 1.0 / food if food else 0.0)
+        features += _DIRECTION_ONE_HOT[self._direction]
+        return np.array(features, dtype=np.float32)
+
+    def _walled_ray(self, dx: int, dy: int) -> Tuple[int, int, int]:
+        """Distances (0 = none) along one ray, scanning the flat grid with a stride."""
+        w, h = self.grid_w, self.grid_h
+        hx, hy = self._head
+        wall = min(
+            w - hx if dx > 0 else hx + 1 if dx < 0 else w + h,
+            h - hy if dy > 0 else hy + 1 if dy < 0 else w + h,
+        )
+        body = 0
+        if wall > 1:
+            stride = dy * w + dx
+            start = hy * w + hx + stride
+            stop = start + stride * (wall - 1)
+            body = self._flat[start:stop if stop >= 0 else None:stride].find(CELL_BODY) + 1
+
+        food = 0
+        if self._food is not None:
+            rx, ry = self._food[0] - hx, self._food[1] - hy
+            k = abs(rx) or abs(ry)
+            if (rx, ry) == (dx * k, dy * k):
+                food = k
+        return wall, body, food
+
+    def _wrapped_ray(self, dx: int, dy: int) -> Tuple[int, int, int]:
+        w, h = self.grid_w, self.grid_h
+        flat = self._flat
+        hx, hy = self._head
+        x, y = hx, hy
+        body = food = 0
+        for distance in range(1, max(w, h) + 1):
+            x = (x + dx) % w
+            y = (y + dy) % h
+            if x == hx and y == hy:
+                break
+            value = flat[y * w + x]
+            if value == CELL_BODY and not body:
+                body = distance
+            elif value == CELL_FOOD and not food:
+                food = distance
+        return 0, body, food
+
+    def _set(self, cell: Tuple[int, int], value: int) -> None:
+        x, y = cell
+        self.cells[y, x] = value
+        self._flat[y * self.grid_w + x] = value
+        self._padded[y + self._pad, x + self._pad] = value
+        self._planes[_PLANE_BODY, y, x] = value == CELL_BODY
+
+    def _move_head(self, head: Tuple[int, int], direction: int) -> None:
+        if self._head is not None:
+            x, y = self._head
+            self._planes[_PLANE_HEAD, y, x] = 0
+            self._planes[_PLANE_DIRECTION + self._direction, y, x] = 0
+        x, y = head
+        self._set(head, CELL_HEAD)
+        self._planes[_PLANE_HEAD, y, x] = 1
+        self._planes[_PLANE_DIRECTION + direction, y, x] = 1
+        self._head = head
+        self._direction = direction
+
+    def _set_food(self, food: Optional[Tuple[int, int]]) -> None:
+        if self._food is not None:
+            x, y = self._food
+            self._planes[_PLANE_FOOD, y, x] = 0
+            if self.cells[y, x] == CELL_FOOD:
+                self._set(self._food, CELL_EMPTY)
+        if food is not None:
+            x, y = food
+            self._set(food, CELL_FOOD)
+            self._planes[_PLANE_FOOD, y, x] = 1
+        self._food = food
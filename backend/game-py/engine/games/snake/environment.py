@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
 import random
 
 from . import rules
+from .encoders import OBS_MODES, SnakeEncoder
+from .occupancy import Occupancy
+from ...metrics import STATE_BUILD_SECONDS, timed
+from ...projection import Fields, parse_fields, wants
 
 Direction = rules.Direction
 SnakeState = rules.SnakeState
@@ -16,6 +20,9 @@ class SnakeEnvironment:
     - Step advances one tick.
     - Reward: -0.1 per step, +1 on eating, -10 on losing, +100 on winning
     - Done: collision with wall or self (configurable)
+    - Observation: the body as ``[x, y]`` pairs (``obs_mode="scene"``) or an
+      array kept up to date in place: ``"planes"``, ``"window"`` or ``"rays"``
+      (see ``encoders.SnakeEncoder``)
     """
 
     def __init__(
@@ -26,29 +33,40 @@ class SnakeEnvironment:
         allow_180: bool = False,
         wrap_walls: bool = False,
         die_on_self_collision: bool = True,
+        fields: Optional[Iterable[str]] = None,
+        obs_mode: str = "scene",
+        window_radius: int = 5,
     ):
+        if obs_mode not in OBS_MODES:
+            raise ValueError(f"obs_mode must be one of {', '.join(OBS_MODES)}")
         self.grid_w = grid_w
         self.grid_h = grid_h
         self.allow_180 = allow_180
         self.wrap_walls = wrap_walls
         self.die_on_self_collision = die_on_self_collision
+        self.fields = parse_fields(fields)
         self._rng = random.Random(seed)
         self._done = False
         self._truncated = False
         self._state: Optional[SnakeState] = None
+        self._occupancy = Occupancy(grid_w, grid_h)
+        self.obs_mode = obs_mode
+        self._encoder = SnakeEncoder(grid_w, grid_h, wrap_walls, window_radius) if obs_mode != "scene" else None
 
-    def reset(self) -> Dict[str, Any]:
-        state = rules.reset_state(self.grid_w, self.grid_h, self._rng)
+    def reset(self, fields: Fields = None) -> Dict[str, Any]:
+        state = rules.reset_state(self.grid_w, self.grid_h, self._rng, self._occupancy)
         self._done = False
         self._truncated = False
         self._state = state
-        return self._to_state_dict(reward=0.0)
+        if self._encoder is not None:
+            self._encoder.reset(state)
+        return self._to_state_dict(reward=0.0, fields=fields)
 
-    def step(self, action: int) -> Dict[str, Any]:
+    def step(self, action: int, fields: Fields = None) -> Dict[str, Any]:
         if self._state is None:
-            return self.reset()
+            return self.reset(fields)
         if self._done or self._truncated:
-            return self.reset()
+            return self.reset(fields)
 
         next_state, reward, done, _info = rules.step_state(
             self._state,
@@ -58,10 +76,13 @@ class SnakeEnvironment:
             wrap_walls=self.wrap_walls,
             die_on_self_collision=self.die_on_self_collision,
             spawn_mode="random",
+            occupancy=self._occupancy,
         )
+        if self._encoder is not None:
+            self._encoder.update(self._state, next_state)
         self._state = next_state
         self._done = done
-        return self._to_state_dict(reward=reward)
+        return self._to_state_dict(reward=reward, fields=fields)
 
     def close(self) -> None:
         return
@@ -69,32 +90,50 @@ class SnakeEnvironment:
     def get_empty_cells(self):
         if self._state is None:
             return []
-        return rules.empty_cells(self._state)
+        return self._occupancy.free_cells()
 
-    def _to_state_dict(self, reward: float) -> Dict[str, Any]:
+    @timed(STATE_BUILD_SECONDS, lambda env: "Snake")
+    def _to_state_dict(self, reward: float, fields: Fields = None) -> Dict[str, Any]:
         assert self._state is not None
-
-        observation = {
-            "grid": {"w": self._state.grid_w, "h": self._state.grid_h},
-            "snake": [[x, y] for (x, y) in self._state.snake],
-            "food": [self._state.food[0], self._state.food[1]] if self._state.food is not None else [-1, -1],
-            "direction": self._state.direction,
-            "score": self._state.score,
-        }
-
-        scene = {
-            "grid": {"w": self._state.grid_w, "h": self._state.grid_h},
-            "snake": observation["snake"],
-            "food": observation["food"],
-            "score": self._state.score,
-            "direction": self._state.direction,
-        }
-
-        return {
-            "observation": observation,
-            "reward": reward,
-            "done": self._done,
-            "truncated": self._truncated,
-            "info": {"score": self._state.score},
-            "render": {"mode": "scene", "scene": scene},
-        }
+        fields = self.fields if fields is None else fields
+
+        result: Dict[str, Any] = {}
+        snake = None
+        food = None
+        if (wants(fields, "observation") and self._encoder is None) or wants(fields, "render"):
+            snake = [[x, y] for (x, y) in self._state.snake]
+            food = [self._state.food[0], self._state.food[1]] if self._state.food is not None else [-1, -1]
+
+        if wants(fields, "observation") and self._encoder is not None:
+            result["observation"] = {
+                "grid": {"w": self._state.grid_w, "h": self._state.grid_h},
+                self.obs_mode: self._encoder.observe(self.obs_mode),
+                "direction": self._state.direction,
+                "score": self._state.score,
+            }
+        elif wants(fields, "observation"):
+            result["observation"] = {
+                "grid": {"w": self._state.grid_w, "h": self._state.grid_h},
+                "snake": snake,
+                "food": food,
+                "direction": self._state.direction,
+                "score": self._state.score,
+            }
+        if wants(fields, "reward"):
+            result["reward"] = reward
+        if wants(fields, "done"):
+            result["done"] = self._done
+        if wants(fields, "truncated"):
+            result["truncated"] = self._truncated
+        if wants(fields, "info"):
+            result["info"] = {"score": self._state.score}
+        if wants(fields, "render"):
+            scene = {
+                "grid": {"w": self._state.grid_w, "h": self._state.grid_h},
+                "snake": snake,
+                "food": food,
+                "score": self._state.score,
+                "direction": self._state.direction,
+            }
+            result["render"] = {"mode": "scene", "scene": scene}
+        return result
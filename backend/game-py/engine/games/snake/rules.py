@@ -4,10 +4,14 @@ from dataclasses import dataclass, replace
 from typing import Dict, List, Literal, Optional, Sequence, Tuple
 import random
 
+from .occupancy import Occupancy
+
 
 Direction = int  # 0: up, 1: right, 2: down, 3: left
 SpawnMode = Literal["random", "defer"]
 
+STARVATION_STEPS = 200  # steps without eating before the episode is lost
+
 
 @dataclass(frozen=True)
 class SnakeState:
@@ -44,7 +48,7 @@ def empty_cells(state: SnakeState) -> List[Tuple[int, int]]:
     ]
 
 
-def reset_state(grid_w: int, grid_h: int, rng: random.Random) -> SnakeState:
+def reset_state(grid_w: int, grid_h: int, rng: random.Random, occupancy: Optional[Occupancy] = None) -> SnakeState:
     cx = grid_w // 2
     cy = grid_h // 2
     snake: Tuple[Tuple[int, int], ...] = ((cx, cy), (cx - 1, cy), (cx - 2, cy))
@@ -58,11 +62,15 @@ def reset_state(grid_w: int, grid_h: int, rng: random.Random) -> SnakeState:
         score=0,
         steps_since_eat=0,
     )
-    food = spawn_food(state, rng)
+    if occupancy is not None:
+        occupancy.clear(snake)
+    food = spawn_food(state, rng, occupancy)
     return replace(state, food=food)
 
 
-def spawn_food(state: SnakeState, rng: random.Random) -> Optional[Tuple[int, int]]:
+def spawn_food(state: SnakeState, rng: random.Random, occupancy: Optional[Occupancy] = None) -> Optional[Tuple[int, int]]:
+    if occupancy is not None:
+        return occupancy.sample(rng)
     cells = empty_cells(state)
     if not cells:
         return None
@@ -104,6 +112,7 @@ def step_state(
     wrap_walls: bool = False,
     die_on_self_collision: bool = True,
     spawn_mode: SpawnMode = "random",
+    occupancy: Optional[Occupancy] = None,
 ) -> Tuple[SnakeState, float, bool, Dict[str, object]]:
     """Pure transition function for Snake.
 
@@ -115,6 +124,13 @@ def step_state(
     spawn_mode:
       - "random": place new food immediately after eating.
       - "defer": after eating, set food=None and return pending spawn info.
+
+    occupancy:
+      Optional index of the cells covered by ``state.snake``. When given it is
+      used for collision checks and food spawning and is updated in place to
+      match the returned state. In "defer" mode ``info`` then carries
+      ``free_count`` instead of the full ``empty_cells`` list; sample with
+      ``occupancy.sample(rng)``.
     """
 
     # Direction update
@@ -137,8 +153,14 @@ def step_state(
     will_eat = state.food is not None and new_head == state.food
 
     # Self collision: moving into current tail is allowed if not eating.
-    body_to_check: Sequence[Tuple[int, int]] = state.snake if will_eat else state.snake[:-1]
-    if new_head in body_to_check:
+    if occupancy is not None:
+        on_body = occupancy.is_occupied(new_head)
+        hits_body = on_body and (will_eat or new_head != state.snake[-1])
+    else:
+        on_body = not die_on_self_collision and new_head in state.snake
+        body_to_check: Sequence[Tuple[int, int]] = state.snake if will_eat else state.snake[:-1]
+        hits_body = new_head in body_to_check
+    if hits_body:
         if die_on_self_collision:
             return state, -10.0, True, {"eaten": False, "reason": "self"}
 
@@ -146,12 +168,11 @@ def step_state(
     snake_list.insert(0, new_head)
 
     # Non-lethal self-collision: bite cuts tail.
-    if not die_on_self_collision:
-        try:
-            dup_idx = snake_list[1:].index(new_head) + 1
-            snake_list = snake_list[:dup_idx]
-        except ValueError:
-            pass
+    bitten: Sequence[Tuple[int, int]] = ()
+    if not die_on_self_collision and on_body:
+        dup_idx = snake_list[1:].index(new_head) + 1
+        bitten = snake_list[dup_idx:]
+        snake_list = snake_list[:dup_idx]
 
     reward = -0.1
     new_score = state.score
@@ -159,9 +180,14 @@ def step_state(
     steps_since_eat = state.steps_since_eat + 1
     info: Dict[str, object] = {"eaten": False}
 
-    if steps_since_eat >= 200:
+    if steps_since_eat >= STARVATION_STEPS:
         return state, -100.0, True, {"eaten": False, "reason": "starvation"}
 
+    if occupancy is not None:
+        occupancy.occupy(new_head)
+        for cell in bitten:
+            occupancy.release(cell)
+
     if will_eat:
         reward = 10.0
         new_score = state.score + 1
@@ -192,7 +218,7 @@ def step_state(
                 score=new_score,
                 steps_since_eat=steps_since_eat,
             )
-            new_food = spawn_food(tmp_state, rng)
+            new_food = spawn_food(tmp_state, rng, occupancy)
             if new_food is None:
                 return tmp_state, 100.0, True, {"eaten": True, "won": True}
         else:
@@ -207,9 +233,14 @@ def step_state(
                 steps_since_eat=steps_since_eat,
             )
             info["pending_food"] = True
-            info["empty_cells"] = empty_cells(tmp_state)
+            if occupancy is not None:
+                info["free_count"] = occupancy.free_count
+            else:
+                info["empty_cells"] = empty_cells(tmp_state)
     else:
-        snake_list.pop()  # move tail
+        tail = snake_list.pop()  # move tail
+        if occupancy is not None:
+            occupancy.release(tail)
 
     next_state = SnakeState(
         grid_w=state.grid_w,
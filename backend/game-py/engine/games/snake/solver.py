@@ -0,0 +1,232 @@
+"""Scripted Snake baseline: shortest safe path to food, else follow the tail.
+
+``SnakeSolver.act`` picks the next action for a ``SnakeBoard``:
+
+1. Search a shortest path from the head to the food (BFS). Body cells count as
+   obstacles only until the tail has moved off them, so paths may run through
+   cells that free up in time.
+2. Accept the path only if, in the position reached by eating along it, the
+   head can still reach the tail, so eating never seals the snake in. That
+   position is derived from the path and the current body directly.
+3. Otherwise stall safely: take the move that keeps the tail reachable and
+   maximizes the distance to it, tracing the long way around the body the
+   way a Hamiltonian cycle would.
+4. With no safe move left, take the one with the most reachable space.
+
+An accepted path stays valid until the food is eaten (only the tail frees
+cells meanwhile), so it is cached and followed without further searching;
+a plan is computed once per food rather than once per step. Neighbor tables
+per cell are precomputed for the board size and wall mode.
+
+``play_episodes`` runs whole episodes and is what the solver API endpoint
+spreads over worker lanes.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+import random
+import time
+
+from . import rules
+from .board import SnakeBoard
+from .occupancy import Cell
+
+_DELTAS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+class SnakeSolver:
+    def __init__(self, grid_w: int, grid_h: int, wrap_walls: bool = False):
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self._neighbors: List[List[Tuple[int, int]]] = []
+        for y in range(grid_h):
+            for x in range(grid_w):
+                moves = []
+                for action, (dx, dy) in enumerate(_DELTAS):
+                    nx, ny = x + dx, y + dy
+                    if wrap_walls:
+                        nx %= grid_w
+                        ny %= grid_h
+                    elif not (0 <= nx < grid_w and 0 <= ny < grid_h):
+                        continue
+                    moves.append((action, ny * grid_w + nx))
+                self._neighbors.append(moves)
+        self._plan: Deque[int] = deque()
+        self._plan_food: Optional[Cell] = None
+        self._plan_head: Optional[Cell] = None
+        self.plans = 0
+
+    def act(self, board: SnakeBoard) -> int:
+        if self._plan and board.food == self._plan_food and board.head == self._plan_head:
+            return self._follow_plan(board)
+        self._plan.clear()
+
+        w = self.grid_w
+        snake = [y * w + x for (x, y) in board.snake()]
+        food = board.food[1] * w + board.food[0] if board.food is not None else -1
+        if food >= 0:
+            path = self._path(snake, food)
+            if path is not None and self._safe_after(snake, path):
+                self.plans += 1
+                self._plan.extend(action for action, _cell in path)
+                self._plan_food = board.food
+                self._plan_head = board.head
+                return self._follow_plan(board)
+        return self._stall(board, snake, food)
+
+    def _follow_plan(self, board: SnakeBoard) -> int:
+        action = self._plan.popleft()
+        dx, dy = _DELTAS[action]
+        self._plan_head = ((board.head[0] + dx) % self.grid_w, (board.head[1] + dy) % self.grid_h)
+        return action
+
+    def _bfs(self, snake: Sequence[int], target: int) -> Tuple[List[int], List[int], List[int]]:
+        """Time-aware BFS from ``snake[0]``; stops early once ``target`` is reached.
+
+        Returns ``(dist, parent, action)`` lists indexed by cell, ``dist`` -1
+        where unreached.
+        """
+        cells = self.grid_w * self.grid_h
+        free_at = [0] * cells  # moves until a cell is vacated: 1 for the tail
+        length = len(snake)
+        for i, cell in enumerate(snake):
+            free_at[cell] = length - i
+        dist = [-1] * cells
+        parent = [-1] * cells
+        via = [-1] * cells
+        start = snake[0]
+        dist[start] = 0
+        queue = [start]
+        neighbors = self._neighbors
+        for cell in queue:
+            t = dist[cell] + 1
+            for action, nxt in neighbors[cell]:
+                if dist[nxt] < 0 and free_at[nxt] <= t:
+                    dist[nxt] = t
+                    parent[nxt] = cell
+                    via[nxt] = action
+                    if nxt == target:
+                        return dist, parent, via
+                    queue.append(nxt)
+        return dist, parent, via
+
+    def _path(self, snake: Sequence[int], target: int) -> Optional[List[Tuple[int, int]]]:
+        """Shortest ``[(action, cell), ...]`` from the head to ``target``."""
+        dist, parent, via = self._bfs(snake, target)
+        if dist[target] < 0:
+            return None
+        path: List[Tuple[int, int]] = []
+        cell = target
+        while cell != snake[0]:
+            path.append((via[cell], cell))
+            cell = parent[cell]
+        path.reverse()
+        return path
+
+    def _tail_reachable(self, snake: Sequence[int]) -> bool:
+        if len(snake) <= 2:
+            return True
+        return self._bfs(snake, snake[-1])[0][snake[-1]] >= 0
+
+    def _safe_after(self, snake: List[int], path: Sequence[Tuple[int, int]]) -> bool:
+        """Whether the tail stays reachable once ``path`` has eaten the food.
+
+        The body after the path is the path reversed followed by what is left
+        of the old body (one segment longer for the food), so no moves are
+        actually played.
+        """
+        length = len(snake) + 1
+        if length >= self.grid_w * self.grid_h:
+            return True  # eating wins
+        body = [cell for _action, cell in reversed(path)]
+        if len(body) < length:
+            body.extend(snake[: length - len(body)])
+        else:
+            del body[length:]
+        return self._tail_reachable(body)
+
+    def _stall(self, board: SnakeBoard, snake: List[int], food: int) -> int:
+        best_action, best_key = None, None
+        fallback_action, fallback_area = None, -1
+        tail = snake[-1]
+        legal = board.legal_moves()
+        for action, cell in self._neighbors[snake[0]]:
+            if action not in legal:
+                continue
+            eats = cell == food
+            if cell in snake and (eats or cell != tail):
+                continue
+            body = [cell] + (snake if eats else snake[:-1])
+            if len(body) <= 2:
+                tail_distance = 0
+            else:
+                dist = self._bfs(body, body[-1])[0]
+                tail_distance = dist[body[-1]]
+            if tail_distance >= 0:
+                key = (tail_distance, not eats)
+                if best_key is None or key > best_key:
+                    best_action, best_key = action, key
+            else:
+                area = sum(1 for d in self._bfs(body, -1)[0] if d >= 0)
+                if area > fallback_area:
+                    fallback_action, fallback_area = action, area
+        if best_action is not None:
+            return best_action
+        if fallback_action is not None:
+            return fallback_action
+        return board.direction
+
+
+def play_episodes(seeds: Sequence[int], config: Optional[Dict[str, Any]] = None, max_steps: int = 100_000) -> List[Dict[str, Any]]:
+    """Play one solver episode per seed; top-level so process lanes can run it."""
+    config = config or {}
+    grid_w = config.get("grid_w", 15)
+    grid_h = config.get("grid_h", 15)
+    options = {
+        "allow_180": config.get("allow_180", False),
+        "wrap_walls": config.get("wrap_walls", False),
+        "die_on_self_collision": config.get("die_on_self_collision", True),
+    }
+    solver = SnakeSolver(grid_w, grid_h, wrap_walls=options["wrap_walls"])
+    results = []
+    for seed in seeds:
+        rng = random.Random(seed)
+        board = SnakeBoard.from_state(rules.reset_state(grid_w, grid_h, rng), **options)
+        start = time.perf_counter()
+        steps = 0
+        outcome = "max_steps"
+        while steps < max_steps:
+            reward, done, info = board.step(solver.act(board), rng)
+            board.forget()
+            steps += 1
+            if done:
+                outcome = "won" if info.get("won") else str(info.get("reason"))
+                break
+        results.append({
+            "seed": seed,
+            "score": board.score,
+            "steps": steps,
+            "outcome": outcome,
+            "seconds": time.perf_counter() - start,
+        })
+    return results
+
+
+def summarize(results: Sequence[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    scores = [r["score"] for r in results]
+    outcomes: Dict[str, int] = {}
+    for r in results:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+    return {
+        "episodes": len(results),
+        "mean_score": sum(scores) / len(scores) if scores else 0.0,
+        "min_score": min(scores, default=0),
+        "max_score": max(scores, default=0),
+        "mean_steps": sum(r["steps"] for r in results) / len(results) if results else 0.0,
+        "outcomes": outcomes,
+        "seconds": seconds,
+        "episodes_per_minute": len(results) / seconds * 60 if seconds > 0 else 0.0,
+        "scores": scores,
+    }
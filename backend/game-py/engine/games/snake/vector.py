@@ -0,0 +1,244 @@
+"""Vectorized Snake: N boards stepped together in NumPy.
+
+``SnakeVectorEnv`` follows ``snake.rules`` (``allow_180``, ``wrap_walls``,
+``die_on_self_collision``, rewards, starvation and win) but keeps every board
+in shared arrays, so one ``step`` call advances all of them:
+
+- ``occupied`` (N, W*H): how many body segments cover each cell;
+- ``body`` (N, W*H): ring buffer of flat cell indices, the head at
+  ``head_ptr`` and the tail ``length - 1`` slots behind it;
+- ``food``, ``direction``, ``score``, ``steps_since_eat``: one entry per board.
+
+Finished boards are reset within the same ``step``: their ``done`` flag is set
+and the returned observation is already the first one of the next episode
+(``info.score`` still holds the final score). Food placement uses the env's
+own NumPy generator, so seeded runs do not reproduce ``SnakeEnvironment``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional, Union
+
+import numpy as np
+
+from .rules import STARVATION_STEPS
+from ...metrics import STATE_BUILD_SECONDS, timed
+from ...projection import Fields, parse_fields, wants
+
+# Board cell values in observations
+CELL_EMPTY = 0
+CELL_BODY = 1
+CELL_HEAD = 2
+CELL_FOOD = 3
+
+_DX = np.array([0, 1, 0, -1], dtype=np.int64)
+_DY = np.array([-1, 0, 1, 0], dtype=np.int64)
+
+# Food is placed by rejection sampling for this many rounds, then exactly.
+_REJECTION_ROUNDS = 8
+
+
+class SnakeVectorEnv:
+    """``num_envs`` Snake boards with batched ``step``/``reset``.
+
+    - Actions: one per board (or a single int for all), 0=Up, 1=Right, 2=Down,
+      3=Left, anything else keeps the current direction.
+    - Observation: ``board`` (N, H, W) int8 of ``CELL_*`` values, plus
+      ``direction`` and ``score`` arrays.
+    """
+
+    def __init__(
+        self,
+        num_envs: int = 16,
+        grid_w: int = 15,
+        grid_h: int = 15,
+        seed: Optional[int] = None,
+        allow_180: bool = False,
+        wrap_walls: bool = False,
+        die_on_self_collision: bool = True,
+        fields: Optional[Iterable[str]] = None,
+    ):
+        if num_envs <= 0:
+            raise ValueError("num_envs must be positive")
+        if grid_w < 4 or grid_h < 1:
+            raise ValueError("Snake boards must be at least 4x1")
+        self.num_envs = num_envs
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.allow_180 = allow_180
+        self.wrap_walls = wrap_walls
+        self.die_on_self_collision = die_on_self_collision
+        self.fields = parse_fields(fields)
+        self._rng = np.random.default_rng(seed)
+
+        cells = grid_w * grid_h
+        self.occupied = np.zeros((num_envs, cells), dtype=np.uint8)
+        self.body = np.zeros((num_envs, cells), dtype=np.int64)
+        self.head_ptr = np.zeros(num_envs, dtype=np.int64)
+        self.length = np.zeros(num_envs, dtype=np.int64)
+        self.food = np.full(num_envs, -1, dtype=np.int64)
+        self.direction = np.ones(num_envs, dtype=np.int64)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.steps_since_eat = np.zeros(num_envs, dtype=np.int64)
+        self._rows = np.arange(num_envs)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes
+            for array in (self.occupied, self.body, self.head_ptr, self.length, self.food,
+                          self.direction, self.score, self.steps_since_eat)
+        )
+
+    def reset(self, fields: Fields = None) -> Dict[str, Any]:
+        self._reset_boards(self._rows)
+        zeros = np.zeros(self.num_envs, dtype=bool)
+        return self._to_state_dict(np.zeros(self.num_envs), zeros, self.score.copy(), fields)
+
+    def step(self, actions: Union[int, Iterable[int], np.ndarray], fields: Fields = None) -> Dict[str, Any]:
+        n = self.num_envs
+        cells = self.grid_w * self.grid_h
+        rows = self._rows
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.ndim and actions.shape != (n,):
+            raise ValueError(f"Expected {n} actions, got {actions.size}")
+        actions = np.broadcast_to(actions, (n,))
+
+        # Direction update
+        turn = (actions >= 0) & (actions <= 3)
+        if not self.allow_180:
+            turn &= (actions - self.direction) % 4 != 2
+        new_dir = np.where(turn, actions, self.direction)
+
+        heads = self.body[rows, self.head_ptr]
+        nx = heads % self.grid_w + _DX[new_dir]
+        ny = heads // self.grid_w + _DY[new_dir]
+        if self.wrap_walls:
+            nx %= self.grid_w
+            ny %= self.grid_h
+            wall = np.zeros(n, dtype=bool)
+        else:
+            wall = (nx < 0) | (nx >= self.grid_w) | (ny < 0) | (ny >= self.grid_h)
+            np.clip(nx, 0, self.grid_w - 1, out=nx)
+            np.clip(ny, 0, self.grid_h - 1, out=ny)
+        new_head = ny * self.grid_w + nx
+
+        will_eat = ~wall & (new_head == self.food)
+        tails = self.body[rows, (self.head_ptr - self.length + 1) % cells]
+        on_body = ~wall & (self.occupied[rows, new_head] > 0)
+        # Moving into the current tail is allowed if not eating.
+        hits_body = on_body & (will_eat | (new_head != tails))
+        dead_self = hits_body if self.die_on_self_collision else np.zeros(n, dtype=bool)
+        steps = self.steps_since_eat + 1
+        starved = ~wall & ~dead_self & (steps >= STARVATION_STEPS)
+        lost = wall | dead_self | starved
+        alive = ~lost
+
+        reward = np.where(will_eat, 10.0, -0.1)
+        reward[wall | dead_self] = -10.0
+        reward[starved] = -100.0
+
+        # A non-lethal bite keeps the head and the segments before the bitten
+        # one, and, as in rules.step_state, then drops one more from the tail.
+        bite = alive & on_body if not self.die_on_self_collision else np.zeros(n, dtype=bool)
+        moved = alive & ~will_eat & ~bite
+        self.occupied[rows[moved], tails[moved]] -= 1
+
+        live = rows[alive]
+        self.head_ptr[live] = (self.head_ptr[live] + 1) % cells
+        self.body[live, self.head_ptr[live]] = new_head[live]
+        self.occupied[live, new_head[live]] += 1
+        self.direction[live] = new_dir[live]
+        self.steps_since_eat[live] = steps[live]
+        for board in rows[bite]:
+            self._bite(board, new_head[board])
+
+        eaters = rows[alive & will_eat]
+        self.length[eaters] += 1
+        self.score[eaters] += 1
+        self.steps_since_eat[eaters] = 0
+        won = np.zeros(n, dtype=bool)
+        won[eaters] = self.length[eaters] == cells
+        reward[won] = 100.0
+        self.food[eaters] = -1
+        self._spawn_food(rows[alive & will_eat & ~won])
+
+        done = lost | won
+        final_score = self.score.copy()
+        self._reset_boards(rows[done])
+        return self._to_state_dict(reward, done, final_score, fields)
+
+    def close(self) -> None:
+        return
+
+    def _bite(self, board: int, new_head: int) -> None:
+        """Cut one board's body where the new head landed on it."""
+        cells = self.grid_w * self.grid_h
+        old_head_ptr = self.head_ptr[board] - 1
+        old_slots = (old_head_ptr - np.arange(self.length[board])) % cells
+        k = int(np.argmax(self.body[board, old_slots] == new_head))
+        # New body: the head plus old segments 0..k-2; release k-1 and beyond.
+        for slot in old_slots[k - 1:]:
+            self.occupied[board, self.body[board, slot]] -= 1
+        self.length[board] = k
+
+    def _reset_boards(self, boards: np.ndarray) -> None:
+        if boards.size == 0:
+            return
+        cx = self.grid_w // 2
+        cy = self.grid_h // 2
+        start = cy * self.grid_w + cx - np.arange(3)[::-1]  # tail..head
+        self.occupied[boards] = 0
+        self.occupied[boards[:, None], start[None, :]] = 1
+        self.body[boards, :3] = start
+        self.head_ptr[boards] = 2
+        self.length[boards] = 3
+        self.direction[boards] = 1  # right
+        self.score[boards] = 0
+        self.steps_since_eat[boards] = 0
+        self.food[boards] = -1
+        self._spawn_food(boards)
+
+    def _spawn_food(self, boards: np.ndarray) -> None:
+        """Place food on a uniformly random free cell of each board."""
+        cells = self.grid_w * self.grid_h
+        pending = boards
+        for _ in range(_REJECTION_ROUNDS):
+            if pending.size == 0:
+                return
+            picks = self._rng.integers(0, cells, size=pending.size)
+            free = self.occupied[pending, picks] == 0
+            self.food[pending[free]] = picks[free]
+            pending = pending[~free]
+        # Nearly full boards: pick the k-th free cell directly.
+        for board in pending:
+            free_cells = np.flatnonzero(self.occupied[board] == 0)
+            self.food[board] = self._rng.choice(free_cells) if free_cells.size else -1
+
+    def _observation(self) -> Dict[str, Any]:
+        board = (self.occupied != 0).view(np.int8)  # CELL_BODY where occupied
+        board[self._rows, self.body[self._rows, self.head_ptr]] = CELL_HEAD
+        has_food = self.food >= 0
+        board[self._rows[has_food], self.food[has_food]] = CELL_FOOD
+        return {
+            "board": board.reshape(self.num_envs, self.grid_h, self.grid_w),
+            "direction": self.direction.astype(np.int8),
+            "score": self.score.astype(np.int32),
+        }
+
+    @timed(STATE_BUILD_SECONDS, lambda env: "SnakeVector")
+    def _to_state_dict(self, reward: np.ndarray, done: np.ndarray, final_score: np.ndarray, fields: Fields = None) -> Dict[str, Any]:
+        fields = self.fields if fields is None else fields
+
+        result: Dict[str, Any] = {}
+        if wants(fields, "observation"):
+            result["observation"] = self._observation()
+        if wants(fields, "reward"):
+            result["reward"] = reward
+        if wants(fields, "done"):
+            result["done"] = done
+        if wants(fields, "truncated"):
+            result["truncated"] = np.zeros(self.num_envs, dtype=bool)
+        if wants(fields, "info"):
+            result["info"] = {"score": final_score.astype(np.int32), "num_envs": self.num_envs}
+        return result
@@ -0,0 +1,148 @@
+"""Zobrist hashing of Snake positions and a bounded transposition table.
+
+A position hashes as the XOR of one random 64-bit key per body segment, keyed
+by its cell and its link (the direction from the next segment towards the tail
+to it, or ``NO_LINK`` for the tail), plus a key for the food cell and one for
+the direction. Links make the hash depend on the body order, not just the set
+of covered cells, yet a move only changes O(1) keys: the new head, the old
+tail and the link of the new tail.
+
+Score and ``steps_since_eat`` are not hashed; planners that care about them
+(e.g. near starvation) can key the table on ``(hash, steps_since_eat)``.
+
+``ZobristKeys.hash_state`` hashes a ``SnakeState`` from scratch in O(length)
+and ``ZobristKeys.update`` derives the next hash from a ``step_state``
+transition in O(1) (O(bitten segments) after a non-lethal bite).
+``SnakeBoard`` maintains the same hash in place when built with ``keys``.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import random
+
+from .occupancy import Cell
+from .rules import SnakeState
+
+NO_LINK = 4
+
+
+def link_between(older: Cell, newer: Cell, grid_w: int, grid_h: int) -> int:
+    """Direction (0-3) of the move from ``older`` to the adjacent ``newer`` cell.
+
+    Unwrapped adjacency wins, so the result depends only on the two cells even
+    on 2-wide wrapping boards where both directions connect them.
+    """
+    dx = newer[0] - older[0]
+    dy = newer[1] - older[1]
+    if dx == 1:
+        return 1
+    if dx == -1:
+        return 3
+    if dy == 1:
+        return 2
+    if dy == -1:
+        return 0
+    # Wrapped across an edge
+    if dx:
+        return 1 if dx < 0 else 3
+    return 2 if dy < 0 else 0
+
+
+class ZobristKeys:
+    """Random keys for one board size. Equal seeds give equal hashes."""
+
+    def __init__(self, grid_w: int, grid_h: int, seed: int = 0):
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        rng = random.Random(seed)
+        cells = grid_w * grid_h
+        self._segment = [rng.getrandbits(64) for _ in range(cells * 5)]
+        self._food = [rng.getrandbits(64) for _ in range(cells)]
+        self._direction = [rng.getrandbits(64) for _ in range(4)]
+
+    def segment(self, cell: Cell, link: int) -> int:
+        return self._segment[(cell[1] * self.grid_w + cell[0]) * 5 + link]
+
+    def food(self, cell: Optional[Cell]) -> int:
+        return 0 if cell is None else self._food[cell[1] * self.grid_w + cell[0]]
+
+    def direction(self, direction: int) -> int:
+        return self._direction[direction]
+
+    def link(self, older: Cell, newer: Cell) -> int:
+        return link_between(older, newer, self.grid_w, self.grid_h)
+
+    def hash_state(self, state: SnakeState) -> int:
+        snake = state.snake
+        h = self.food(state.food) ^ self.direction(state.direction)
+        for i in range(len(snake) - 1):
+            h ^= self.segment(snake[i], self.link(snake[i + 1], snake[i]))
+        return h ^ self.segment(snake[-1], NO_LINK)
+
+    def update(self, h: int, prev: SnakeState, nxt: SnakeState) -> int:
+        """Hash of ``nxt`` given ``h`` = hash of ``prev`` and ``nxt = step_state(prev, ...)``."""
+        h ^= self.food(prev.food) ^ self.food(nxt.food)
+        h ^= self.direction(prev.direction) ^ self.direction(nxt.direction)
+        old, new = prev.snake, nxt.snake
+        if new is old:  # terminal steps return the previous state
+            return h
+
+        h ^= self.segment(new[0], self.link(old[0], new[0]))
+        kept = len(new) - 1  # new body = head + old[:kept]
+        if kept < len(old):
+            for i in range(kept, len(old) - 1):
+                h ^= self.segment(old[i], self.link(old[i + 1], old[i]))
+            h ^= self.segment(old[-1], NO_LINK)
+            tail = new[-1]
+            h ^= self.segment(tail, self.link(old[kept], tail)) ^ self.segment(tail, NO_LINK)
+        return h
+
+
+class TranspositionTable:
+    """Bounded map from position hash to a planner's value, with LRU eviction."""
+
+    def __init__(self, max_entries: int = 1_000_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._entries.get(key, self)
+        if value is self:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries > 0:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,4 +1,10 @@
 """Tetris game module."""
+from .bitboard import BitBoard
 from .environment import TetrisEnvironment
+from .features import BoardFeatures
+from .replay import ReplaySimulator, TetrisReplay
+from .rules import TetrisSnapshot
+from .vector import TetrisVectorEnv
 
-__all__ = ["TetrisEnvironment"]
+__all__ = ["TetrisEnvironment", "TetrisVectorEnv", "TetrisSnapshot", "BitBoard", "BoardFeatures",
+           "TetrisReplay", "ReplaySimulator"]
@@ -0,0 +1,150 @@
+"""Bitmask Tetris board.
+
+Each row is an int with bit ``x`` set when column ``x`` is filled, so testing a
+piece is one AND per piece row against a mask precomputed for its shape, a
+full row is ``row == full``, and clearing lines shifts a list of ints. The
+colors of locked cells are kept alongside in ``colors``, in the
+``List[List[int]]`` layout (-1 = empty) that ``TetrisState.board`` and the
+render scene use.
+
+The board is also kept by column (``cols``, bit ``y`` set when row ``y`` is
+filled), so the first filled cell below a point is one lowest-set-bit lookup.
+``landing_row`` uses it to drop a piece in one step per column it covers: only
+the lowest cell of each column can hit something first. ``landing_row`` and
+``clear_cols`` are also module functions so ``rules`` can use them on the
+``cols`` tuple of a snapshot.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# (min_dx, max_dx, min_dy, max_dy, ((dy, row_mask), ...)) for one rotation;
+# row masks are shifted so bit 0 is column ``min_dx``.
+ShapeRows = Tuple[int, int, int, int, Tuple[Tuple[int, int], ...]]
+
+
+def compile_shape(cells: List[Tuple[int, int]]) -> ShapeRows:
+    """Bounding box and per-row bitmasks of a shape's ``(dx, dy)`` offsets."""
+    xs = [dx for dx, _dy in cells]
+    ys = [dy for _dx, dy in cells]
+    masks: Dict[int, int] = {}
+    for dx, dy in cells:
+        masks[dy] = masks.get(dy, 0) | (1 << (dx - min(xs)))
+    return min(xs), max(xs), min(ys), max(ys), tuple(sorted(masks.items()))
+
+
+@dataclass(frozen=True)
+class PieceShape:
+    """One piece rotation, compiled once for collision tests."""
+
+    cells: Tuple[Tuple[int, int], ...]  # (dx, dy) offsets from the piece origin
+    rows: ShapeRows  # bounding box and row masks, for ``BitBoard.fits``
+    columns: int  # covered columns, bit 0 = ``min_dx``
+    bottoms: Tuple[Tuple[int, int], ...]  # (dx, dy) of the lowest cell in each column
+
+
+def compile_piece(cells: List[Tuple[int, int]]) -> PieceShape:
+    rows = compile_shape(cells)
+    lowest: Dict[int, int] = {}
+    for dx, dy in cells:
+        lowest[dx] = max(lowest.get(dx, dy), dy)
+    columns = 0
+    for _dy, mask in rows[4]:
+        columns |= mask
+    return PieceShape(tuple(cells), rows, columns, tuple(sorted(lowest.items())))
+
+
+def compile_pieces(tetrominoes: Dict[str, List[List[Tuple[int, int]]]]) -> Dict[str, Tuple[PieceShape, ...]]:
+    return {piece: tuple(compile_piece(cells) for cells in rotations) for piece, rotations in tetrominoes.items()}
+
+
+def landing_row(cols: Sequence[int], grid_h: int, shape: PieceShape, x: int, y: int) -> int:
+    """Lowest row a piece that fits at ``(x, y)`` reaches by falling straight down."""
+    landing = grid_h
+    for dx, dy in shape.bottoms:
+        below = y + dy + 1
+        column = cols[x + dx] >> below
+        # First filled row under the cell, or the floor
+        blocked = below + (column & -column).bit_length() - 1 if column else grid_h
+        landing = min(landing, blocked - dy - 1)
+    return landing
+
+
+def clear_cols(cols: List[int], cleared: Sequence[int]) -> None:
+    """Remove the rows ``cleared`` (ascending) from column masks in place."""
+    # Removing top-down keeps the remaining indices valid.
+    for cy in cleared:
+        # Drop bit cy and move the bits above it one row down.
+        above = (1 << cy) - 1
+        below = ~((above << 1) | 1)
+        for x in range(len(cols)):
+            cols[x] = (cols[x] & below) | ((cols[x] & above) << 1)
+
+
+class BitBoard:
+    def __init__(
+        self,
+        grid_w: int,
+        grid_h: int,
+        rows: Optional[Sequence[int]] = None,
+        colors: Optional[Sequence[Sequence[int]]] = None,
+        cols: Optional[Sequence[int]] = None,
+    ):
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.full = (1 << grid_w) - 1
+        self.rows: List[int] = list(rows) if rows is not None else [0] * grid_h
+        self.colors: List[List[int]] = (
+            [list(row) for row in colors] if colors is not None else [[-1] * grid_w for _ in range(grid_h)]
+        )
+        self.cols: List[int] = list(cols) if cols is not None else [0] * grid_w
+        if rows is not None and cols is None:
+            for y, row in enumerate(self.rows):
+                for x in range(grid_w):
+                    if row >> x & 1:
+                        self.cols[x] |= 1 << y
+
+    def copy(self) -> "BitBoard":
+        board = BitBoard(self.grid_w, self.grid_h, colors=self.colors)
+        board.rows = list(self.rows)
+        board.cols = list(self.cols)
+        return board
+
+    def fits(self, shape: ShapeRows, x: int, y: int) -> bool:
+        """Whether ``shape`` at ``(x, y)`` is inside the board and overlaps nothing."""
+        min_dx, max_dx, min_dy, max_dy, masks = shape
+        if x + min_dx < 0 or x + max_dx >= self.grid_w or y + min_dy < 0 or y + max_dy >= self.grid_h:
+            return False
+        rows = self.rows
+        left = x + min_dx
+        for dy, mask in masks:
+            if rows[y + dy] & (mask << left):
+                return False
+        return True
+
+    def landing_row(self, shape: PieceShape, x: int, y: int) -> int:
+        """Lowest row a piece that fits at ``(x, y)`` reaches by falling straight down."""
+        return landing_row(self.cols, self.grid_h, shape, x, y)
+
+    def place(self, cells: List[Tuple[int, int]], color: int) -> List[int]:
+        """Fill ``cells`` (off-board ones are skipped), clear full rows, return their indices."""
+        rows = self.rows
+        cols = self.cols
+        for cx, cy in cells:
+            if 0 <= cy < self.grid_h and 0 <= cx < self.grid_w:
+                rows[cy] |= 1 << cx
+                cols[cx] |= 1 << cy
+                self.colors[cy][cx] = color
+
+        full = self.full
+        cleared = sorted({cy for _cx, cy in cells if 0 <= cy < self.grid_h and rows[cy] == full})
+        # Removing top-down keeps the remaining indices valid.
+        for cy in cleared:
+            del rows[cy]
+            rows.insert(0, 0)
+            del self.colors[cy]
+            self.colors.insert(0, [-1] * self.grid_w)
+        clear_cols(cols, cleared)
+        return cleared
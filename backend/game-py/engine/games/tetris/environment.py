@@ -10,6 +10,23 @@ Classic Tetris game with discrete actions:
 - 5: Hard Drop (instant drop)
 - -1: No-op (just tick)
 
+Macro actions: ``placements()`` lists the final placements the current piece
+can reach and ``place(index)`` locks it at one of them in a single call.
+
+Observation modes: ``scene`` (the render scene below) or ``features``, a
+float32 vector of column heights and board statistics kept up to date on
+each lock (see ``features.BoardFeatures``).
+
+Scene modes (the observation and the render scene are the same object):
+- ``full``: the whole board with the falling piece drawn in, every step.
+- ``delta``: only the locked rows changed since the previous scene
+  (``rowIndices`` and ``rows``), plus the piece and ghost cells for the
+  client to draw on top. The first scene after a reset, and every
+  ``keyframe_every``-th scene, lists all rows (``keyframe: true``).
+
+With ``record=True`` the env logs every reset, step and place, and
+``replay()`` returns the game as a seed plus op stream (see ``replay``).
+
 Rewards:
 - Line clear: 100 * lines^2 (1=100, 2=400, 3=900, 4=1600)
 - Soft drop: 1 per cell
@@ -18,68 +35,32 @@ Rewards:
 """
 
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 import random
 
-# Tetromino shapes (each rotation state)
-# Represented as list of (x, y) offsets from pivot
-TETROMINOES = {
-    'I': [
-        [(0, 0), (1, 0), (2, 0), (3, 0)],
-        [(1, -1), (1, 0), (1, 1), (1, 2)],
-        [(0, 1), (1, 1), (2, 1), (3, 1)],
-        [(2, -1), (2, 0), (2, 1), (2, 2)],
-    ],
-    'O': [
-        [(0, 0), (1, 0), (0, 1), (1, 1)],
-        [(0, 0), (1, 0), (0, 1), (1, 1)],
-        [(0, 0), (1, 0), (0, 1), (1, 1)],
-        [(0, 0), (1, 0), (0, 1), (1, 1)],
-    ],
-    'T': [
-        [(0, 0), (1, 0), (2, 0), (1, 1)],
-        [(1, -1), (1, 0), (1, 1), (0, 0)],
-        [(0, 1), (1, 1), (2, 1), (1, 0)],
-        [(1, -1), (1, 0), (1, 1), (2, 0)],
-    ],
-    'S': [
-        [(1, 0), (2, 0), (0, 1), (1, 1)],
-        [(0, -1), (0, 0), (1, 0), (1, 1)],
-        [(1, 0), (2, 0), (0, 1), (1, 1)],
-        [(0, -1), (0, 0), (1, 0), (1, 1)],
-    ],
-    'Z': [
-        [(0, 0), (1, 0), (1, 1), (2, 1)],
-        [(1, -1), (1, 0), (0, 0), (0, 1)],
-        [(0, 0), (1, 0), (1, 1), (2, 1)],
-        [(1, -1), (1, 0), (0, 0), (0, 1)],
-    ],
-    'J': [
-        [(0, 0), (0, 1), (1, 1), (2, 1)],
-        [(1, -1), (1, 0), (1, 1), (0, 1)],
-        [(0, 0), (1, 0), (2, 0), (2, 1)],
-        [(1, -1), (1, 0), (1, 1), (2, -1)],
-    ],
-    'L': [
-        [(2, 0), (0, 1), (1, 1), (2, 1)],
-        [(0, -1), (1, -1), (1, 0), (1, 1)],
-        [(0, 0), (1, 0), (2, 0), (0, 1)],
-        [(1, -1), (1, 0), (1, 1), (2, 1)],
-    ],
-}
-
-PIECE_COLORS = {
-    'I': 0,  # Cyan
-    'O': 1,  # Yellow
-    'T': 2,  # Purple
-    'S': 3,  # Green
-    'Z': 4,  # Red
-    'J': 5,  # Blue
-    'L': 6,  # Orange
-}
-
-PIECE_LIST = list(TETROMINOES.keys())
+import numpy as np
+
+from .bitboard import BitBoard
+from .features import OBS_MODES, BoardFeatures
+from .replay import OP_PLACE, OP_RESET, TetrisReplay, action_op, encode_op
+from .placements import Placement, find_placements
+from .rules import (
+    KICK_SEQUENCE,
+    PIECE_COLORS,
+    PIECES,
+    SHAPE_ROWS,
+    TETROMINOES,
+    TetrisSnapshot,
+    level_for,
+    line_clear_reward,
+    new_bag,
+    spawn_x,
+)
+from ...metrics import STATE_BUILD_SECONDS, timed
+from ...projection import Fields, parse_fields, wants
+
+SCENE_MODES = ("full", "delta")
 
 
 @dataclass
@@ -108,39 +89,78 @@ class TetrisEnvironment:
         grid_h: int = 20,
         seed: Optional[int] = None,
         start_level: int = 1,
+        fields: Optional[Iterable[str]] = None,
+        scene_mode: str = "full",
+        keyframe_every: int = 100,
+        obs_mode: str = "scene",
+        record: bool = False,
     ):
+        if obs_mode not in OBS_MODES:
+            raise ValueError(f"obs_mode must be one of {', '.join(OBS_MODES)}")
+        if scene_mode not in SCENE_MODES:
+            raise ValueError(f"Unknown scene mode: {scene_mode}")
+        if keyframe_every < 0:
+            raise ValueError("keyframe_every must be non-negative")
         self.grid_w = grid_w
         self.grid_h = grid_h
         self.start_level = start_level
+        self.fields = parse_fields(fields)
+        self.scene_mode = scene_mode
+        self.keyframe_every = keyframe_every
+        self.obs_mode = obs_mode
+        if record:
+            # A replay needs the seed, so pick one explicitly.
+            if seed is None:
+                seed = random.SystemRandom().getrandbits(63)
+            if not isinstance(seed, int) or not -(1 << 63) <= seed < (1 << 63):
+                raise ValueError("Recorded Tetris games need a 64-bit integer seed")
+        self.seed = seed
         self._rng = random.Random(seed)
+        self._ops: Optional[bytearray] = bytearray() if record else None
+        self._op_count = 0
         self._done = False
         self._truncated = False
         self._state: Optional[TetrisState] = None
         self._bag: List[str] = []
+        self._board = BitBoard(grid_w, grid_h)
+        # Last placements search, keyed by board rows and piece position
+        self._placements_key: Optional[Tuple[Any, ...]] = None
+        self._placements: List[Placement] = []
+        self._placement_dicts: List[Dict[str, Any]] = []
+        # Locked board as an array, refreshed from the rows changed since the
+        # last scene
+        self._display = np.full((grid_h, grid_w), -1, dtype=np.int8)
+        self._dirty: Set[int] = set(range(grid_h))
+        self._frame = 0
+        self._features = BoardFeatures(grid_w, grid_h) if obs_mode == "features" else None
 
     def _get_next_piece(self) -> str:
         """7-bag randomizer: shuffle all 7 pieces, use them, repeat."""
         if not self._bag:
-            self._bag = PIECE_LIST.copy()
-            self._rng.shuffle(self._bag)
+            self._bag = new_bag(self._rng)
         return self._bag.pop()
 
-    def reset(self) -> Dict[str, Any]:
+    def reset(self, fields: Fields = None) -> Dict[str, Any]:
+        self._record(OP_RESET)
         self._done = False
         self._truncated = False
         self._bag = []
 
-        board = [[-1 for _ in range(self.grid_w)] for _ in range(self.grid_h)]
+        self._board = BitBoard(self.grid_w, self.grid_h)
+        self._dirty = set(range(self.grid_h))
+        self._frame = 0
+        if self._features is not None:
+            self._features.reset()
         current_piece = self._get_next_piece()
         next_piece = self._get_next_piece()
 
         self._state = TetrisState(
             grid_w=self.grid_w,
             grid_h=self.grid_h,
-            board=board,
+            board=self._board.colors,
             current_piece=current_piece,
             current_rotation=0,
-            current_x=self.grid_w // 2 - 1,
+            current_x=spawn_x(self.grid_w),
             current_y=0,
             next_piece=next_piece,
             score=0,
@@ -154,13 +174,14 @@ class TetrisEnvironment:
         if not self._is_valid_position():
             self._done = True
 
-        return self._to_state_dict(reward=0.0)
+        return self._to_state_dict(reward=0.0, fields=fields)
 
-    def step(self, action: int) -> Dict[str, Any]:
+    def step(self, action: int, fields: Fields = None) -> Dict[str, Any]:
         if self._state is None:
-            return self.reset()
+            return self.reset(fields)
         if self._done or self._truncated:
-            return self.reset()
+            return self.reset(fields)
+        self._record(action_op(action))
 
         reward = 0.0
 
@@ -177,13 +198,15 @@ class TetrisEnvironment:
             if self._move(0, 1):
                 reward += 1
         elif action == 5:  # Hard Drop
-            drop_distance = 0
-            while self._move(0, 1):
-                drop_distance += 1
-            reward += drop_distance * 2
+            state = self._state
+            landing = self._board.landing_row(
+                PIECES[state.current_piece][state.current_rotation], state.current_x, state.current_y
+            )
+            reward += (landing - state.current_y) * 2
+            state.current_y = landing
             # Lock piece immediately after hard drop
             reward += self._lock_piece()
-            return self._to_state_dict(reward=reward)
+            return self._to_state_dict(reward=reward, fields=fields)
         # action == -1 or other: No-op, just tick
 
         # Gravity: try to move down
@@ -191,7 +214,7 @@ class TetrisEnvironment:
             # Can't move down, lock the piece
             reward += self._lock_piece()
 
-        return self._to_state_dict(reward=reward)
+        return self._to_state_dict(reward=reward, fields=fields)
 
     def _get_piece_cells(
         self,
@@ -211,8 +234,7 @@ class TetrisEnvironment:
         if y is None:
             y = self._state.current_y
 
-        shape = TETROMINOES[piece][rotation % 4]
-        return [(x + dx, y + dy) for dx, dy in shape]
+        return [(x + dx, y + dy) for dx, dy in PIECES[piece][rotation % 4].cells]
 
     def _is_valid_position(
         self,
@@ -222,49 +244,42 @@ class TetrisEnvironment:
         y: Optional[int] = None
     ) -> bool:
         """Check if piece position is valid (no collision)."""
-        assert self._state is not None
-        cells = self._get_piece_cells(piece, rotation, x, y)
-        for cx, cy in cells:
-            if cx < 0 or cx >= self.grid_w:
-                return False
-            if cy < 0 or cy >= self.grid_h:
-                return False
-            if self._state.board[cy][cx] != -1:
-                return False
-        return True
+        state = self._state
+        assert state is not None
+        shape = SHAPE_ROWS[state.current_piece if piece is None else piece][
+            (state.current_rotation if rotation is None else rotation) % 4
+        ]
+        return self._board.fits(
+            shape,
+            state.current_x if x is None else x,
+            state.current_y if y is None else y,
+        )
 
     def _move(self, dx: int, dy: int) -> bool:
         """Try to move piece. Returns True if successful."""
-        assert self._state is not None
-        new_x = self._state.current_x + dx
-        new_y = self._state.current_y + dy
-        if self._is_valid_position(x=new_x, y=new_y):
-            self._state.current_x = new_x
-            self._state.current_y = new_y
+        state = self._state
+        assert state is not None
+        new_x = state.current_x + dx
+        new_y = state.current_y + dy
+        if self._board.fits(SHAPE_ROWS[state.current_piece][state.current_rotation], new_x, new_y):
+            state.current_x = new_x
+            state.current_y = new_y
             return True
         return False
 
     def _rotate(self, direction: int) -> bool:
         """Try to rotate piece with wall kicks. Returns True if successful."""
-        assert self._state is not None
-        new_rotation = (self._state.current_rotation + direction) % 4
-
-        # Try basic rotation
-        if self._is_valid_position(rotation=new_rotation):
-            self._state.current_rotation = new_rotation
-            return True
-
-        # Wall kick offsets to try
-        kicks = [(-1, 0), (1, 0), (0, -1), (-1, -1), (1, -1), (-2, 0), (2, 0)]
-        for kx, ky in kicks:
-            if self._is_valid_position(
-                rotation=new_rotation,
-                x=self._state.current_x + kx,
-                y=self._state.current_y + ky
-            ):
-                self._state.current_rotation = new_rotation
-                self._state.current_x += kx
-                self._state.current_y += ky
+        state = self._state
+        assert state is not None
+        new_rotation = (state.current_rotation + direction) % 4
+        shape = SHAPE_ROWS[state.current_piece][new_rotation]
+
+        # Plain rotation first, then the wall kicks
+        for kx, ky in KICK_SEQUENCE:
+            if self._board.fits(shape, state.current_x + kx, state.current_y + ky):
+                state.current_rotation = new_rotation
+                state.current_x += kx
+                state.current_y += ky
                 return True
 
         return False
@@ -276,39 +291,30 @@ class TetrisEnvironment:
         cells = self._get_piece_cells()
         color = PIECE_COLORS[self._state.current_piece]
 
-        # Place piece on board
-        for cx, cy in cells:
-            if 0 <= cy < self.grid_h and 0 <= cx < self.grid_w:
-                self._state.board[cy][cx] = color
-
-        # Clear completed lines
-        lines_to_clear = []
-        for y in range(self.grid_h):
-            if all(cell != -1 for cell in self._state.board[y]):
-                lines_to_clear.append(y)
-
+        # Place piece on board and clear completed lines
+        lines_to_clear = self._board.place(cells, color)
+        self._dirty.update(cy for _cx, cy in cells if 0 <= cy < self.grid_h)
         if lines_to_clear:
-            # Remove cleared lines
-            for y in sorted(lines_to_clear, reverse=True):
-                del self._state.board[y]
-                self._state.board.insert(0, [-1] * self.grid_w)
+            # Everything above the lowest cleared row moved down.
+            self._dirty.update(range(lines_to_clear[-1] + 1))
+        if self._features is not None:
+            self._features.update(self._board.rows, cells, lines_to_clear)
 
+        if lines_to_clear:
             num_lines = len(lines_to_clear)
             self._state.lines_cleared += num_lines
 
-            # Scoring: 100 * lines^2 * level
-            line_reward = 100 * (num_lines ** 2) * self._state.level
+            line_reward = line_clear_reward(num_lines, self._state.level)
             reward += line_reward
             self._state.score += int(line_reward)
 
-            # Level up every 10 lines
-            self._state.level = self.start_level + self._state.lines_cleared // 10
+            self._state.level = level_for(self.start_level, self._state.lines_cleared)
 
         # Spawn new piece
         self._state.current_piece = self._state.next_piece
         self._state.next_piece = self._get_next_piece()
         self._state.current_rotation = 0
-        self._state.current_x = self.grid_w // 2 - 1
+        self._state.current_x = spawn_x(self.grid_w)
         self._state.current_y = 0
         self._state.can_hold = True
 
@@ -319,61 +325,205 @@ class TetrisEnvironment:
 
         return reward
 
+    def placements(self) -> Dict[str, Any]:
+        """Final placements reachable by the current piece, as indices for ``place``."""
+        self._find_placements()
+        return {"placements": self._placement_dicts}
+
+    def place(self, index: int, fields: Fields = None) -> Dict[str, Any]:
+        """Lock the current piece at ``placements()[index]``; reward as for the lock."""
+        if self._state is None or self._done or self._truncated:
+            return self.reset(fields)
+        placements = self._find_placements()
+        if not 0 <= index < len(placements):
+            raise ValueError(f"Placement index must be in 0..{len(placements) - 1}")
+        placement = placements[index]
+        self._record(OP_PLACE, placement.rotation, placement.x, placement.y)
+        self._state.current_rotation = placement.rotation
+        self._state.current_x = placement.x
+        self._state.current_y = placement.y
+        return self._to_state_dict(reward=self._lock_piece(), fields=fields)
+
+    def _find_placements(self) -> List[Placement]:
+        state = self._state
+        if state is None or self._done:
+            self._placements_key = None
+            self._placements, self._placement_dicts = [], []
+            return self._placements
+        key = (tuple(self._board.rows), state.current_piece, state.current_rotation, state.current_x, state.current_y)
+        if key != self._placements_key:
+            self._placements = find_placements(
+                self._board,
+                SHAPE_ROWS[state.current_piece],
+                KICK_SEQUENCE,
+                state.current_rotation,
+                state.current_x,
+                state.current_y,
+            )
+            self._placement_dicts = [placement.to_dict() for placement in self._placements]
+            self._placements_key = key
+        return self._placements
+
+    def _record(self, op: int, *position: int) -> None:
+        if self._ops is not None:
+            encode_op(self._ops, op, *position)
+            self._op_count += 1
+
+    def replay(self) -> TetrisReplay:
+        """Everything done to this env so far, for ``replay.ReplaySimulator``."""
+        if self._ops is None:
+            raise ValueError("This Tetris session is not recording; start it with record=True")
+        return TetrisReplay(self.grid_w, self.grid_h, self.start_level, self.seed, bytes(self._ops), self._op_count)
+
+    def snapshot(self) -> TetrisSnapshot:
+        """The current game as an immutable ``rules.TetrisSnapshot`` for planning."""
+        state = self._state
+        assert state is not None
+        return TetrisSnapshot(
+            grid_w=self.grid_w,
+            grid_h=self.grid_h,
+            rows=tuple(self._board.rows),
+            board=tuple(tuple(row) for row in self._board.colors),
+            cols=tuple(self._board.cols),
+            piece=state.current_piece,
+            rotation=state.current_rotation,
+            x=state.current_x,
+            y=state.current_y,
+            next_piece=state.next_piece,
+            bag=tuple(self._bag),
+            rng_state=self._rng.getstate(),
+            score=state.score,
+            lines_cleared=state.lines_cleared,
+            level=state.level,
+            start_level=self.start_level,
+            done=self._done,
+        )
+
+    def clone(self) -> "TetrisEnvironment":
+        """Independent copy of the env, RNG included, without ``deepcopy``."""
+        env = TetrisEnvironment.__new__(TetrisEnvironment)
+        env.__dict__.update(self.__dict__)
+        env._rng = random.Random()
+        env._rng.setstate(self._rng.getstate())
+        env._bag = list(self._bag)
+        if self._ops is not None:
+            env._ops = bytearray(self._ops)
+        env._board = self._board.copy()
+        env._display = self._display.copy()
+        env._dirty = set(self._dirty)
+        if self._features is not None:
+            env._features = self._features.copy()
+        if self._state is not None:
+            env._state = replace(self._state, board=env._board.colors)
+        return env
+
     def close(self) -> None:
         pass
 
-    def _to_state_dict(self, reward: float) -> Dict[str, Any]:
+    @timed(STATE_BUILD_SECONDS, lambda env: "Tetris")
+    def _to_state_dict(self, reward: float, fields: Fields = None) -> Dict[str, Any]:
         assert self._state is not None
+        fields = self.fields if fields is None else fields
+
+        result: Dict[str, Any] = {}
+        # In scene mode the observation and the render scene are the same object.
+        scene = None
+        if (wants(fields, "observation") and self._features is None) or wants(fields, "render"):
+            scene = self._build_scene()
+        if wants(fields, "observation"):
+            result["observation"] = scene if self._features is None else self._feature_observation()
+        if wants(fields, "reward"):
+            result["reward"] = reward
+        if wants(fields, "done"):
+            result["done"] = self._done
+        if wants(fields, "truncated"):
+            result["truncated"] = self._truncated
+        if wants(fields, "info"):
+            result["info"] = {
+                "score": self._state.score,
+                "lines": self._state.lines_cleared,
+                "level": self._state.level,
+            }
+        if wants(fields, "render"):
+            result["render"] = {"mode": "scene", "scene": scene}
+        return result
+
+    def _feature_observation(self) -> Dict[str, Any]:
+        state = self._state
+        assert state is not None and self._features is not None
+        return {
+            "grid": {"w": state.grid_w, "h": state.grid_h},
+            "features": self._features.vector(),
+            "piece": state.current_piece,
+            "rotation": state.current_rotation,
+            "x": state.current_x,
+            "y": state.current_y,
+            "nextPiece": state.next_piece,
+            "score": state.score,
+        }
 
-        # Build board with current piece overlaid
-        display_board = [row.copy() for row in self._state.board]
+    def _sync_display(self) -> List[int]:
+        """Copy changed rows into ``_display``; returns their sorted indices."""
+        rows = sorted(self._dirty)
+        colors = self._board.colors
+        if len(rows) == self.grid_h:
+            self._display[:] = colors
+        else:
+            for y in rows:
+                self._display[y] = colors[y]
+        self._dirty.clear()
+        return rows
+
+    def _build_scene(self) -> Dict[str, Any]:
+        assert self._state is not None
+        state = self._state
+        changed = self._sync_display()
         cells = self._get_piece_cells()
-        color = PIECE_COLORS[self._state.current_piece]
-        for cx, cy in cells:
-            if 0 <= cy < self.grid_h and 0 <= cx < self.grid_w:
-                display_board[cy][cx] = color
-
-        # Calculate ghost piece (where piece would land)
-        ghost_y = self._state.current_y
-        while self._is_valid_position(y=ghost_y + 1):
-            ghost_y += 1
+        color = PIECE_COLORS[state.current_piece]
+        shape = PIECES[state.current_piece][state.current_rotation]
+        ghost_y = state.current_y
+        # After a game over the spawned piece overlaps the stack and has no landing.
+        if self._board.fits(shape.rows, state.current_x, ghost_y):
+            ghost_y = self._board.landing_row(shape, state.current_x, ghost_y)
         ghost_cells = self._get_piece_cells(y=ghost_y)
 
-        # Next piece preview
-        next_cells = [(dx, dy) for dx, dy in TETROMINOES[self._state.next_piece][0]]
-
-        scene = {
-            "grid": {"w": self._state.grid_w, "h": self._state.grid_h},
-            "board": display_board,
+        scene: Dict[str, Any] = {"grid": {"w": state.grid_w, "h": state.grid_h}}
+        if self.scene_mode == "delta":
+            keyframe = self._frame == 0 or (self.keyframe_every and self._frame % self.keyframe_every == 0)
+            if keyframe:
+                changed = list(range(self.grid_h))
+            scene.update(delta=True, keyframe=bool(keyframe), frame=self._frame)
+            scene["rowIndices"] = changed
+            # Locked cells only; the client draws currentPiece on top.
+            scene["rows"] = self._display[changed]
+            self._frame += 1
+        else:
+            # Board with the current piece overlaid. An int8 array serializes
+            # to nested lists for JSON and to a raw buffer for msgpack.
+            display_board = self._display.copy()
+            for cx, cy in cells:
+                if 0 <= cy < self.grid_h and 0 <= cx < self.grid_w:
+                    display_board[cy, cx] = color
+            scene["board"] = display_board
+
+        scene.update({
             "currentPiece": {
-                "type": self._state.current_piece,
+                "type": state.current_piece,
                 "color": color,
                 "cells": [[cx, cy] for cx, cy in cells],
-                "x": self._state.current_x,
-                "y": self._state.current_y,
-                "rotation": self._state.current_rotation,
+                "x": state.current_x,
+                "y": state.current_y,
+                "rotation": state.current_rotation,
             },
             "ghostCells": [[cx, cy] for cx, cy in ghost_cells],
             "nextPiece": {
-                "type": self._state.next_piece,
-                "color": PIECE_COLORS[self._state.next_piece],
-                "cells": next_cells,
+                "type": state.next_piece,
+                "color": PIECE_COLORS[state.next_piece],
+                "cells": [(dx, dy) for dx, dy in TETROMINOES[state.next_piece][0]],
             },
-            "holdPiece": self._state.hold_piece,
-            "score": self._state.score,
-            "lines": self._state.lines_cleared,
-            "level": self._state.level,
-        }
-
-        return {
-            "observation": scene,
-            "reward": reward,
-            "done": self._done,
-            "truncated": self._truncated,
-            "info": {
-                "score": self._state.score,
-                "lines": self._state.lines_cleared,
-                "level": self._state.level,
-            },
-            "render": {"mode": "scene", "scene": scene},
-        }
+            "holdPiece": state.hold_piece,
+            "score": state.score,
+            "lines": state.lines_cleared,
+            "level": state.level,
+        })
+        return scene
@@ -0,0 +1,135 @@
+"""Board features for ``TetrisEnvironment``, maintained incrementally.
+
+Heuristic and learned Tetris agents mostly look at a handful of board
+statistics rather than the raw cells. ``BoardFeatures`` keeps them up to date
+from each lock instead of rescanning the board every step:
+
+- ``heights``: per column, rows from the floor to the topmost filled cell;
+- ``holes``: per column, empty cells below that topmost cell;
+- ``transitions``: per row, filled/empty changes between neighbouring cells,
+  with the side walls counted as filled (an empty row has 2).
+
+A lock only changes the columns the piece covers: without a line clear their
+height and holes follow from the placed cells alone (a cell below the old top
+fills a hole, a cell above it uncovers the empty cells in between). A line
+clear lowers every other column by the cleared count and leaves its holes
+alone, because a full row holds no holes, except for columns whose topmost
+cell was in a cleared row; those and the covered columns are rescanned (O(H)
+each). Row transitions are one popcount per changed row, shifted like the rows
+on clears.
+
+``vector()`` is the ``features`` observation: the heights, then the values
+named in ``FEATURES``, as float32. It is built on demand, once per lock.
+"""
+
+from __future__ import annotations
+
+from operator import sub
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+OBS_MODES = ("scene", "features")
+FEATURES = ("holes", "aggregate_height", "max_height", "bumpiness", "wells", "row_transitions")
+
+
+class BoardFeatures:
+    """Column and row statistics of a ``BitBoard``, updated from its locks."""
+
+    def __init__(self, grid_w: int, grid_h: int):
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self._walls = 1 | (1 << (grid_w + 1))
+        self._span = (1 << (grid_w + 1)) - 1
+        self.reset()
+
+    def reset(self) -> None:
+        self.heights: List[int] = [0] * self.grid_w
+        self.holes: List[int] = [0] * self.grid_w
+        self.transitions: List[int] = [2] * self.grid_h
+        self._vector: Optional[np.ndarray] = None
+
+    def copy(self) -> "BoardFeatures":
+        features = BoardFeatures.__new__(BoardFeatures)
+        features.__dict__.update(self.__dict__)
+        features.heights = list(self.heights)
+        features.holes = list(self.holes)
+        features.transitions = list(self.transitions)
+        return features
+
+    def update(self, rows: Sequence[int], cells: Sequence[Tuple[int, int]], cleared: Sequence[int]) -> None:
+        """Apply a lock of ``cells`` that cleared ``cleared``; ``rows`` is the board after it."""
+        h = self.grid_h
+        placed = [(cx, cy) for cx, cy in cells if 0 <= cy < h and 0 <= cx < self.grid_w]
+        columns: Dict[int, List[int]] = {}
+        for cx, cy in placed:
+            columns.setdefault(cx, []).append(cy)
+        self._vector = None
+        if not cleared:
+            for x, ys in columns.items():
+                self._fill_column(x, ys)
+            for y in {cy for _cx, cy in placed}:
+                self.transitions[y] = self._row_transitions(rows[y])
+            return
+
+        rescan = set(columns)
+        gone = set(cleared)
+        for x in range(self.grid_w):
+            if x in rescan:
+                continue
+            if h - self.heights[x] in gone:
+                rescan.add(x)
+            else:
+                self.heights[x] -= len(cleared)
+        # Same shift as BitBoard.place: cleared rows go, empty rows come in on top.
+        for y in cleared:
+            del self.transitions[y]
+            self.transitions.insert(0, 2)
+        for x in rescan:
+            self._scan_column(rows, x)
+        for cy in {cy for _cx, cy in placed}:
+            if cy not in gone:
+                y = cy + sum(1 for c in cleared if c > cy)
+                self.transitions[y] = self._row_transitions(rows[y])
+
+    def vector(self) -> np.ndarray:
+        if self._vector is None:
+            self._vector = self._build_vector()
+        return self._vector.copy()
+
+    def _fill_column(self, x: int, ys: List[int]) -> None:
+        """Account for cells placed at rows ``ys`` of column ``x`` (no line cleared)."""
+        h = self.grid_h
+        old_top = h - self.heights[x]
+        new_top = min(ys)
+        if new_top < old_top:
+            # Placed cells below the old top fill holes; those above it cover the gap.
+            filled = sum(1 for y in ys if y > old_top)
+            covering = sum(1 for y in ys if new_top < y < old_top)
+            self.holes[x] += (old_top - new_top - 1 - covering) - filled
+            self.heights[x] = h - new_top
+        else:
+            self.holes[x] -= len(ys)
+
+    def _scan_column(self, rows: Sequence[int], x: int) -> None:
+        bit = 1 << x
+        h = self.grid_h
+        top = 0
+        while top < h and not rows[top] & bit:
+            top += 1
+        self.heights[x] = h - top
+        self.holes[x] = sum(1 for y in range(top + 1, h) if not rows[y] & bit)
+
+    def _row_transitions(self, row: int) -> int:
+        bits = (row << 1) | self._walls
+        return bin((bits ^ (bits >> 1)) & self._span).count("1")
+
+    def _build_vector(self) -> np.ndarray:
+        heights = self.heights
+        h = self.grid_h
+        bumpiness = sum(map(abs, map(sub, heights, heights[1:])))
+        # Well depth: how far a column sits below both neighbours (walls are as high as the board).
+        sides = [h] + heights + [h]
+        wells = sum(d for d in map(sub, map(min, sides, sides[2:]), heights) if d > 0)
+        stats = (sum(self.holes), sum(heights), max(heights), bumpiness, wells, sum(self.transitions))
+        return np.array(heights + list(stats), dtype=np.float32)
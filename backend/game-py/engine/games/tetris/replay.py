@@ -0,0 +1,164 @@
+"""Compact Tetris replays: a seed and the op stream, re-simulated headlessly.
+
+A ``TetrisEnvironment`` game is fully determined by its seed and what was done
+to it, because the 7-bag is drawn from ``random.Random(seed)``. A session
+created with ``record=True`` logs one op per call:
+
+- ``0``-``5``: a ``step`` action, ``6``: any other action (a no-op tick);
+- ``7``: ``reset`` (including the one a ``step`` after game over does);
+- ``8``: ``place``, followed by the placement's rotation, ``x + 4`` and
+  ``y + 4`` as LEB128 varints (the resolved position rather than the index,
+  so replaying it needs no placement search).
+
+``TetrisReplay.to_bytes`` packs the board size, start level, seed and op count
+into a fixed header followed by the zlib-compressed ops, so a game costs about
+a byte per step before compression instead of a board per step.
+
+``ReplaySimulator`` plays a replay with the pure functions in ``rules`` (no
+scenes, no env) and keeps the ``TetrisSnapshot`` reached every
+``checkpoint_every`` ops. Snapshots are immutable, so a checkpoint is just a
+reference, and ``state_at(i)`` resumes from the nearest earlier checkpoint
+instead of the start.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional, Tuple
+import random
+import struct
+import zlib
+
+from . import rules
+from .rules import TetrisSnapshot
+
+OP_NOOP = 6
+OP_RESET = 7
+OP_PLACE = 8
+
+_MAGIC = b"TTRP"
+_VERSION = 1
+# magic, version, grid_w, grid_h, start_level, seed, op count
+_HEADER = struct.Struct("<4sBHHHqI")
+# Pieces never sit further left or above the board than this
+_PLACE_OFFSET = 4
+
+
+def encode_op(ops: bytearray, op: int, rotation: int = 0, x: int = 0, y: int = 0) -> None:
+    """Append one op (with the position, for ``place``) to a raw op stream."""
+    ops.append(op)
+    if op == OP_PLACE:
+        for value in (rotation, x + _PLACE_OFFSET, y + _PLACE_OFFSET):
+            while value >= 0x80:
+                ops.append(value & 0x7F | 0x80)
+                value >>= 7
+            ops.append(value)
+
+
+def action_op(action: Any) -> int:
+    """The op ``step(action)`` performs; like the env, ``2.0`` rotates and ``1.5`` is a no-op."""
+    return int(action) if action in range(6) else OP_NOOP
+
+
+@dataclass(frozen=True)
+class TetrisReplay:
+    grid_w: int
+    grid_h: int
+    start_level: int
+    seed: int
+    ops: bytes  # raw op stream, see the module docstring
+    count: int  # number of ops
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(_MAGIC, _VERSION, self.grid_w, self.grid_h, self.start_level, self.seed, self.count)
+        return header + zlib.compress(self.ops, 9)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TetrisReplay":
+        if len(data) < _HEADER.size:
+            raise ValueError("Not a Tetris replay")
+        magic, version, grid_w, grid_h, start_level, seed, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a Tetris replay")
+        if version != _VERSION:
+            raise ValueError(f"Unsupported replay version: {version}")
+        return cls(grid_w, grid_h, start_level, seed, zlib.decompress(data[_HEADER.size:]), count)
+
+    def __iter__(self) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+        """``(op, (rotation, x, y))`` for ``place``, ``(op, ())`` otherwise."""
+        ops = self.ops
+        i = 0
+        while i < len(ops):
+            op = ops[i]
+            i += 1
+            if op != OP_PLACE:
+                yield op, ()
+                continue
+            values = []
+            for _ in range(3):
+                value = shift = 0
+                while True:
+                    byte = ops[i]
+                    i += 1
+                    value |= (byte & 0x7F) << shift
+                    shift += 7
+                    if byte < 0x80:
+                        break
+                values.append(value)
+            rotation, x, y = values
+            yield op, (rotation, x - _PLACE_OFFSET, y - _PLACE_OFFSET)
+
+
+class ReplaySimulator:
+    """Random access to the states of a replay, via periodic checkpoints."""
+
+    def __init__(self, replay: TetrisReplay, checkpoint_every: int = 100):
+        if checkpoint_every <= 0:
+            raise ValueError("checkpoint_every must be positive")
+        self.replay = replay
+        self.checkpoint_every = checkpoint_every
+        self._ops = list(replay)
+        self._initial_rng = random.Random(replay.seed).getstate()
+        # _checkpoints[k] is the state after k * checkpoint_every ops (None before the first reset).
+        self._checkpoints: List[Optional[TetrisSnapshot]] = [None]
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def state_at(self, index: int) -> Optional[TetrisSnapshot]:
+        """The game after the first ``index`` ops (``len(self)`` for the end)."""
+        if not 0 <= index <= len(self._ops):
+            raise IndexError(f"Replay index must be in 0..{len(self._ops)}")
+        every = self.checkpoint_every
+        k = min(index // every, len(self._checkpoints) - 1)
+        state = self._checkpoints[k]
+        for i in range(k * every, index):
+            state = self._apply(state, *self._ops[i])
+            if (i + 1) % every == 0 and (i + 1) // every == len(self._checkpoints):
+                self._checkpoints.append(state)
+        return state
+
+    def states(self) -> Iterator[TetrisSnapshot]:
+        """The state after each op, in order."""
+        state = None
+        every = self.checkpoint_every
+        for i, (op, args) in enumerate(self._ops):
+            state = self._apply(state, op, args)
+            if (i + 1) % every == 0 and (i + 1) // every == len(self._checkpoints):
+                self._checkpoints.append(state)
+            yield state
+
+    def _apply(self, state: Optional[TetrisSnapshot], op: int, args: Tuple[int, ...]) -> TetrisSnapshot:
+        # Like TetrisEnvironment, stepping or placing in a finished game resets it.
+        if op == OP_RESET or state is None or state.done:
+            replay = self.replay
+            return rules.reset_state(
+                replay.grid_w,
+                replay.grid_h,
+                start_level=replay.start_level,
+                rng_state=self._initial_rng if state is None else state.rng_state,
+            )
+        if op == OP_PLACE:
+            rotation, x, y = args
+            return rules.lock(rules.evolve(state, rotation=rotation, x=x, y=y))[0]
+        return rules.step_state(state, op if op != OP_NOOP else -1)[0]
@@ -0,0 +1,321 @@
+"""Pure Tetris rules: piece tables and transitions on an immutable state.
+
+``TetrisSnapshot`` is a whole game in a frozen, compact form: the board as one
+bitmask per row and one per column plus its colors as tuples, the falling and
+next piece, the rest of the 7-bag and the state of the ``random.Random`` that
+refills it. The functions below never mutate their input and need no RNG argument, so a
+planner can branch from one snapshot as often as it likes::
+
+    for placement in legal_placements(state):
+        child, reward, done = place(state, placement)
+
+``step_state`` follows ``TetrisEnvironment.step`` exactly (actions, gravity,
+wall kicks, rewards and the piece sequence); ``TetrisEnvironment.snapshot()``
+exports the env's game and ``TetrisEnvironment.clone()`` copies the env itself.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import random
+
+from .bitboard import BitBoard, clear_cols, compile_pieces, landing_row
+from .placements import Placement, find_placements
+
+# Tetromino shapes (each rotation state)
+# Represented as list of (x, y) offsets from pivot
+TETROMINOES = {
+    'I': [
+        [(0, 0), (1, 0), (2, 0), (3, 0)],
+        [(1, -1), (1, 0), (1, 1), (1, 2)],
+        [(0, 1), (1, 1), (2, 1), (3, 1)],
+        [(2, -1), (2, 0), (2, 1), (2, 2)],
+    ],
+    'O': [
+        [(0, 0), (1, 0), (0, 1), (1, 1)],
+        [(0, 0), (1, 0), (0, 1), (1, 1)],
+        [(0, 0), (1, 0), (0, 1), (1, 1)],
+        [(0, 0), (1, 0), (0, 1), (1, 1)],
+    ],
+    'T': [
+        [(0, 0), (1, 0), (2, 0), (1, 1)],
+        [(1, -1), (1, 0), (1, 1), (0, 0)],
+        [(0, 1), (1, 1), (2, 1), (1, 0)],
+        [(1, -1), (1, 0), (1, 1), (2, 0)],
+    ],
+    'S': [
+        [(1, 0), (2, 0), (0, 1), (1, 1)],
+        [(0, -1), (0, 0), (1, 0), (1, 1)],
+        [(1, 0), (2, 0), (0, 1), (1, 1)],
+        [(0, -1), (0, 0), (1, 0), (1, 1)],
+    ],
+    'Z': [
+        [(0, 0), (1, 0), (1, 1), (2, 1)],
+        [(1, -1), (1, 0), (0, 0), (0, 1)],
+        [(0, 0), (1, 0), (1, 1), (2, 1)],
+        [(1, -1), (1, 0), (0, 0), (0, 1)],
+    ],
+    'J': [
+        [(0, 0), (0, 1), (1, 1), (2, 1)],
+        [(1, -1), (1, 0), (1, 1), (0, 1)],
+        [(0, 0), (1, 0), (2, 0), (2, 1)],
+        [(1, -1), (1, 0), (1, 1), (2, -1)],
+    ],
+    'L': [
+        [(2, 0), (0, 1), (1, 1), (2, 1)],
+        [(0, -1), (1, -1), (1, 0), (1, 1)],
+        [(0, 0), (1, 0), (2, 0), (0, 1)],
+        [(1, -1), (1, 0), (1, 1), (2, 1)],
+    ],
+}
+
+PIECE_COLORS = {
+    'I': 0,  # Cyan
+    'O': 1,  # Yellow
+    'T': 2,  # Purple
+    'S': 3,  # Green
+    'Z': 4,  # Red
+    'J': 5,  # Blue
+    'L': 6,  # Orange
+}
+
+PIECE_LIST = list(TETROMINOES.keys())
+
+# Every piece rotation compiled for BitBoard collision tests: offsets, bounding
+# box, row and column masks, and the lowest cell of each column
+PIECES = compile_pieces(TETROMINOES)
+SHAPE_ROWS = {piece: tuple(shape.rows for shape in shapes) for piece, shapes in PIECES.items()}
+
+# Offsets tried, in order, when a plain rotation collides
+WALL_KICKS = [(-1, 0), (1, 0), (0, -1), (-1, -1), (1, -1), (-2, 0), (2, 0)]
+# The plain rotation followed by the kicks; the same for every piece and turn
+KICK_SEQUENCE = ((0, 0), *WALL_KICKS)
+
+
+def new_bag(rng: random.Random) -> List[str]:
+    """One shuffled 7-bag; pieces are drawn from its end."""
+    bag = PIECE_LIST.copy()
+    rng.shuffle(bag)
+    return bag
+
+
+def spawn_x(grid_w: int) -> int:
+    return grid_w // 2 - 1
+
+
+def line_clear_reward(lines: int, level: int) -> int:
+    """Scoring: 100 * lines^2 * level."""
+    return 100 * (lines ** 2) * level
+
+
+def level_for(start_level: int, lines_cleared: int) -> int:
+    """Level up every 10 lines."""
+    return start_level + lines_cleared // 10
+
+
+@dataclass(frozen=True)
+class TetrisSnapshot:
+    grid_w: int
+    grid_h: int
+    rows: Tuple[int, ...]  # bit x set = column x filled
+    board: Tuple[Tuple[int, ...], ...]  # -1 = empty, 0-6 = piece color
+    cols: Tuple[int, ...]  # bit y set = row y filled, for landing_row
+    piece: str
+    rotation: int
+    x: int
+    y: int
+    next_piece: str
+    bag: Tuple[str, ...]  # drawn from the end, as TetrisEnvironment does
+    rng_state: Any  # random.Random.getstate() of the bag randomizer
+    score: int
+    lines_cleared: int
+    level: int
+    start_level: int = 1
+    done: bool = False
+
+
+def evolve(state: TetrisSnapshot, **changes: Any) -> TetrisSnapshot:
+    """``dataclasses.replace`` without re-running ``__init__``, which dominates a move."""
+    new = object.__new__(TetrisSnapshot)
+    new.__dict__.update(state.__dict__)
+    new.__dict__.update(changes)
+    return new
+
+
+def _draw(bag: Tuple[str, ...], rng_state: Any) -> Tuple[str, Tuple[str, ...], Any]:
+    if not bag:
+        rng = random.Random()
+        rng.setstate(rng_state)
+        bag = tuple(new_bag(rng))
+        rng_state = rng.getstate()
+    return bag[-1], bag[:-1], rng_state
+
+
+def fits(state: TetrisSnapshot, rotation: int, x: int, y: int, piece: Optional[str] = None) -> bool:
+    """Whether a piece (the falling one by default) fits at ``(rotation, x, y)``."""
+    min_dx, max_dx, min_dy, max_dy, masks = SHAPE_ROWS[piece or state.piece][rotation % 4]
+    if x + min_dx < 0 or x + max_dx >= state.grid_w or y + min_dy < 0 or y + max_dy >= state.grid_h:
+        return False
+    rows = state.rows
+    left = x + min_dx
+    for dy, mask in masks:
+        if rows[y + dy] & (mask << left):
+            return False
+    return True
+
+
+def reset_state(
+    grid_w: int = 10,
+    grid_h: int = 20,
+    seed: Optional[int] = None,
+    start_level: int = 1,
+    rng_state: Any = None,
+) -> TetrisSnapshot:
+    """A new game; ``rng_state`` (if given) continues an existing randomizer instead of ``seed``."""
+    rng = random.Random(seed)
+    if rng_state is not None:
+        rng.setstate(rng_state)
+    piece, bag, rng_state = _draw((), rng.getstate())
+    next_piece, bag, rng_state = _draw(bag, rng_state)
+    state = TetrisSnapshot(
+        grid_w=grid_w,
+        grid_h=grid_h,
+        rows=(0,) * grid_h,
+        board=((-1,) * grid_w,) * grid_h,
+        cols=(0,) * grid_w,
+        piece=piece,
+        rotation=0,
+        x=spawn_x(grid_w),
+        y=0,
+        next_piece=next_piece,
+        bag=bag,
+        rng_state=rng_state,
+        score=0,
+        lines_cleared=0,
+        level=start_level,
+        start_level=start_level,
+    )
+    if not fits(state, 0, state.x, 0):
+        state = evolve(state, done=True)
+    return state
+
+
+def piece_cells(state: TetrisSnapshot) -> List[Tuple[int, int]]:
+    return [(state.x + dx, state.y + dy) for dx, dy in PIECES[state.piece][state.rotation % 4].cells]
+
+
+def lock(state: TetrisSnapshot) -> Tuple[TetrisSnapshot, float]:
+    """Lock the falling piece where it is, clear lines and spawn the next piece."""
+    rows = list(state.rows)
+    board = list(state.board)
+    cols = list(state.cols)
+    color = PIECE_COLORS[state.piece]
+    for cx, cy in piece_cells(state):
+        if 0 <= cy < state.grid_h and 0 <= cx < state.grid_w:
+            rows[cy] |= 1 << cx
+            cols[cx] |= 1 << cy
+            board_row = list(board[cy])
+            board_row[cx] = color
+            board[cy] = tuple(board_row)
+
+    full = (1 << state.grid_w) - 1
+    kept = [i for i, row in enumerate(rows) if row != full]
+    cleared = state.grid_h - len(kept)
+    reward = 0.0
+    score, lines_cleared, level = state.score, state.lines_cleared, state.level
+    if cleared:
+        clear_cols(cols, [i for i, row in enumerate(rows) if row == full])
+        rows = [0] * cleared + [rows[i] for i in kept]
+        board = [(-1,) * state.grid_w] * cleared + [board[i] for i in kept]
+        lines_cleared += cleared
+        line_reward = line_clear_reward(cleared, level)
+        reward += line_reward
+        score += line_reward
+        level = level_for(state.start_level, lines_cleared)
+
+    next_piece, bag, rng_state = _draw(state.bag, state.rng_state)
+    new_state = evolve(
+        state,
+        rows=tuple(rows),
+        board=tuple(board),
+        cols=tuple(cols),
+        piece=state.next_piece,
+        rotation=0,
+        x=spawn_x(state.grid_w),
+        y=0,
+        next_piece=next_piece,
+        bag=bag,
+        rng_state=rng_state,
+        score=score,
+        lines_cleared=lines_cleared,
+        level=level,
+    )
+    if not fits(new_state, 0, new_state.x, 0):
+        new_state = evolve(new_state, done=True)
+        reward -= 100  # Game over penalty
+    return new_state, reward
+
+
+def _moved(state: TetrisSnapshot, dx: int, dy: int) -> Optional[TetrisSnapshot]:
+    if fits(state, state.rotation, state.x + dx, state.y + dy):
+        return evolve(state, x=state.x + dx, y=state.y + dy)
+    return None
+
+
+def _rotated(state: TetrisSnapshot, direction: int) -> Optional[TetrisSnapshot]:
+    rotation = (state.rotation + direction) % 4
+    for kx, ky in KICK_SEQUENCE:
+        if fits(state, rotation, state.x + kx, state.y + ky):
+            return evolve(state, rotation=rotation, x=state.x + kx, y=state.y + ky)
+    return None
+
+
+def step_state(state: TetrisSnapshot, action: int) -> Tuple[TetrisSnapshot, float, bool, Dict[str, object]]:
+    """Pure counterpart of ``TetrisEnvironment.step``; finished games are returned unchanged."""
+    if state.done:
+        return state, 0.0, True, {}
+
+    reward = 0.0
+    moved: Optional[TetrisSnapshot] = None
+    if action == 0:  # Move Left
+        moved = _moved(state, -1, 0)
+    elif action == 1:  # Move Right
+        moved = _moved(state, 1, 0)
+    elif action == 2:  # Rotate CW
+        moved = _rotated(state, 1)
+    elif action == 3:  # Rotate CCW
+        moved = _rotated(state, -1)
+    elif action == 4:  # Soft Drop
+        moved = _moved(state, 0, 1)
+        if moved is not None:
+            reward += 1
+    elif action == 5:  # Hard Drop
+        y = landing_row(state.cols, state.grid_h, PIECES[state.piece][state.rotation % 4], state.x, state.y)
+        reward += (y - state.y) * 2
+        state, lock_reward = lock(evolve(state, y=y))
+        return state, reward + lock_reward, state.done, {"locked": True}
+    if moved is not None:
+        state = moved
+
+    # Gravity: try to move down, else lock
+    fallen = _moved(state, 0, 1)
+    if fallen is not None:
+        return fallen, reward, False, {"locked": False}
+    state, lock_reward = lock(state)
+    return state, reward + lock_reward, state.done, {"locked": True}
+
+
+def legal_placements(state: TetrisSnapshot) -> List[Placement]:
+    """Final placements reachable by the falling piece (see ``placements.find_placements``)."""
+    if state.done:
+        return []
+    # The snapshot already has both masks, so this is two list copies, not a scan.
+    board = BitBoard(state.grid_w, state.grid_h, state.rows, colors=(), cols=state.cols)
+    return find_placements(board, SHAPE_ROWS[state.piece], KICK_SEQUENCE, state.rotation, state.x, state.y)
+
+
+def place(state: TetrisSnapshot, placement: Placement) -> Tuple[TetrisSnapshot, float, bool]:
+    """Lock the falling piece at ``placement``, as ``TetrisEnvironment.place`` does."""
+    state, reward = lock(evolve(state, rotation=placement.rotation, x=placement.x, y=placement.y))
+    return state, reward, state.done
@@ -0,0 +1,294 @@
+"""Vectorized Tetris: N boards stepped together in NumPy.
+
+``TetrisVectorEnv`` follows ``TetrisEnvironment`` (actions, gravity, wall
+kicks, 7-bag, rewards, levels and game over) but keeps every board in shared
+arrays, so one ``step`` call advances all of them:
+
+- ``board`` (N, H, W) int8: locked cells, -1 = empty, else the piece color
+  (a view into a wall-padded array);
+- ``piece``, ``rotation``, ``x``, ``y``, ``next_piece``: the falling piece of
+  each board (pieces as indices into ``PIECE_LIST``);
+- ``bag`` (N, 7) and ``bag_len``: the rest of each board's 7-bag, drawn from
+  the end like ``TetrisEnvironment``;
+- ``score``, ``lines``, ``level``: one entry per board.
+
+A piece is tested against the board by gathering its four cells for every
+board (and every kick) at once from a wall-padded copy, and a hard drop is one
+column scan. Finished boards are reset within the same
+``step``: their ``done`` flag is set and the returned observation is already
+the first one of the next episode (``info.score`` and ``info.lines`` still
+hold the final values). Bags are shuffled with the env's own NumPy generator,
+so seeded runs do not reproduce ``TetrisEnvironment``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from .rules import KICK_SEQUENCE, PIECE_COLORS, PIECE_LIST, TETROMINOES, spawn_x
+from ...metrics import STATE_BUILD_SECONDS, timed
+from ...projection import Fields, parse_fields, wants
+
+# (piece, rotation, cell) offsets, pieces in PIECE_LIST order
+_DX = np.array([[[dx for dx, _dy in TETROMINOES[p][r]] for r in range(4)] for p in PIECE_LIST], dtype=np.int64)
+_DY = np.array([[[dy for _dx, dy in TETROMINOES[p][r]] for r in range(4)] for p in PIECE_LIST], dtype=np.int64)
+_COLORS = np.array([PIECE_COLORS[p] for p in PIECE_LIST], dtype=np.int8)
+# Plain rotation first, then the kicks, as in TetrisEnvironment._rotate
+_KX = np.array([kx for kx, _ky in KICK_SEQUENCE], dtype=np.int64)
+_KY = np.array([ky for _kx, ky in KICK_SEQUENCE], dtype=np.int64)
+
+# Boards are stored with this many wall cells around them, enough for any
+# move, kick or gravity test from a valid position, so tests need no bounds.
+_PAD = 4
+_WALL = 7
+
+
+class TetrisVectorEnv:
+    """``num_envs`` Tetris boards with batched ``step``/``reset``.
+
+    - Actions: one per board (or a single int for all), with the
+      ``TetrisEnvironment`` meanings (0-5, anything else is a no-op tick).
+    - Observation: ``board`` (N, H, W) int8 with the falling piece drawn in,
+      plus ``piece``, ``next_piece`` (``PIECE_LIST`` indices) and ``score``.
+    """
+
+    def __init__(
+        self,
+        num_envs: int = 16,
+        grid_w: int = 10,
+        grid_h: int = 20,
+        seed: Optional[int] = None,
+        start_level: int = 1,
+        fields: Optional[Iterable[str]] = None,
+    ):
+        if num_envs <= 0:
+            raise ValueError("num_envs must be positive")
+        if grid_w < 5 or grid_h < 2:
+            raise ValueError("Tetris vector boards must be at least 5x2")
+        self.num_envs = num_envs
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.start_level = start_level
+        self.fields = parse_fields(fields)
+        self._rng = np.random.default_rng(seed)
+
+        self._cells = np.full((num_envs, grid_h + 2 * _PAD, grid_w + 2 * _PAD), _WALL, dtype=np.int8)
+        self.piece = np.zeros(num_envs, dtype=np.int64)
+        self.rotation = np.zeros(num_envs, dtype=np.int64)
+        self.x = np.zeros(num_envs, dtype=np.int64)
+        self.y = np.zeros(num_envs, dtype=np.int64)
+        self.next_piece = np.zeros(num_envs, dtype=np.int64)
+        self.bag = np.zeros((num_envs, len(PIECE_LIST)), dtype=np.int64)
+        self.bag_len = np.zeros(num_envs, dtype=np.int64)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.lines = np.zeros(num_envs, dtype=np.int64)
+        self.level = np.full(num_envs, start_level, dtype=np.int64)
+        self._rows = np.arange(num_envs)
+
+    @property
+    def board(self) -> np.ndarray:
+        """Locked cells (N, H, W), a view without the wall padding."""
+        return self._cells[:, _PAD:_PAD + self.grid_h, _PAD:_PAD + self.grid_w]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes
+            for array in (self._cells, self.piece, self.rotation, self.x, self.y, self.next_piece,
+                          self.bag, self.bag_len, self.score, self.lines, self.level)
+        )
+
+    def reset(self, fields: Fields = None) -> Dict[str, Any]:
+        self._reset_boards(self._rows)
+        zeros = np.zeros(self.num_envs, dtype=bool)
+        return self._to_state_dict(np.zeros(self.num_envs), zeros, self.score.copy(), fields, self.lines.copy())
+
+    def step(self, actions: Union[int, Iterable[int], np.ndarray], fields: Fields = None) -> Dict[str, Any]:
+        n = self.num_envs
+        rows = self._rows
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.ndim and actions.shape != (n,):
+            raise ValueError(f"Expected {n} actions, got {actions.size}")
+        actions = np.broadcast_to(actions, (n,))
+        reward = np.zeros(n)
+
+        shifting = rows[(actions == 0) | (actions == 1)]
+        self._try_move(shifting, np.where(actions[shifting] == 0, -1, 1), 0)
+        turning = rows[(actions == 2) | (actions == 3)]
+        self._try_rotate(turning, np.where(actions[turning] == 2, 1, -1))
+        soft = rows[actions == 4]
+        reward[soft[self._try_move(soft, 0, 1)]] += 1
+
+        # Hard drop: fall as far as possible, then lock without a gravity tick.
+        hard = rows[actions == 5]
+        distance = self._drop_distance(hard)
+        self.y[hard] += distance
+        reward[hard] += 2 * distance
+
+        # Gravity for everything else: fall one row or lock.
+        ticking = rows[actions != 5]
+        landed = ticking[~self._try_move(ticking, 0, 1)]
+        locking = np.concatenate([hard, landed])
+        lost = np.zeros(n, dtype=bool)
+        if locking.size:
+            lock_reward, lock_lost = self._lock(locking)
+            reward[locking] += lock_reward
+            lost[locking] = lock_lost
+
+        final_score = self.score.copy()
+        final_lines = self.lines.copy()
+        self._reset_boards(rows[lost])
+        return self._to_state_dict(reward, lost, final_score, fields, final_lines)
+
+    def close(self) -> None:
+        return
+
+    def _piece_cells(self, boards: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Padded ``(y, x)`` indices (k, 4) of each board's falling piece."""
+        piece = self.piece[boards]
+        rotation = self.rotation[boards]
+        cy = self.y[boards][:, None] + _DY[piece, rotation] + _PAD
+        cx = self.x[boards][:, None] + _DX[piece, rotation] + _PAD
+        return cy, cx
+
+    def _fits(self, boards: np.ndarray, piece: np.ndarray, rotation: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Whether each (broadcast) piece placement overlaps neither blocks nor walls."""
+        cells = self._cells[
+            boards[..., None],
+            y[..., None] + _DY[piece, rotation] + _PAD,
+            x[..., None] + _DX[piece, rotation] + _PAD,
+        ]
+        return (cells < 0).all(axis=-1)
+
+    def _try_move(self, boards: np.ndarray, dx: Union[int, np.ndarray], dy: int) -> np.ndarray:
+        """Move the piece of each board where it fits; returns which moved."""
+        if boards.size == 0:
+            return np.zeros(0, dtype=bool)
+        x = self.x[boards] + dx
+        y = self.y[boards] + dy
+        ok = self._fits(boards, self.piece[boards], self.rotation[boards], x, y)
+        self.x[boards[ok]] = x[ok]
+        self.y[boards[ok]] = y[ok]
+        return ok
+
+    def _try_rotate(self, boards: np.ndarray, direction: np.ndarray) -> None:
+        """Rotate taking the first fitting kick, tested for all kicks at once."""
+        if boards.size == 0:
+            return
+        rotation = (self.rotation[boards] + direction) % 4
+        x = self.x[boards][:, None] + _KX
+        y = self.y[boards][:, None] + _KY
+        ok = self._fits(boards[:, None], self.piece[boards][:, None], rotation[:, None], x, y)
+        turned = ok.any(axis=1)
+        kick = ok.argmax(axis=1)[turned]
+        which = boards[turned]
+        self.rotation[which] = rotation[turned]
+        self.x[which] = x[turned, kick]
+        self.y[which] = y[turned, kick]
+
+    def _drop_distance(self, boards: np.ndarray) -> np.ndarray:
+        """Rows each piece can fall: the nearest block or floor below any of its cells."""
+        if boards.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        cy, cx = self._piece_cells(boards)
+        depth = np.arange(self.grid_h + 2 * _PAD)
+        column = self._cells[boards[:, None, None], depth, cx[:, :, None]]  # (k, 4, padded H)
+        blocked = (column >= 0) & (depth > cy[:, :, None])
+        return (blocked.argmax(axis=2) - cy - 1).min(axis=1)
+
+    def _lock(self, boards: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Lock pieces, clear lines, score and spawn; returns (reward, game over) per board."""
+        h, w = self.grid_h, self.grid_w
+        cy, cx = self._piece_cells(boards)
+        self._cells[boards[:, None], cy, cx] = _COLORS[self.piece[boards]][:, None]
+
+        # Clear full rows: stable-sort them to the top, then empty them.
+        inner = (slice(_PAD, _PAD + h), slice(_PAD, _PAD + w))
+        full = (self._cells[(boards,) + inner] >= 0).all(axis=2)
+        cleared = full.sum(axis=1)
+        reward = np.zeros(boards.size)
+        clearing = cleared > 0
+        if clearing.any():
+            which = boards[clearing]
+            order = np.argsort(~full[clearing], axis=1, kind="stable")
+            kept = np.take_along_axis(self._cells[(which,) + inner], order[:, :, None], axis=1)
+            emptied = np.arange(h)[None, :, None] < cleared[clearing][:, None, None]
+            self._cells[(which,) + inner] = np.where(emptied, np.int8(-1), kept)
+            line_reward = 100 * cleared[clearing] ** 2 * self.level[which]
+            reward[clearing] = line_reward
+            self.score[which] += line_reward
+            self.lines[which] += cleared[clearing]
+            self.level[which] = self.start_level + self.lines[which] // 10
+
+        self._spawn(boards)
+        lost = ~self._fits(boards, self.piece[boards], self.rotation[boards], self.x[boards], self.y[boards])
+        reward[lost] -= 100  # Game over penalty
+        return reward, lost
+
+    def _draw(self, boards: np.ndarray) -> np.ndarray:
+        """Pop the next piece from each board's bag, refilling empty bags."""
+        empty = boards[self.bag_len[boards] == 0]
+        if empty.size:
+            self.bag[empty] = self._rng.permuted(np.tile(np.arange(len(PIECE_LIST)), (empty.size, 1)), axis=1)
+            self.bag_len[empty] = len(PIECE_LIST)
+        self.bag_len[boards] -= 1
+        return self.bag[boards, self.bag_len[boards]]
+
+    def _spawn(self, boards: np.ndarray) -> None:
+        self.piece[boards] = self.next_piece[boards]
+        self.next_piece[boards] = self._draw(boards)
+        self.rotation[boards] = 0
+        self.x[boards] = spawn_x(self.grid_w)
+        self.y[boards] = 0
+
+    def _reset_boards(self, boards: np.ndarray) -> None:
+        if boards.size == 0:
+            return
+        self._cells[boards, _PAD:_PAD + self.grid_h, _PAD:_PAD + self.grid_w] = -1
+        self.bag_len[boards] = 0
+        self.score[boards] = 0
+        self.lines[boards] = 0
+        self.level[boards] = self.start_level
+        self.next_piece[boards] = self._draw(boards)
+        self._spawn(boards)
+
+    def _observation(self) -> Dict[str, Any]:
+        cells = self._cells.copy()
+        cy, cx = self._piece_cells(self._rows)
+        cells[self._rows[:, None], cy, cx] = _COLORS[self.piece][:, None]
+        return {
+            "board": cells[:, _PAD:_PAD + self.grid_h, _PAD:_PAD + self.grid_w],
+            "piece": self.piece.astype(np.int8),
+            "next_piece": self.next_piece.astype(np.int8),
+            "score": self.score.astype(np.int32),
+        }
+
+    @timed(STATE_BUILD_SECONDS, lambda env: "TetrisVector")
+    def _to_state_dict(
+        self,
+        reward: np.ndarray,
+        done: np.ndarray,
+        final_score: np.ndarray,
+        fields: Fields = None,
+        final_lines: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
+        fields = self.fields if fields is None else fields
+
+        result: Dict[str, Any] = {}
+        if wants(fields, "observation"):
+            result["observation"] = self._observation()
+        if wants(fields, "reward"):
+            result["reward"] = reward
+        if wants(fields, "done"):
+            result["done"] = done
+        if wants(fields, "truncated"):
+            result["truncated"] = np.zeros(self.num_envs, dtype=bool)
+        if wants(fields, "info"):
+            result["info"] = {
+                "score": final_score.astype(np.int32),
+                "lines": (self.lines if final_lines is None else final_lines).astype(np.int32),
+                "num_envs": self.num_envs,
+            }
+        return result
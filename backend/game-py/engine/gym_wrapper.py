@@ -1,71 +1,95 @@
 import gymnasium as gym
-import numpy as np
-import base64
-from io import BytesIO
-from PIL import Image
-from typing import Tuple, Dict, Any, Optional
+import time
+from typing import Dict, Any, Iterable, Optional
+
+from .frame_encoding import FrameOptions, encode_frame
+from .metrics import FRAME_ENCODE_SECONDS
+from .projection import Fields, parse_fields, wants
 
 class GymEnvironment:
-    def __init__(self, env_id: str, render_mode: str = 'rgb_array'):
+    def __init__(
+        self,
+        env_id: str,
+        render_mode: str = 'rgb_array',
+        frame_options: Optional[FrameOptions] = None,
+        fields: Optional[Iterable[str]] = None,
+    ):
         self.env_id = env_id
-        self.env = gym.make(env_id, render_mode=render_mode)
+        self.frame_options = frame_options or FrameOptions()
+        self.fields = parse_fields(fields)
+        self.env = gym.make(env_id, render_mode=render_mode if self.frame_options.enabled else None)
         self.current_state = None
         self.done = False
         self.truncated = False
+        self._steps_since_reset = 0
         
-    def reset(self) -> Dict[str, Any]:
+    def reset(self, fields: Fields = None) -> Dict[str, Any]:
         observation, info = self.env.reset()
         self.current_state = observation
         self.done = False
         self.truncated = False
-        frame = self._get_frame_base64()
-        return {
-            "observation": observation.tolist(),
-            "info": info,
-            "frame": frame,
-            "render": {"mode": "frame", "frame": frame},
-        }
+        self._steps_since_reset = 0
+        fields = self.fields if fields is None else fields
+        result: Dict[str, Any] = {}
+        if wants(fields, "observation"):
+            result["observation"] = observation
+        if wants(fields, "info"):
+            result["info"] = info
+        result.update(self._render_fields(fields))
+        return result
 
-    def step(self, action: int) -> Dict[str, Any]:
+    def step(self, action: int, fields: Fields = None) -> Dict[str, Any]:
         if self.done or self.truncated:
-            return self.reset()
+            return self.reset(fields)
             
         observation, reward, terminated, truncated, info = self.env.step(action)
         self.current_state = observation
         self.done = terminated
         self.truncated = truncated
+        self._steps_since_reset += 1
 
-        frame = self._get_frame_base64()
-        
-        return {
-            "observation": observation.tolist(),
-            "reward": float(reward),
-            "done": terminated,
-            "truncated": truncated,
-            "info": info,
-            "frame": frame,
-            "render": {"mode": "frame", "frame": frame},
-        }
+        fields = self.fields if fields is None else fields
+        result: Dict[str, Any] = {}
+        if wants(fields, "observation"):
+            result["observation"] = observation
+        if wants(fields, "reward"):
+            result["reward"] = float(reward)
+        if wants(fields, "done"):
+            result["done"] = terminated
+        if wants(fields, "truncated"):
+            result["truncated"] = truncated
+        if wants(fields, "info"):
+            result["info"] = info
+        result.update(self._render_fields(fields))
+        return result
+
+    def _render_fields(self, fields: Fields) -> Dict[str, Any]:
+        # Skipping the render field also skips the render and encode entirely.
+        want_frame = self.frame_options.legacy_frame and wants(fields, "frame")
+        if not (wants(fields, "render") or want_frame):
+            return {}
+        render: Dict[str, Any] = {"mode": "frame", "frame": None}
+        if self.frame_options.enabled and self._steps_since_reset % self.frame_options.every == 0:
+            render.update(self._encode_frame())
+        result: Dict[str, Any] = {}
+        if wants(fields, "render"):
+            result["render"] = render
+        if want_frame:
+            result["frame"] = render["frame"]
+        return result
 
-    def _get_frame_base64(self) -> Optional[str]:
+    def _encode_frame(self) -> Dict[str, Any]:
+        start = time.perf_counter()
         try:
             frame = self.env.render()
             if frame is None:
-                return None
-            
-            # Convert numpy array to image
-            img = Image.fromarray(frame)
-            
-            # Save to buffer
-            buffered = BytesIO()
-            img.save(buffered, format="PNG")
-            
-            # Encode
-            img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-            return f"data:image/png;base64,{img_str}"
+                return {}
+            return encode_frame(frame, self.frame_options)
         except Exception as e:
             print(f"Error rendering frame: {e}")
-            return None
+            return {}
+        finally:
+            FRAME_ENCODE_SECONDS.observe(time.perf_counter() - start, self.env_id, self.frame_options.format)
 
     def close(self):
         self.env.close()
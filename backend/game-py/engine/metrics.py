@@ -0,0 +1,150 @@
+"""Minimal Prometheus-style metrics.
+
+Counters and histograms are kept in plain dicts keyed by label values and
+rendered in the Prometheus text exposition format by ``render``. Observing is a
+lock, a bisect and two additions, cheap enough for the step hot path. Values
+that already live elsewhere (session counts) are passed to ``render`` as
+gauges at scrape time instead of being tracked here.
+
+In sharded mode each shard process exposes its own ``/metrics``.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+import threading
+import time
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket..., +Inf count], sum
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total[0]) for labels, (counts, total) in sorted(self._series.items())]
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+def render(metrics: Iterable[Any], gauges: Iterable[Tuple[str, str, Sequence[str], Dict[Labels, float]]] = ()) -> str:
+    """Render metrics plus scrape-time gauges ``(name, help, label_names, values)``."""
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for name, help_text, label_names, values in gauges:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in sorted(values.items()):
+            lines.append(f"{name}{_format_labels(label_names, labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def timed(histogram: Histogram, label: Callable[[Any], str]) -> Callable:
+    """Decorate a method so each call is observed in ``histogram``, labelled by ``label(self)``."""
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, label(self))
+        return wrapper
+    return decorator
+
+
+STEP_SECONDS = Histogram("game_step_seconds", "Time to run a step on its lane, excluding lane queueing.", ["env_id"])
+RESET_SECONDS = Histogram("game_reset_seconds", "Time to run a reset on its lane, excluding lane queueing.", ["env_id"])
+PLACEMENTS_SECONDS = Histogram("game_placements_seconds", "Time to run a placements query on its lane, excluding lane queueing.", ["env_id"])
+STATE_BUILD_SECONDS = Histogram("game_state_build_seconds", "Time spent building a response state dict.", ["env_id"])
+FRAME_ENCODE_SECONDS = Histogram("game_frame_encode_seconds", "Time to render and encode one frame.", ["env_id", "format"])
+RESPONSE_ENCODE_SECONDS = Histogram("game_response_encode_seconds", "Time to serialize a response body.", ["media_type"])
+RESPONSE_BYTES = Histogram("game_response_bytes", "Serialized response body size.", ["media_type"], buckets=SIZE_BUCKETS)
+ERRORS = Counter("game_errors_total", "Failed game calls.", ["route"])
+
+OP_HISTOGRAMS = {
+    "step": STEP_SECONDS,
+    "reset": RESET_SECONDS,
+    "place": STEP_SECONDS,
+    "placements": PLACEMENTS_SECONDS,
+}
+
+
+def timed_call(op: str, env_id: str, fn: Callable, *args: Any) -> Any:
+    """Run a session call (on its lane) and record how long the env took in ``OP_HISTOGRAMS[op]``."""
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        OP_HISTOGRAMS[op].observe(time.perf_counter() - start, env_id)
+
+
+ALL_METRICS = (
+    STEP_SECONDS,
+    RESET_SECONDS,
+    PLACEMENTS_SECONDS,
+    STATE_BUILD_SECONDS,
+    FRAME_ENCODE_SECONDS,
+    RESPONSE_ENCODE_SECONDS,
+    RESPONSE_BYTES,
+    ERRORS,
+)
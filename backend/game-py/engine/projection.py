@@ -0,0 +1,33 @@
+"""Response field projection shared by all environments.
+
+A projection is the set of top-level response keys a caller wants, e.g.
+``{"observation", "reward", "done"}``. ``None`` means everything. Envs check
+``wants`` before building a field, so structures nobody reads (typically the
+``render`` scene for headless agents) are never constructed.
+"""
+
+from __future__ import annotations
+
+from typing import FrozenSet, Iterable, Optional, Union
+
+RESPONSE_FIELDS = frozenset({"observation", "reward", "done", "truncated", "info", "render", "frame"})
+
+Fields = Optional[FrozenSet[str]]
+
+
+def parse_fields(raw: Union[str, Iterable[str], None]) -> Fields:
+    """Parse ``"observation,reward"`` or a list of names into a projection."""
+    if raw is None:
+        return None
+    names = raw.split(",") if isinstance(raw, str) else list(raw)
+    fields = frozenset(name.strip() for name in names if name.strip())
+    if not fields:
+        return None
+    unknown = fields - RESPONSE_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown response fields: {', '.join(sorted(unknown))}")
+    return fields
+
+
+def wants(fields: Fields, name: str) -> bool:
+    return fields is None or name in fields
@@ -0,0 +1,77 @@
+"""Wire encodings for game responses.
+
+JSON is the default. Clients that send ``Accept: application/msgpack`` get
+msgpack instead, where every NumPy array travels as a raw little-endian buffer::
+
+    {"__ndarray__": True, "dtype": "<f4", "shape": [4], "data": <bytes>}
+
+which decodes zero-copy with ``np.frombuffer(data, dtype).reshape(shape)``.
+Envs may therefore return arrays anywhere in a state dict; the JSON path turns
+them into nested lists only at encode time.
+
+msgpack is optional: without it every request falls back to JSON.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+import json
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        array = np.ascontiguousarray(obj)
+        dtype = array.dtype.newbyteorder("<") if array.dtype.byteorder == ">" else array.dtype
+        array = array.astype(dtype, copy=False)
+        return {"__ndarray__": True, "dtype": dtype.str, "shape": list(array.shape), "data": array.tobytes()}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+
+def encode_json(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def encode_msgpack(payload: Any) -> bytes:
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    return msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+
+
+def decode_msgpack(data: bytes) -> Any:
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    return msgpack.unpackb(data, raw=False)
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the response media type for an ``Accept`` header."""
+    if msgpack is not None and accept and any(alias in accept for alias in _MSGPACK_ALIASES):
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def encode(payload: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return encode_msgpack(payload)
+    return encode_json(payload)
@@ -1,55 +1,220 @@
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 from .gym_wrapper import GymEnvironment
-from .games import SnakeEnvironment, TetrisEnvironment, DoudizhuEnvironment
+from .frame_encoding import FrameOptions
+from .games import SnakeEnvironment, SnakeVectorEnv, TetrisEnvironment, TetrisVectorEnv, DoudizhuEnvironment
+import os
+import sys
+import time
 import uuid
 
+# Rough fixed overheads (bytes) used by estimate_session_bytes. Gym envs hold a
+# renderer surface on top of the last RGB frame, which dominates everything else.
+_BASE_SESSION_BYTES = 2_048
+_GYM_RENDERER_BYTES = 1_500_000
+
+
+def estimate_session_bytes(session: Any) -> int:
+    """Approximate resident size of one session, by env type."""
+    if isinstance(session, SnakeEnvironment):
+        cells = session.grid_w * session.grid_h
+        body = len(session._state.snake) if session._state is not None else 0
+        encoder = session._encoder.nbytes if session._encoder is not None else 0
+        return _BASE_SESSION_BYTES + cells * 8 + body * 64 + encoder
+    if isinstance(session, (SnakeVectorEnv, TetrisVectorEnv)):
+        return _BASE_SESSION_BYTES + session.nbytes
+    if isinstance(session, TetrisEnvironment):
+        replay = len(session._ops) if session._ops is not None else 0
+        return _BASE_SESSION_BYTES + session.grid_w * session.grid_h * 8 + session.grid_h * 64 + replay
+    if isinstance(session, DoudizhuEnvironment):
+        return _BASE_SESSION_BYTES + 54 * 32
+    if isinstance(session, GymEnvironment):
+        state = session.current_state
+        state_bytes = getattr(state, "nbytes", 0) if state is not None else 0
+        renderer_bytes = _GYM_RENDERER_BYTES if session.frame_options.enabled else 0
+        return _BASE_SESSION_BYTES + renderer_bytes + state_bytes
+    return _BASE_SESSION_BYTES + sys.getsizeof(session)
+
+
+# Set by engine.sharding on shard processes. The prefix in every session id lets
+# the router send a request to the shard that owns the session.
+SHARD_ENV_VAR = "GAME_SHARD_INDEX"
+_SESSION_ID_PREFIX = f"s{os.environ[SHARD_ENV_VAR]}-" if SHARD_ENV_VAR in os.environ else ""
+
+
+def new_session_id() -> str:
+    return _SESSION_ID_PREFIX + str(uuid.uuid4())
+
+
+def build_env(env_id: str, config: Optional[Dict[str, Any]] = None) -> Any:
+    """Construct the environment for ``env_id`` from a start config."""
+    config = config or {}
+    fields = config.get("fields")
+    match env_id:
+        case "Snake":
+            grid_w = config.get("grid_w", 15)
+            grid_h = config.get("grid_h", 15)
+            allow_180 = config.get("allow_180", False)
+            wrap_walls = config.get("wrap_walls", False)
+            die_on_self_collision = config.get("die_on_self_collision", True)
+            return SnakeEnvironment(
+                grid_w=grid_w,
+                grid_h=grid_h,
+                allow_180=allow_180,
+                wrap_walls=wrap_walls,
+                die_on_self_collision=die_on_self_collision,
+                fields=fields,
+                obs_mode=config.get("obs_mode", "scene"),
+                window_radius=config.get("window_radius", 5),
+            )
+        case "SnakeVector":
+            return SnakeVectorEnv(
+                num_envs=config.get("num_envs", 16),
+                grid_w=config.get("grid_w", 15),
+                grid_h=config.get("grid_h", 15),
+                seed=config.get("seed"),
+                allow_180=config.get("allow_180", False),
+                wrap_walls=config.get("wrap_walls", False),
+                die_on_self_collision=config.get("die_on_self_collision", True),
+                fields=fields,
+            )
+        case "Tetris":
+            grid_w = config.get("grid_w", 10)
+            grid_h = config.get("grid_h", 20)
+            start_level = config.get("start_level", 1)
+            return TetrisEnvironment(
+                grid_w=grid_w,
+                grid_h=grid_h,
+                start_level=start_level,
+                fields=fields,
+                scene_mode=config.get("scene_mode", "full"),
+                keyframe_every=config.get("keyframe_every", 100),
+                obs_mode=config.get("obs_mode", "scene"),
+                seed=config.get("seed"),
+                record=config.get("record", False),
+            )
+        case "TetrisVector":
+            return TetrisVectorEnv(
+                num_envs=config.get("num_envs", 16),
+                grid_w=config.get("grid_w", 10),
+                grid_h=config.get("grid_h", 20),
+                seed=config.get("seed"),
+                start_level=config.get("start_level", 1),
+                fields=fields,
+            )
+        case "Doudizhu":
+            mode = config.get("mode", "classic")
+            return DoudizhuEnvironment(mode=mode, fields=fields)
+        case _:
+            return GymEnvironment(
+                env_id,
+                frame_options=FrameOptions.from_config(config.get("render")),
+                fields=fields,
+            )
+
+
 class SessionManager:
-    def __init__(self):
-        self.sessions: Dict[str, Any] = {}
+    """Owns live sessions, bounded by a capacity limit and an idle TTL.
+
+    Sessions are kept in LRU order. Creating a session past ``max_sessions``
+    evicts the least recently used one, and ``reap`` detaches sessions idle for
+    longer than ``idle_ttl`` seconds. Evicted sessions are not closed inline;
+    they are handed back by ``reap`` so the caller can close them off the
+    request path (see ``close_sessions``).
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 1800.0):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.sessions: "OrderedDict[str, Any]" = OrderedDict()
+        self.env_ids: Dict[str, str] = {}
+        self._last_used: Dict[str, float] = {}
+        self._pending_close: List[Tuple[str, Any]] = []
+        self.evicted_count = 0
+        self.expired_count = 0
 
     def create_session(self, env_id: str, config: Optional[Dict[str, Any]] = None) -> str:
-        session_id = str(uuid.uuid4())
-        config = config or {}
-        match env_id:
-            case "Snake":
-                grid_w = config.get("grid_w", 15)
-                grid_h = config.get("grid_h", 15)
-                allow_180 = config.get("allow_180", False)
-                wrap_walls = config.get("wrap_walls", False)
-                die_on_self_collision = config.get("die_on_self_collision", True)
-                self.sessions[session_id] = SnakeEnvironment(
-                    grid_w=grid_w,
-                    grid_h=grid_h,
-                    allow_180=allow_180,
-                    wrap_walls=wrap_walls,
-                    die_on_self_collision=die_on_self_collision,
-                )
-            case "Tetris":
-                grid_w = config.get("grid_w", 10)
-                grid_h = config.get("grid_h", 20)
-                start_level = config.get("start_level", 1)
-                self.sessions[session_id] = TetrisEnvironment(
-                    grid_w=grid_w,
-                    grid_h=grid_h,
-                    start_level=start_level,
-                )
-            case "Doudizhu":
-                mode = config.get("mode", "classic")
-                self.sessions[session_id] = DoudizhuEnvironment(mode=mode)
-            case _:
-                self.sessions[session_id] = GymEnvironment(env_id)
+        return self.add_session(env_id, build_env(env_id, config))
+
+    def add_session(self, env_id: str, session: Any, session_id: Optional[str] = None) -> str:
+        """Register an already-built env, evicting the LRU session past capacity."""
+        session_id = session_id or new_session_id()
+        self.sessions[session_id] = session
+        self.env_ids[session_id] = env_id
+        self._last_used[session_id] = time.monotonic()
+        while len(self.sessions) > self.max_sessions > 0:
+            oldest_id = next(iter(self.sessions))
+            self._pending_close.append((oldest_id, self._detach(oldest_id)))
+            self.evicted_count += 1
         return session_id
 
     def get_session(self, session_id: str):
-        return self.sessions.get(session_id)
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self.sessions.move_to_end(session_id)
+            self._last_used[session_id] = time.monotonic()
+        return session
 
     def delete_session(self, session_id: str):
-        if session_id in self.sessions:
+        session = self.pop_session(session_id)
+        if session is not None:
+            self.close_sessions([session])
+
+    def pop_session(self, session_id: str) -> Optional[Any]:
+        """Unregister a session without closing it."""
+        return self._detach(session_id) if session_id in self.sessions else None
+
+    def _detach(self, session_id: str) -> Any:
+        self.env_ids.pop(session_id, None)
+        self._last_used.pop(session_id, None)
+        return self.sessions.pop(session_id)
+
+    def reap(self, now: Optional[float] = None) -> List[Tuple[str, Any]]:
+        """Detach idle sessions and return ``(session_id, session)`` for them and any evicted ones, unclosed.
+
+        Close each on its own lane so it cannot overlap calls still queued there.
+        """
+        now = time.monotonic() if now is None else now
+        if self.idle_ttl > 0:
+            # LRU order means the idle sessions are all at the front.
+            for session_id in list(self.sessions):
+                if now - self._last_used[session_id] <= self.idle_ttl:
+                    break
+                self._pending_close.append((session_id, self._detach(session_id)))
+                self.expired_count += 1
+        detached, self._pending_close = self._pending_close, []
+        return detached
+
+    @staticmethod
+    def close_sessions(sessions: List[Any]) -> None:
+        for session in sessions:
             try:
-                self.sessions[session_id].close()
+                session.close()
             except Exception:
                 pass
-            del self.sessions[session_id]
+
+    def stats(self) -> Dict[str, Any]:
+        by_env: Dict[str, Dict[str, int]] = {}
+        total_bytes = 0
+        for session_id, session in self.sessions.items():
+            size = estimate_session_bytes(session)
+            total_bytes += size
+            entry = by_env.setdefault(self.env_ids.get(session_id, "unknown"), {"count": 0, "bytes": 0})
+            entry["count"] += 1
+            entry["bytes"] += size
+        return {
+            "count": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "idle_ttl": self.idle_ttl,
+            "bytes": total_bytes,
+            "evicted": self.evicted_count,
+            "expired": self.expired_count,
+            "pending_close": len(self._pending_close),
+            "by_env": by_env,
+        }
 
 # Global instance
-session_manager = SessionManager()
+session_manager = SessionManager(
+    max_sessions=int(os.environ.get("GAME_MAX_SESSIONS", "1000")),
+    idle_ttl=float(os.environ.get("GAME_SESSION_TTL", "1800")),
+)
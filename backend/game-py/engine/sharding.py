@@ -0,0 +1,271 @@
+"""Multi-process sharded mode.
+
+``GAME_SHARDS=N python main.py`` starts N ordinary backend processes (shards)
+on consecutive ports after the public one, each owning its own
+``SessionManager``, and serves a thin router on the public port. A shard
+prefixes every session id it creates with its index (``s3-<uuid>``), so the
+router forwards each request to the owning shard without any shared state:
+
+- ``start`` and ``batch/start`` are spread round-robin over shards;
+- per-session routes go to the shard encoded in the id;
+- ``batch/step`` and ``batch/reset`` are split by shard, sent concurrently and
+  merged back in request order.
+
+WebSocket traffic is not proxied: ``GET /api/shards`` lists shard URLs, and a
+socket client talks to a shard directly (a socket's sessions live on the shard
+it is connected to). Shards listen on the router's host, and the listed URLs
+use ``GAME_SHARD_PUBLIC_HOST`` when set, otherwise the host name the client
+used to reach the router, so they are reachable wherever the router is.
+"""
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+
+from .serialization import MSGPACK_MEDIA_TYPE, decode_msgpack, encode, negotiate
+from .session_manager import SHARD_ENV_VAR
+
+
+def shard_of(session_id: str) -> Optional[int]:
+    """Shard index encoded in a session id, or None for unsharded ids."""
+    if not session_id.startswith("s"):
+        return None
+    head, sep, _rest = session_id.partition("-")
+    if not sep or not head[1:].isdigit():
+        return None
+    return int(head[1:])
+
+
+def spawn_shards(count: int, host: str, base_port: int, cwd: str) -> List[subprocess.Popen]:
+    """Start ``count`` backend processes on ``base_port``, ``base_port + 1``, ..."""
+    processes = []
+    for index in range(count):
+        env = dict(os.environ, **{SHARD_ENV_VAR: str(index)})
+        env.pop("GAME_SHARDS", None)
+        processes.append(
+            subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--host", host, "--port", str(base_port + index)],
+                cwd=cwd,
+                env=env,
+            )
+        )
+    return processes
+
+
+def create_router_app(shard_urls: Sequence[str], public_host: Optional[str] = None) -> FastAPI:
+    """Build the FastAPI app that forwards game traffic to ``shard_urls``.
+
+    ``/api/shards`` advertises each shard's port on ``public_host``, or on the
+    host the request was addressed to when it is not given.
+    """
+    client = httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_keepalive_connections=64))
+    round_robin = itertools.cycle(range(len(shard_urls)))
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        await client.aclose()
+
+    app = FastAPI(title="Agent Studio Backend (shard router)", lifespan=lifespan)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "http://localhost:3115"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    def owner(session_id: str) -> str:
+        index = shard_of(session_id)
+        if index is None or index >= len(shard_urls):
+            raise HTTPException(status_code=404, detail="Session not found")
+        return shard_urls[index]
+
+    async def forward(base_url: str, request: Request, path: str) -> Response:
+        upstream = await client.request(
+            request.method,
+            f"{base_url}{path}",
+            params=request.query_params,
+            content=await request.body(),
+            headers={k: v for k, v in request.headers.items() if k.lower() in ("accept", "content-type")},
+        )
+        return Response(
+            content=upstream.content,
+            status_code=upstream.status_code,
+            media_type=upstream.headers.get("content-type"),
+        )
+
+    async def fan_out(
+        request: Request,
+        path: str,
+        key: str,
+        bodies: Dict[int, Dict[str, Any]],
+        session_id_of: Callable[[Any], Optional[str]],
+    ) -> Dict[int, List[Any]]:
+        """POST one sub-batch per shard and return each shard's result list.
+
+        A shard that fails or cannot be reached yields an error result for each
+        of its items (``session_id_of`` names them), so the other shards'
+        results are kept.
+        """
+        media_type = negotiate(request.headers.get("accept"))
+        headers = {"accept": media_type}
+
+        async def post(index: int, body: Dict[str, Any]) -> List[Any]:
+            try:
+                upstream = await client.post(
+                    f"{shard_urls[index]}{path}", params=request.query_params, json=body, headers=headers
+                )
+                if upstream.status_code != 200:
+                    error = f"Shard {index} returned {upstream.status_code}: {upstream.text}"
+                elif media_type == MSGPACK_MEDIA_TYPE:
+                    return decode_msgpack(upstream.content)["results"]
+                else:
+                    return json.loads(upstream.content)["results"]
+            except httpx.HTTPError as e:
+                error = f"Shard {index} unavailable: {e!r}"
+            return [{"session_id": session_id_of(entry), "ok": False, "error": error} for entry in body[key]]
+
+        indices = list(bodies)
+        replies = await asyncio.gather(*(post(i, bodies[i]) for i in indices))
+        return dict(zip(indices, replies))
+
+    def merged(request: Request, results: List[Any]) -> Response:
+        media_type = negotiate(request.headers.get("accept"))
+        return Response(content=encode({"results": results}, media_type), media_type=media_type)
+
+    @app.get("/")
+    async def root():
+        return {"message": "Agent Studio Python Backend is running", "shards": len(shard_urls)}
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "ok"}
+
+    @app.get("/api/shards")
+    async def list_shards(request: Request):
+        host = public_host or request.url.hostname or "localhost"
+        if ":" in host:  # IPv6 literal
+            host = f"[{host}]"
+        return {"shards": [f"http://{host}:{urlsplit(url).port}" for url in shard_urls]}
+
+    @app.get("/api/admin/sessions")
+    async def admin_sessions():
+        replies = await asyncio.gather(*(client.get(f"{url}/api/admin/sessions") for url in shard_urls))
+        shards = [reply.json() for reply in replies]
+        return {
+            "count": sum(shard["count"] for shard in shards),
+            "bytes": sum(shard["bytes"] for shard in shards),
+            "shards": shards,
+        }
+
+    @app.post("/api/game/start")
+    async def start_game(request: Request):
+        return await forward(shard_urls[next(round_robin)], request, "/api/game/start")
+
+    @app.post("/api/game/batch/start")
+    async def batch_start(request: Request):
+        body = await request.json()
+        items = body.get("items", [])
+        assigned = [next(round_robin) for _ in items]
+        bodies: Dict[int, Dict[str, Any]] = {}
+        for item, index in zip(items, assigned):
+            bodies.setdefault(index, {**body, "items": []})["items"].append(item)
+        replies = await fan_out(request, "/api/game/batch/start", "items", bodies, lambda item: None)
+        cursors = {index: iter(results) for index, results in replies.items()}
+        return merged(request, [next(cursors[index]) for index in assigned])
+
+    async def split_batch(request: Request, path: str, key: str, session_id_of) -> Response:
+        body = await request.json()
+        entries = body.get(key, [])
+        results: List[Any] = [None] * len(entries)
+        positions: Dict[int, List[int]] = {}
+        bodies: Dict[int, Dict[str, Any]] = {}
+        for position, entry in enumerate(entries):
+            session_id = session_id_of(entry)
+            index = shard_of(session_id)
+            if index is None or index >= len(shard_urls):
+                results[position] = {"session_id": session_id, "ok": False, "error": "Session not found"}
+                continue
+            positions.setdefault(index, []).append(position)
+            bodies.setdefault(index, {**body, key: []})[key].append(entry)
+        replies = await fan_out(request, path, key, bodies, session_id_of)
+        for index, shard_results in replies.items():
+            for position, result in zip(positions[index], shard_results):
+                results[position] = result
+        return merged(request, results)
+
+    @app.post("/api/game/batch/step")
+    async def batch_step(request: Request):
+        return await split_batch(request, "/api/game/batch/step", "items", lambda item: item.get("session_id", ""))
+
+    @app.post("/api/game/batch/reset")
+    async def batch_reset(request: Request):
+        return await split_batch(request, "/api/game/batch/reset", "session_ids", lambda session_id: session_id)
+
+    @app.post("/api/game/snake/solver")
+    async def run_snake_solver(request: Request):
+        return await forward(shard_urls[next(round_robin)], request, "/api/game/snake/solver")
+
+    @app.post("/api/game/{session_id}/step")
+    async def game_step(session_id: str, request: Request):
+        return await forward(owner(session_id), request, f"/api/game/{session_id}/step")
+
+    @app.post("/api/game/{session_id}/reset")
+    async def game_reset(session_id: str, request: Request):
+        return await forward(owner(session_id), request, f"/api/game/{session_id}/reset")
+
+    @app.get("/api/game/{session_id}/placements")
+    async def game_placements(session_id: str, request: Request):
+        return await forward(owner(session_id), request, f"/api/game/{session_id}/placements")
+
+    @app.post("/api/game/{session_id}/place")
+    async def game_place(session_id: str, request: Request):
+        return await forward(owner(session_id), request, f"/api/game/{session_id}/place")
+
+    @app.get("/api/game/{session_id}/replay")
+    async def game_replay(session_id: str, request: Request):
+        return await forward(owner(session_id), request, f"/api/game/{session_id}/replay")
+
+    @app.delete("/api/game/{session_id}")
+    async def end_game(session_id: str, request: Request):
+        if shard_of(session_id) is None:
+            return {"status": "success"}
+        return await forward(owner(session_id), request, f"/api/game/{session_id}")
+
+    return app
+
+
+def run_sharded(count: int, host: str, port: int) -> None:
+    """Run ``count`` shard processes plus the router on ``port``; blocks."""
+    import uvicorn
+
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Shards listen where the router does; the router itself reaches them locally.
+    processes = spawn_shards(count, host, port + 1, cwd)
+    local_host = "127.0.0.1" if host in ("0.0.0.0", "::", "") else host
+    if ":" in local_host:
+        local_host = f"[{local_host}]"
+    try:
+        app = create_router_app(
+            [f"http://{local_host}:{port + 1 + i}" for i in range(count)],
+            public_host=os.environ.get("GAME_SHARD_PUBLIC_HOST") or None,
+        )
+        uvicorn.run(app, host=host, port=port)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
@@ -1,11 +1,45 @@
-from fastapi import FastAPI, WebSocket, HTTPException
+from fastapi import FastAPI, WebSocket, HTTPException, Query, Header, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List, Optional, Tuple, Union
+from contextlib import asynccontextmanager
 from engine.session_manager import session_manager
+from engine.executor import session_executor
+from engine.projection import Fields, parse_fields
+from engine.serialization import encode, negotiate
+from engine import metrics
+from engine.game_socket import GameSocket, session_hub
+from engine.games.snake import solver as snake_solver
+import functools
+import asyncio
+import math
+import time
 import uvicorn
 import os
 
-app = FastAPI(title="Agent Studio Backend")
+REAPER_INTERVAL = float(os.environ.get("GAME_REAPER_INTERVAL", "30"))
+
+async def reap_sessions_forever():
+    """Close idle and evicted sessions off the request path, each on its own lane."""
+    while True:
+        await asyncio.sleep(REAPER_INTERVAL)
+        detached = session_manager.reap()
+        if detached:
+            await asyncio.gather(
+                *(session_executor.run(session_id, session_manager.close_sessions, [session])
+                  for session_id, session in detached),
+                return_exceptions=True,
+            )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    reaper = asyncio.create_task(reap_sessions_forever())
+    yield
+    reaper.cancel()
+    session_executor.shutdown()
+
+app = FastAPI(title="Agent Studio Backend", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -21,7 +55,52 @@ class GameStartRequest(BaseModel):
     config: dict = None
 
 class ActionRequest(BaseModel):
-    action: int
+    action: Union[int, List[int]]  # a list for vector sessions, one action per board
+
+class PlaceRequest(BaseModel):
+    index: int
+
+class BatchStartRequest(BaseModel):
+    items: List[GameStartRequest]
+    fields: Optional[str] = None
+
+class BatchStepItem(BaseModel):
+    session_id: str
+    action: Union[int, List[int]]  # a list for vector sessions, as in ActionRequest
+
+class BatchStepRequest(BaseModel):
+    items: List[BatchStepItem]
+    fields: Optional[str] = None
+
+class BatchResetRequest(BaseModel):
+    session_ids: List[str]
+    fields: Optional[str] = None
+
+SOLVER_MAX_EPISODES = int(os.environ.get("GAME_SOLVER_MAX_EPISODES", "10000"))
+SOLVER_MAX_STEPS = 1_000_000
+SOLVER_MAX_GRID = 64  # the solver builds per-cell neighbour and BFS tables
+
+class SolverConfig(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    grid_w: int = Field(15, ge=4, le=SOLVER_MAX_GRID)  # the starting snake spans 3 columns
+    grid_h: int = Field(15, ge=2, le=SOLVER_MAX_GRID)
+    allow_180: bool = False
+    wrap_walls: bool = False
+    die_on_self_collision: bool = True
+
+class SolverRunRequest(BaseModel):
+    episodes: int = Field(100, ge=1, le=SOLVER_MAX_EPISODES)
+    config: SolverConfig = Field(default_factory=SolverConfig)
+    seed: int = Field(0, ge=0, le=2**31 - 1)
+    max_steps: int = Field(100_000, ge=1, le=SOLVER_MAX_STEPS)
+
+def request_fields(raw: Optional[str]) -> Fields:
+    """Per-request projection, e.g. ``fields=observation,reward,done``."""
+    try:
+        return parse_fields(raw)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/")
 async def root():
@@ -31,45 +110,239 @@ async def root():
 async def health_check():
     return {"status": "ok"}
 
+# ===== Admin =====
+
+@app.get("/api/admin/sessions")
+async def admin_sessions():
+    return session_manager.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    stats = session_manager.stats()
+    gauges = [
+        ("game_sessions_active", "Live sessions.", ["env_id"],
+         {(env_id,): entry["count"] for env_id, entry in stats["by_env"].items()}),
+        ("game_sessions_bytes", "Approximate memory held by live sessions.", ["env_id"],
+         {(env_id,): entry["bytes"] for env_id, entry in stats["by_env"].items()}),
+        ("game_sessions_evicted", "Sessions evicted for capacity since start.", [], {(): stats["evicted"]}),
+        ("game_sessions_expired", "Sessions expired for idleness since start.", [], {(): stats["expired"]}),
+    ]
+    return metrics.render(metrics.ALL_METRICS, gauges)
+
 # ===== Game API =====
 
-@app.post("/api/game/start")
-async def start_game(request: GameStartRequest):
+def game_response(payload: Any, accept: Optional[str]) -> Response:
+    """Encode a game payload as JSON, or msgpack when the client accepts it."""
+    media_type = negotiate(accept)
+    start = time.perf_counter()
+    content = encode(payload, media_type)
+    metrics.RESPONSE_ENCODE_SECONDS.observe(time.perf_counter() - start, media_type)
+    metrics.RESPONSE_BYTES.observe(len(content), media_type)
+    return Response(content=content, media_type=media_type)
+
+async def run_session(op: str, session_id: str, session: Any, *args: Any) -> Dict[str, Any]:
+    env_id = session_manager.env_ids.get(session_id, "unknown")
+    return await session_executor.run(session_id, metrics.timed_call, op, env_id, getattr(session, op), *args)
+
+async def create_and_reset(env_id: str, config: Optional[dict], fields: Fields = None) -> Tuple[str, Dict[str, Any]]:
+    session_id, session = await session_executor.create(env_id, config)
+    session_manager.add_session(env_id, session, session_id)
     try:
-        session_id = session_manager.create_session(request.env_id, request.config)
+        state = await run_session("reset", session_id, session, fields)
+    except Exception:
+        # Nobody learns the id of a session whose first reset failed; don't leave it behind.
+        if session_manager.pop_session(session_id) is not None:
+            await session_executor.run(session_id, session_manager.close_sessions, [session])
+        raise
+    return session_id, state
+
+async def run_batch(op: str, items: List[Tuple[str, Tuple[Any, ...]]]) -> List[Dict[str, Any]]:
+    """Run ``op`` ("step" or "reset") for each (session_id, args) with per-item errors."""
+    results: List[Dict[str, Any]] = []
+    slots: List[int] = []
+    calls = []
+    for session_id, args in items:
         session = session_manager.get_session(session_id)
-        initial_state = session.reset()
-        return {"session_id": session_id, "state": initial_state}
+        if session is None:
+            results.append({"session_id": session_id, "ok": False, "error": "Session not found"})
+            continue
+        slots.append(len(results))
+        results.append({})
+        env_id = session_manager.env_ids.get(session_id, "unknown")
+        calls.append((session_id, metrics.timed_call, (op, env_id, getattr(session, op), *args)))
+
+    outcomes = await session_executor.run_many(calls)
+    for slot, (session_id, _fn, _args), (ok, value) in zip(slots, calls, outcomes):
+        if ok:
+            results[slot] = {"session_id": session_id, "ok": True, "state": value}
+            session_hub.publish(session_id, op, value)
+        else:
+            metrics.ERRORS.inc(f"batch_{op}")
+            results[slot] = {"session_id": session_id, "ok": False, "error": str(value)}
+    return results
+
+@app.post("/api/game/start")
+async def start_game(request: GameStartRequest, fields: Optional[str] = Query(None), accept: Optional[str] = Header(None)):
+    projection = request_fields(fields)
+    try:
+        session_id, initial_state = await create_and_reset(request.env_id, request.config, projection)
     except Exception as e:
+        metrics.ERRORS.inc("start")
         raise HTTPException(status_code=500, detail=str(e))
+    return game_response({"session_id": session_id, "state": initial_state}, accept)
+
+# Batch routes are declared before the /{session_id} routes so "batch" is not
+# captured as a session id. Each item succeeds or fails on its own.
+
+@app.post("/api/game/batch/start")
+async def batch_start(request: BatchStartRequest, accept: Optional[str] = Header(None)):
+    projection = request_fields(request.fields)
+    created = await asyncio.gather(
+        *(create_and_reset(item.env_id, item.config, projection) for item in request.items),
+        return_exceptions=True,
+    )
+    results = []
+    for outcome in created:
+        if isinstance(outcome, BaseException):
+            metrics.ERRORS.inc("batch_start")
+            results.append({"session_id": None, "ok": False, "error": str(outcome)})
+        else:
+            session_id, state = outcome
+            results.append({"session_id": session_id, "ok": True, "state": state})
+    return game_response({"results": results}, accept)
+
+@app.post("/api/game/batch/step")
+async def batch_step(request: BatchStepRequest, accept: Optional[str] = Header(None)):
+    projection = request_fields(request.fields)
+    results = await run_batch("step", [(item.session_id, (item.action, projection)) for item in request.items])
+    return game_response({"results": results}, accept)
+
+@app.post("/api/game/batch/reset")
+async def batch_reset(request: BatchResetRequest, accept: Optional[str] = Header(None)):
+    projection = request_fields(request.fields)
+    results = await run_batch("reset", [(session_id, (projection,)) for session_id in request.session_ids])
+    return game_response({"results": results}, accept)
+
+# ===== Baselines =====
+
+SOLVER_CHUNK = 16  # episodes per CPU pool job, so a run spreads evenly over the workers
+
+@app.post("/api/game/snake/solver")
+async def run_snake_solver(request: SolverRunRequest):
+    """Play episodes with the scripted Snake baseline and report scores."""
+    seeds = list(range(request.seed, request.seed + request.episodes))
+    chunk = max(1, min(SOLVER_CHUNK, math.ceil(len(seeds) / session_executor.cpu_workers)))
+    chunks = [seeds[i:i + chunk] for i in range(0, len(seeds), chunk)]
+    play = functools.partial(snake_solver.play_episodes, config=request.config.model_dump(), max_steps=request.max_steps)
+    start = time.perf_counter()
+    try:
+        outcomes = await session_executor.map_cpu(play, chunks)
+    except Exception as e:
+        metrics.ERRORS.inc("solver")
+        raise HTTPException(status_code=500, detail=str(e))
+    results = [result for chunk_results in outcomes for result in chunk_results]
+    return snake_solver.summarize(results, time.perf_counter() - start)
 
 @app.post("/api/game/{session_id}/step")
-async def game_step(session_id: str, request: ActionRequest):
+async def game_step(
+    session_id: str,
+    request: ActionRequest,
+    fields: Optional[str] = Query(None),
+    accept: Optional[str] = Header(None),
+):
+    projection = request_fields(fields)
     session = session_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     try:
-        state = session.step(request.action)
-        return state
+        state = await run_session("step", session_id, session, request.action, projection)
+        session_hub.publish(session_id, "step", state)
     except Exception as e:
+        metrics.ERRORS.inc("step")
         raise HTTPException(status_code=500, detail=str(e))
+    return game_response(state, accept)
 
 @app.post("/api/game/{session_id}/reset")
-async def game_reset(session_id: str):
+async def game_reset(session_id: str, fields: Optional[str] = Query(None), accept: Optional[str] = Header(None)):
+    projection = request_fields(fields)
     session = session_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     try:
-        state = session.reset()
-        return state
+        state = await run_session("reset", session_id, session, projection)
+        session_hub.publish(session_id, "reset", state)
+    except Exception as e:
+        metrics.ERRORS.inc("reset")
+        raise HTTPException(status_code=500, detail=str(e))
+    return game_response(state, accept)
+
+@app.get("/api/game/{session_id}/placements")
+async def game_placements(session_id: str, accept: Optional[str] = Header(None)):
+    """Final placements of the current piece (Tetris), indexed for ``place``."""
+    session = session_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if not hasattr(session, "placements"):
+        raise HTTPException(status_code=400, detail="Session does not support placements")
+
+    try:
+        result = await run_session("placements", session_id, session)
+    except Exception as e:
+        metrics.ERRORS.inc("placements")
+        raise HTTPException(status_code=500, detail=str(e))
+    return game_response(result, accept)
+
+@app.post("/api/game/{session_id}/place")
+async def game_place(
+    session_id: str,
+    request: PlaceRequest,
+    fields: Optional[str] = Query(None),
+    accept: Optional[str] = Header(None),
+):
+    """Lock the current piece at one of its placements in a single step."""
+    projection = request_fields(fields)
+    session = session_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if not hasattr(session, "place"):
+        raise HTTPException(status_code=400, detail="Session does not support placements")
+
+    try:
+        state = await run_session("place", session_id, session, request.index, projection)
+        session_hub.publish(session_id, "step", state)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        metrics.ERRORS.inc("place")
+        raise HTTPException(status_code=500, detail=str(e))
+    return game_response(state, accept)
+
+@app.get("/api/game/{session_id}/replay")
+async def game_replay(session_id: str):
+    """The session's Tetris game so far as a compact binary replay (``record: true`` sessions)."""
+    session = session_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if not hasattr(session, "replay"):
+        raise HTTPException(status_code=400, detail="Session does not support replays")
+
+    try:
+        replay = await session_executor.run(session_id, session.replay)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        metrics.ERRORS.inc("replay")
         raise HTTPException(status_code=500, detail=str(e))
+    return Response(content=replay.to_bytes(), media_type="application/octet-stream")
 
 @app.delete("/api/game/{session_id}")
 async def end_game(session_id: str):
-    session_manager.delete_session(session_id)
+    session = session_manager.pop_session(session_id)
+    if session is not None:
+        await session_executor.run(session_id, session_manager.close_sessions, [session])
+    session_hub.publish(session_id, "close")
     return {"status": "success"}
 
 # ===== WebSocket =====
@@ -78,12 +351,14 @@ async def end_game(session_id: str):
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     try:
-        while True:
-            data = await websocket.receive_text()
-            # Echo back for now
-            await websocket.send_text(f"Agent received: {data}")
+        await GameSocket(websocket, session_manager, session_executor, session_hub).serve()
     except Exception as e:
         print(f"WebSocket error: {e}")
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    shards = int(os.environ.get("GAME_SHARDS", "0"))
+    if shards > 0:
+        from engine.sharding import run_sharded
+        run_sharded(shards, host="0.0.0.0", port=8000)
+    else:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
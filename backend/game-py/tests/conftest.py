@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the backend as top-level modules (``engine``, ``main``), as the server does.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def client():
+    """HTTP/WebSocket client for the app; sessions it leaves behind are closed."""
+    from fastapi.testclient import TestClient
+
+    import main
+    from engine.session_manager import session_manager
+
+    before = set(session_manager.sessions)
+    yield TestClient(main.app)
+    for session_id in set(session_manager.sessions) - before:
+        session = session_manager.pop_session(session_id)
+        if session is not None:
+            session_manager.close_sessions([session])
@@ -0,0 +1,23 @@
+"""Shared random Snake play for the rule-engine tests."""
+
+import random
+
+from engine.games.snake.rules import reset_state, step_state
+
+OPTIONS = [
+    {},
+    {"wrap_walls": True},
+    {"die_on_self_collision": False},
+    {"wrap_walls": True, "die_on_self_collision": False, "allow_180": True},
+]
+
+
+def play(grid_w, grid_h, seed, steps, **options):
+    """Yield ``(prev, next, info)`` for random play, resetting after each episode."""
+    rng = random.Random(seed)
+    actions = random.Random(seed + 1)
+    state = reset_state(grid_w, grid_h, rng)
+    for _ in range(steps):
+        nxt, _reward, done, info = step_state(state, actions.randrange(5), rng, **options)
+        yield state, nxt, info
+        state = reset_state(grid_w, grid_h, rng) if done else nxt
@@ -0,0 +1,61 @@
+"""Batch routes: one result per item, in request order, failing per item."""
+
+from engine.session_manager import session_manager
+
+FIELDS = "observation,reward,done"
+
+
+def start(client, *env_ids):
+    response = client.post(
+        "/api/game/batch/start",
+        json={"items": [{"env_id": env_id} for env_id in env_ids], "fields": FIELDS},
+    )
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+def test_batch_start_reports_each_item(client):
+    before = len(session_manager.sessions)
+    results = start(client, "Snake", "NoSuchEnv-v0", "Tetris", "CartPole-v1")
+    assert [r["ok"] for r in results] == [True, False, True, True]
+    assert results[1]["session_id"] is None and "NoSuchEnv" in results[1]["error"]
+    assert "snake" in results[0]["state"]["observation"]
+    assert "board" in results[2]["state"]["observation"]
+    assert len(results[3]["state"]["observation"]) == 4
+    # The failed item leaves no session behind.
+    assert len(session_manager.sessions) == before + 3
+
+
+def test_batch_step_keeps_order_and_isolates_errors(client):
+    snake, _missing, cartpole = (r["session_id"] for r in start(client, "Snake", "NoSuchEnv-v0", "CartPole-v1"))
+    response = client.post("/api/game/batch/step", json={
+        "items": [
+            {"session_id": snake, "action": 1},
+            {"session_id": "missing", "action": 0},
+            {"session_id": cartpole, "action": 7},
+            {"session_id": cartpole, "action": 0},
+            {"session_id": snake, "action": 1},
+        ],
+        "fields": FIELDS,
+    })
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["session_id"] for r in results] == [snake, "missing", cartpole, cartpole, snake]
+    assert [r["ok"] for r in results] == [True, False, False, True, True]
+    assert results[1]["error"] == "Session not found"
+    assert "7" in results[2]["error"]
+    # Items for one session run in request order.
+    assert results[0]["state"]["observation"]["snake"][0] == [8, 7]
+    assert results[4]["state"]["observation"]["snake"][0] == [9, 7]
+
+
+def test_batch_reset_keeps_order(client):
+    snake, tetris = (r["session_id"] for r in start(client, "Snake", "Tetris"))
+    client.post("/api/game/batch/step", json={"items": [{"session_id": snake, "action": 1}]})
+    response = client.post(
+        "/api/game/batch/reset",
+        json={"session_ids": [tetris, "missing", snake], "fields": FIELDS},
+    )
+    results = response.json()["results"]
+    assert [(r["session_id"], r["ok"]) for r in results] == [(tetris, True), ("missing", False), (snake, True)]
+    assert results[2]["state"]["observation"]["snake"][0] == [7, 7]
@@ -0,0 +1,107 @@
+"""The /ws/game session protocol through TestClient."""
+
+import time
+
+from engine.serialization import decode_msgpack, encode_msgpack
+from engine.session_manager import session_manager
+
+
+def call(ws, message_id, **message):
+    ws.send_json({"id": message_id, **message})
+    reply = ws.receive_json()
+    assert reply["id"] == message_id
+    return reply
+
+
+def eventually(predicate, timeout=5.0):
+    """Poll ``predicate``: disconnect cleanup runs on the server after the client leaves."""
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_start_step_reset_close(client):
+    with client.websocket_connect("/ws/game") as ws:
+        started = call(ws, 1, op="start", env_id="Snake", fields="observation")
+        assert started["ok"] and started["op"] == "start"
+        session_id = started["session_id"]
+        assert started["state"]["observation"]["snake"][0] == [7, 7]
+
+        stepped = call(ws, 2, op="step", session_id=session_id, action=1)
+        assert stepped["ok"] and stepped["state"]["observation"]["snake"][0] == [8, 7]
+        assert stepped["state"]["reward"] == -0.1
+        reset = call(ws, 3, op="reset", session_id=session_id, fields="observation")
+        assert reset["state"]["observation"]["snake"][0] == [7, 7]
+
+        assert call(ws, 4, op="placements", session_id=session_id)["error"] == "Session does not support placements"
+        assert call(ws, 5, op="step", session_id="missing", action=0)["error"] == "Session not found"
+        assert call(ws, 6, op="step")["error"] == "session_id is required"
+        assert call(ws, 7, op="jump", session_id=session_id)["error"] == "Unknown op: 'jump'"
+        ws.send_text("not json")
+        assert ws.receive_json()["ok"] is False
+
+        closed = call(ws, 8, op="close", session_id=session_id)
+        assert closed["ok"] and session_manager.get_session(session_id) is None
+        assert call(ws, 9, op="step", session_id=session_id, action=0)["ok"] is False
+
+
+def test_tetris_place_and_binary_frames(client):
+    with client.websocket_connect("/ws/game") as ws:
+        ws.send_bytes(encode_msgpack({"id": "a", "op": "start", "env_id": "Tetris"}))
+        started = decode_msgpack(ws.receive_bytes())
+        assert started["id"] == "a" and started["ok"]
+        session_id = started["session_id"]
+        placements = call(ws, "b", op="placements", session_id=session_id)["placements"]
+        assert placements
+        placed = call(ws, "c", op="place", session_id=session_id, index=len(placements) - 1)
+        assert placed["ok"] and placed["op"] == "place"
+        assert call(ws, "d", op="place", session_id=session_id, index=999)["ok"] is False
+
+
+def test_subscribers_see_socket_and_http_moves(client):
+    with client.websocket_connect("/ws/game") as driver, client.websocket_connect("/ws/game") as watcher:
+        session_id = call(driver, 1, op="start", env_id="Snake")["session_id"]
+        assert call(watcher, 1, op="subscribe", session_id=session_id)["ok"]
+
+        step = call(driver, 2, op="step", session_id=session_id, action=2, fields="observation")
+        event = watcher.receive_json()
+        assert (event["op"], event["event"], event["session_id"]) == ("event", "step", session_id)
+        assert event["state"] == step["state"]
+
+        client.post(f"/api/game/{session_id}/reset")
+        assert watcher.receive_json()["event"] == "reset"
+
+        call(driver, 3, op="close", session_id=session_id)
+        assert watcher.receive_json()["event"] == "close"
+        assert call(watcher, 2, op="subscribe", session_id=session_id)["ok"] is False
+
+
+def test_replies_are_tagged_by_id(client):
+    with client.websocket_connect("/ws/game") as ws:
+        ids = [call(ws, i, op="start", env_id="Snake")["session_id"] for i in range(3)]
+        for n, session_id in enumerate(ids * 4):
+            ws.send_json({"id": n, "op": "step", "session_id": session_id, "action": 1, "fields": "observation"})
+        replies = {}
+        for _ in range(12):
+            reply = ws.receive_json()
+            replies[reply["id"]] = reply
+        assert sorted(replies) == list(range(12))
+        # Each session's steps applied in the order they were sent.
+        for n, session_id in enumerate(ids * 4):
+            assert replies[n]["session_id"] == session_id
+            assert replies[n]["state"]["observation"]["snake"][0] == [8 + n // 3, 7]
+
+
+def test_disconnect_closes_owned_sessions(client):
+    before = set(session_manager.sessions)
+    with client.websocket_connect("/ws/game") as ws:
+        owned = [call(ws, i, op="start", env_id="Snake")["session_id"] for i in range(3)]
+        other = client.post("/api/game/start", json={"env_id": "Snake"}).json()["session_id"]
+        assert call(ws, 3, op="subscribe", session_id=other)["ok"]
+        # Starts still in flight when the client goes away are cleaned up too.
+        for i in range(4, 12):
+            ws.send_json({"id": i, "op": "start", "env_id": "Snake"})
+    # Only the session started over HTTP is left.
+    assert eventually(lambda: set(session_manager.sessions) - before == {other})
+    assert not any(session_id in session_manager.sessions for session_id in owned)
@@ -0,0 +1,53 @@
+"""SnakeBoard: in-place step and undo against the pure rules."""
+
+import random
+
+import pytest
+
+from engine.games.snake.board import SnakeBoard
+from engine.games.snake.rules import empty_cells, reset_state, step_state
+from engine.games.snake.zobrist import ZobristKeys
+
+from snake_play import OPTIONS
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_board_step_matches_step_state(options):
+    rng_a, rng_b = random.Random(11), random.Random(11)
+    actions = random.Random(12)
+    state = reset_state(7, 7, rng_a)
+    board = SnakeBoard.from_state(reset_state(7, 7, rng_b), **options)
+    for _ in range(3000):
+        action = actions.randrange(5)
+        state, *expected = step_state(state, action, rng_a, **options)
+        assert list(board.step(action, rng_b)) == expected
+        done = expected[1]
+        if done:
+            state = reset_state(7, 7, rng_a)
+            board.load(reset_state(7, 7, rng_b))
+        else:
+            assert board.to_state() == state
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_board_undo_restores_state_hash_and_occupancy(options):
+    keys = ZobristKeys(8, 6, seed=3)
+    rng = random.Random(7)
+    board = SnakeBoard.from_state(reset_state(8, 6, rng), keys=keys, **options)
+    history = []
+    for _ in range(400):
+        history.append((board.to_state(), board.hash, sorted(board.occupancy.free_cells())))
+        if rng.random() < 0.1:
+            free = board.occupancy.free_cells()
+            board.set_food(rng.choice(free) if free else None)
+        else:
+            board.step(rng.randrange(5), rng)
+        assert board.hash == keys.hash_state(board.to_state())
+    assert board.depth == len(history)
+    while history:
+        board.undo()
+        state, h, free = history.pop()
+        assert board.to_state() == state
+        assert board.hash == h
+        assert sorted(board.occupancy.free_cells()) == free
+        assert sorted(board.occupancy.free_cells()) == sorted(empty_cells(state))
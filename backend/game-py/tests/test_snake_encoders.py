@@ -0,0 +1,26 @@
+"""Snake tensor observations: incremental updates against full re-encodes."""
+
+import numpy as np
+import pytest
+
+from engine.games.snake.encoders import SnakeEncoder
+
+from snake_play import OPTIONS, play
+
+
+@pytest.mark.parametrize("wrap_walls", [False, True])
+@pytest.mark.parametrize("options", OPTIONS[:3])
+def test_encoder_update_matches_rebuild(wrap_walls, options):
+    options = {**options, "wrap_walls": wrap_walls}
+    encoder = SnakeEncoder(9, 7, wrap_walls=wrap_walls, window_radius=3)
+    fresh = SnakeEncoder(9, 7, wrap_walls=wrap_walls, window_radius=3)
+    current = None
+    for prev, nxt, _info in play(9, 7, seed=5, steps=2000, **options):
+        if prev is not current:
+            encoder.reset(prev)
+        encoder.update(prev, nxt)
+        current = nxt
+        fresh.reset(nxt)
+        assert np.array_equal(encoder.cells, fresh.cells)
+        for mode in ("planes", "window", "rays"):
+            assert np.array_equal(encoder.observe(mode), fresh.observe(mode)), mode
@@ -0,0 +1,55 @@
+"""Snake free-cell index against the empty-cell scan it replaces."""
+
+import random
+
+import pytest
+
+from engine.games.snake.occupancy import Occupancy
+from engine.games.snake.rules import empty_cells, reset_state, set_food, step_state
+
+from snake_play import OPTIONS
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+@pytest.mark.parametrize("size", [(6, 6), (10, 7)])
+def test_occupancy_step_state_matches_baseline(options, size):
+    grid_w, grid_h = size
+    for seed in range(3):
+        rng_a, rng_b = random.Random(seed), random.Random(seed)
+        actions = random.Random(seed + 1)
+        occupancy = Occupancy(grid_w, grid_h)
+        a = reset_state(grid_w, grid_h, rng_a)
+        b = reset_state(grid_w, grid_h, rng_b, occupancy)
+        assert a == b
+        for _ in range(1500):
+            action = actions.randrange(5)
+            a_next, a_reward, a_done, a_info = step_state(a, action, rng_a, **options)
+            b_next, b_reward, b_done, b_info = step_state(b, action, rng_b, occupancy=occupancy, **options)
+            assert (a_next, a_reward, a_done, a_info) == (b_next, b_reward, b_done, b_info)
+            assert sorted(occupancy.free_cells()) == sorted(empty_cells(b_next))
+            if a_done:
+                a = reset_state(grid_w, grid_h, rng_a)
+                b = reset_state(grid_w, grid_h, rng_b, occupancy)
+            else:
+                a, b = a_next, b_next
+
+
+def test_occupancy_defer_mode_samples_like_empty_cells():
+    rng_a, rng_b = random.Random(4), random.Random(4)
+    actions = random.Random(5)
+    occupancy = Occupancy(6, 6)
+    a = reset_state(6, 6, rng_a)
+    b = reset_state(6, 6, rng_b, occupancy)
+    for _ in range(2000):
+        action = actions.randrange(4)
+        a, _, a_done, a_info = step_state(a, action, rng_a, spawn_mode="defer")
+        b, _, b_done, b_info = step_state(b, action, rng_b, spawn_mode="defer", occupancy=occupancy)
+        assert a == b and a_done == b_done
+        if a_info.get("pending_food"):
+            assert b_info["free_count"] == len(a_info["empty_cells"])
+            a = set_food(a, rng_a.choice(a_info["empty_cells"]))
+            b = set_food(b, occupancy.sample(rng_b))
+            assert a == b
+        if a_done:
+            a = reset_state(6, 6, rng_a)
+            b = reset_state(6, 6, rng_b, occupancy)
@@ -0,0 +1,57 @@
+"""Snake baseline solver: legal, non-suicidal moves and reproducible runs."""
+
+import random
+
+import pytest
+
+from engine.games.snake import rules
+from engine.games.snake.board import SnakeBoard
+from engine.games.snake.solver import SnakeSolver, play_episodes
+
+CONFIGS = [
+    {"grid_w": 6, "grid_h": 6},
+    {"grid_w": 8, "grid_h": 5, "wrap_walls": True},
+    {"grid_w": 7, "grid_h": 6, "allow_180": True},
+]
+
+
+def crashes(state, action, options):
+    _next, _reward, done, info = rules.step_state(state, action, random.Random(0), **options)
+    return done and info.get("reason") in ("wall", "self")
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_solver_plays_legal_safe_moves(config):
+    grid_w, grid_h = config["grid_w"], config["grid_h"]
+    options = {key: value for key, value in config.items() if key not in ("grid_w", "grid_h")}
+    solver = SnakeSolver(grid_w, grid_h, wrap_walls=options.get("wrap_walls", False))
+    wins = 0
+    for seed in range(4):
+        rng = random.Random(seed)
+        board = SnakeBoard.from_state(rules.reset_state(grid_w, grid_h, rng), **options)
+        for _ in range(2000):
+            state = board.to_state()
+            action = solver.act(board)
+            legal = rules.legal_moves(state, options.get("allow_180", False))
+            assert action in legal
+            if any(not crashes(state, move, options) for move in legal):
+                assert not crashes(state, action, options)
+            _reward, done, info = board.step(action, rng)
+            board.forget()
+            if done:
+                wins += bool(info.get("won"))
+                break
+    assert wins > 0
+
+
+def test_play_episodes_is_deterministic():
+    config = {"grid_w": 7, "grid_h": 7}
+
+    def outcomes(results):
+        return [{key: r[key] for key in ("seed", "score", "steps", "outcome")} for r in results]
+
+    batch = outcomes(play_episodes(range(6), config, max_steps=3000))
+    assert batch == outcomes(play_episodes(range(6), config, max_steps=3000))
+    # Runs split into chunks, as the API does over workers, give the same episodes.
+    chunks = [play_episodes([seed], config, max_steps=3000) for seed in reversed(range(6))]
+    assert batch == outcomes(result for chunk in reversed(chunks) for result in chunk)
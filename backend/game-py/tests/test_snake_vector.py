@@ -0,0 +1,71 @@
+"""SnakeVectorEnv: batched steps against one scalar board per env."""
+
+import random
+
+import numpy as np
+import pytest
+
+from engine.games.snake.rules import reset_state, set_food, step_state
+from engine.games.snake.vector import CELL_BODY, CELL_FOOD, CELL_HEAD, SnakeVectorEnv
+
+from snake_play import OPTIONS
+
+
+def render(state):
+    board = np.zeros((state.grid_h, state.grid_w), dtype=np.int8)
+    for x, y in state.snake[1:]:
+        board[y, x] = CELL_BODY
+    board[state.snake[0][1], state.snake[0][0]] = CELL_HEAD
+    if state.food is not None:
+        board[state.food[1], state.food[0]] = CELL_FOOD
+    return board
+
+
+def vector_food(env, i):
+    cell = int(env.food[i])
+    return None if cell < 0 else (cell % env.grid_w, cell // env.grid_w)
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+@pytest.mark.parametrize("size", [(6, 5), (9, 9)])
+def test_vector_env_matches_scalar_rules(options, size):
+    # The vector env draws food from its own generator, so each scalar board
+    # spawns nothing ("defer") and takes the food the vector env placed.
+    grid_w, grid_h = size
+    n = 8
+    env = SnakeVectorEnv(n, grid_w, grid_h, seed=0, **options)
+    rng = random.Random(0)
+    obs = env.reset()["observation"]
+    states = [set_food(reset_state(grid_w, grid_h, rng), vector_food(env, i)) for i in range(n)]
+    actions = np.random.default_rng(1)
+    meals = 0
+    for _ in range(1500):
+        for i, state in enumerate(states):
+            assert np.array_equal(obs["board"][i], render(state))
+            assert obs["direction"][i] == state.direction
+            assert obs["score"][i] == state.score
+        step = actions.integers(0, 5, size=n)
+        result = env.step(step)
+        obs = result["observation"]
+        for i, state in enumerate(states):
+            nxt, reward, done, _info = step_state(state, int(step[i]), rng, spawn_mode="defer", **options)
+            assert result["reward"][i] == reward
+            assert result["done"][i] == done
+            assert result["info"]["score"][i] == nxt.score
+            meals += nxt.score > state.score
+            if done:
+                nxt = reset_state(grid_w, grid_h, rng)
+            states[i] = set_food(nxt, vector_food(env, i))
+    assert meals > n
+
+
+def test_vector_env_is_deterministic_per_seed():
+    a, b = SnakeVectorEnv(16, 8, 8, seed=5), SnakeVectorEnv(16, 8, 8, seed=5)
+    assert np.array_equal(a.reset()["observation"]["board"], b.reset()["observation"]["board"])
+    actions = np.random.default_rng(6)
+    for _ in range(500):
+        step = actions.integers(0, 5, size=16)
+        ra, rb = a.step(step), b.step(step)
+        assert np.array_equal(ra["observation"]["board"], rb["observation"]["board"])
+        assert np.array_equal(ra["reward"], rb["reward"])
+        assert np.array_equal(ra["done"], rb["done"])
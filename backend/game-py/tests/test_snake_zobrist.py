@@ -0,0 +1,14 @@
+"""Snake Zobrist hashes: incremental updates against full rehashes."""
+
+import pytest
+
+from engine.games.snake.zobrist import ZobristKeys
+
+from snake_play import OPTIONS, play
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_zobrist_update_matches_hash_state(options):
+    keys = ZobristKeys(7, 5, seed=1)
+    for prev, nxt, _info in play(7, 5, seed=2, steps=3000, **options):
+        assert keys.update(keys.hash_state(prev), prev, nxt) == keys.hash_state(nxt)
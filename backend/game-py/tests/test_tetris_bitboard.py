@@ -0,0 +1,31 @@
+"""Tetris bitboard: line clears keep rows, columns and colours in step."""
+
+from engine.games.tetris.bitboard import BitBoard
+
+
+def column_masks(rows, grid_w):
+    return [sum(1 << y for y, row in enumerate(rows) if row >> x & 1) for x in range(grid_w)]
+
+
+def test_bitboard_clears_separated_lines():
+    full = (1 << 6) - 1
+    # Rows 4 and 6 become full once column 5 is filled in rows 4-7; row 5 has another gap.
+    rows = [0, 0, 0, 0b000001, full & ~(1 << 5), 0b011110, full & ~(1 << 5), 0b000011]
+    colors = [[0 if row >> x & 1 else -1 for x in range(6)] for row in rows]
+    board = BitBoard(6, 8, rows, colors)
+    cleared = board.place([(5, 4), (5, 5), (5, 6), (5, 7)], color=3)
+    assert cleared == [4, 6]
+    assert board.rows == [0, 0, 0, 0, 0, 0b000001, 0b111110, 0b100011]
+    assert board.cols == column_masks(board.rows, 6)
+    assert board.colors[0] == board.colors[1] == [-1] * 6
+    assert board.colors[6] == [-1, 0, 0, 0, 0, 3]
+    assert board.colors[7] == [0, 0, -1, -1, -1, 3]
+
+
+def test_bitboard_clears_tetris():
+    full = (1 << 4) - 1
+    rows = [0, 0, 0b0001] + [full & ~1] * 4
+    board = BitBoard(4, 7, rows)
+    assert board.place([(0, 3), (0, 4), (0, 5), (0, 6)], color=0) == [3, 4, 5, 6]
+    assert board.rows == [0, 0, 0, 0, 0, 0, 0b0001]
+    assert board.cols == column_masks(board.rows, 4) == [1 << 6, 0, 0, 0]
@@ -0,0 +1,61 @@
+"""Tetris board features: incremental updates against a full board scan."""
+
+import random
+
+import numpy as np
+import pytest
+
+from engine.games.tetris.environment import TetrisEnvironment
+from engine.games.tetris.features import FEATURES
+
+ACTIONS = (-1, 0, 1, 2, 3, 4, 5, 5)
+
+
+def scan_features(colors):
+    """Heights, then FEATURES, from the whole board."""
+    filled = np.array(colors) >= 0
+    grid_h, grid_w = filled.shape
+    heights, holes = [], 0
+    for x in range(grid_w):
+        column = filled[:, x]
+        top = int(np.argmax(column)) if column.any() else grid_h
+        heights.append(grid_h - top)
+        holes += int((~column[top:]).sum())
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+    sides = [grid_h] + heights + [grid_h]
+    wells = sum(max(0, min(sides[x], sides[x + 2]) - sides[x + 1]) for x in range(grid_w))
+    transitions = 0
+    for row in filled:
+        cells = [True, *row, True]
+        transitions += sum(a != b for a, b in zip(cells, cells[1:]))
+    stats = dict(
+        holes=holes,
+        aggregate_height=sum(heights),
+        max_height=max(heights),
+        bumpiness=bumpiness,
+        wells=wells,
+        row_transitions=transitions,
+    )
+    return heights + [stats[name] for name in FEATURES]
+
+
+@pytest.mark.parametrize("size", [(10, 20), (6, 8)])
+def test_incremental_features_match_scan(size):
+    grid_w, grid_h = size
+    rng = random.Random(1)
+    env = TetrisEnvironment(grid_w, grid_h, seed=1, obs_mode="features")
+    result = env.reset()
+    cleared = 0
+    for _ in range(3000):
+        features = result["observation"]["features"]
+        assert features.dtype == np.float32
+        assert list(features) == scan_features(env._board.colors)
+        placements = env.placements()["placements"] if rng.random() < 0.3 else None
+        if placements:
+            # Greedy placements between random moves, so lines get cleared over stacks with holes.
+            best = max(range(len(placements)), key=lambda i: (placements[i]["lines"], rng.random()))
+            result = env.place(best)
+            cleared += placements[best]["lines"]
+        else:
+            result = env.step(rng.choice(ACTIONS))
+    assert cleared > 0
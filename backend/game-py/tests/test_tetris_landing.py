@@ -0,0 +1,40 @@
+"""Tetris landing rows: the column-mask lookup against row-by-row descent."""
+
+import random
+
+import pytest
+
+from engine.games.tetris.bitboard import BitBoard, landing_row
+from engine.games.tetris.rules import PIECES
+
+
+def descend(board, shape, x, y):
+    while board.fits(shape.rows, x, y + 1):
+        y += 1
+    return y
+
+
+@pytest.mark.parametrize("size", [(10, 20), (4, 6), (13, 30)])
+def test_landing_row_matches_descent(size):
+    grid_w, grid_h = size
+    rng = random.Random(grid_w)
+    checked = 0
+    for _ in range(40):
+        # Random stacks with holes and overhangs, denser towards the floor; one
+        # gap per row keeps them from being full.
+        density = rng.random()
+        rows = [
+            sum(1 << x for x in range(grid_w) if rng.random() < density * y / grid_h) & ~(1 << rng.randrange(grid_w))
+            for y in range(grid_h)
+        ]
+        board = BitBoard(grid_w, grid_h, rows)
+        for shapes in PIECES.values():
+            for shape in shapes:
+                for x in range(-3, grid_w):
+                    for y in range(grid_h):
+                        if board.fits(shape.rows, x, y):
+                            expected = descend(board, shape, x, y)
+                            assert landing_row(board.cols, grid_h, shape, x, y) == expected
+                            assert board.landing_row(shape, x, y) == expected
+                            checked += 1
+    assert checked > 500
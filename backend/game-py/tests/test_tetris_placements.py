@@ -0,0 +1,115 @@
+"""Tetris placements: the row-mask search against plain enumeration."""
+
+import copy
+import random
+
+import pytest
+
+from engine.games.tetris.bitboard import BitBoard
+from engine.games.tetris.environment import TetrisEnvironment
+from engine.games.tetris.placements import find_placements
+from engine.games.tetris.rules import KICK_SEQUENCE, SHAPE_ROWS
+
+ACTIONS = (-1, -1, 0, 1, 2, 3, 4)
+
+
+def cells_of(shape, x, y):
+    min_dx, _max_dx, _min_dy, _max_dy, masks = shape
+    return frozenset((x + min_dx + b, y + dy) for dy, mask in masks for b in range(4) if mask >> b & 1)
+
+
+def search(board, shapes, rotation, x, y):
+    """Landing cells reachable one move at a time, as ``TetrisEnvironment`` plays."""
+    start = (rotation % 4, x, y)
+    seen, queue, landed = {start}, [start], set()
+    for r, px, py in queue:
+        shape = shapes[r]
+        moves = [(r, px + dx, py + dy) for dx, dy in ((-1, 0), (1, 0), (0, 1))]
+        moves = [m for m in moves if board.fits(shape, m[1], m[2])]
+        if not board.fits(shape, px, py + 1):
+            landed.add(cells_of(shape, px, py))
+        for nr in ((r + 1) % 4, (r - 1) % 4):
+            kick = next(((kx, ky) for kx, ky in KICK_SEQUENCE if board.fits(shapes[nr], px + kx, py + ky)), None)
+            if kick is not None:
+                moves.append((nr, px + kick[0], py + kick[1]))
+        for move in moves:
+            if move not in seen:
+                seen.add(move)
+                queue.append(move)
+    return landed
+
+
+def straight_drops(board, shapes, y):
+    """Landing cells of every rotation and column dropped row by row from row ``y``."""
+    landed = set()
+    for shape in shapes:
+        for x in range(-4, board.grid_w):
+            if board.fits(shape, x, y):
+                py = y
+                while board.fits(shape, x, py + 1):
+                    py += 1
+                landed.add(cells_of(shape, x, py))
+    return landed
+
+
+def locked_result(board, cells):
+    """``(lines, holes)`` from locking ``cells`` on a copy and scanning its colors."""
+    board = BitBoard(board.grid_w, board.grid_h, list(board.rows), copy.deepcopy(board.colors))
+    lines = len(board.place(list(cells), color=0))
+    holes = 0
+    for x in range(board.grid_w):
+        column = [row[x] >= 0 for row in board.colors]
+        if True in column:
+            holes += column[column.index(True):].count(False)
+    return lines, holes
+
+
+def positions(seed, size, count):
+    """Boards and falling pieces from random play with some placed pieces."""
+    env = TetrisEnvironment(*size, seed=seed)
+    env.reset()
+    rng = random.Random(seed)
+    while count:
+        state = env._state
+        if env._done:
+            env.reset()
+            continue
+        yield env._board, SHAPE_ROWS[state.current_piece], state.current_rotation, state.current_x, state.current_y
+        count -= 1
+        placements = env.placements()["placements"]
+        if placements and rng.random() < 0.3:
+            env.place(rng.randrange(len(placements)))
+        else:
+            env.step(rng.choice(ACTIONS))
+
+
+@pytest.mark.parametrize("size", [(10, 20), (6, 8), (4, 6), (13, 9)])
+def test_find_placements_matches_move_search(size):
+    for board, shapes, rotation, x, y in positions(1, size, 300):
+        placements = find_placements(board, shapes, KICK_SEQUENCE, rotation, x, y)
+        found = [frozenset(p.cells) for p in placements]
+        assert len(set(found)) == len(found)
+        assert set(found) == search(board, shapes, rotation, x, y)
+        for placement, cells in zip(placements, found):
+            assert cells_of(shapes[placement.rotation], placement.x, placement.y) == cells
+            assert (placement.lines, placement.holes) == locked_result(board, cells)
+
+
+def test_find_placements_on_empty_board_are_the_straight_drops():
+    board = BitBoard(10, 20, [0] * 20)
+    for shapes in SHAPE_ROWS.values():
+        found = {frozenset(p.cells) for p in find_placements(board, shapes, KICK_SEQUENCE, 0, 4, 1)}
+        assert found == straight_drops(board, shapes, 1)
+
+
+def test_find_placements_include_reachable_straight_drops():
+    # With the rows around the piece empty it can turn and shift freely there, so
+    # every straight drop from its row is reachable; slides under overhangs add more.
+    checked = 0
+    for board, shapes, rotation, x, y in positions(2, (10, 20), 300):
+        if any(board.rows[: y + 4]):
+            continue
+        found = {frozenset(p.cells) for p in find_placements(board, shapes, KICK_SEQUENCE, rotation, x, y)}
+        assert straight_drops(board, shapes, y) <= found
+        checked += 1
+    assert checked > 50
@@ -0,0 +1,56 @@
+"""Pure Tetris rules against the env they mirror, on one seeded action stream."""
+
+import random
+
+import pytest
+
+from engine.games.tetris import rules
+from engine.games.tetris.environment import TetrisEnvironment
+
+ACTIONS = (-1, 0, 0, 1, 1, 2, 3, 4, 4, 5)
+
+
+@pytest.mark.parametrize("size", [(10, 20), (6, 8), (7, 12)])
+def test_step_state_matches_env(size):
+    grid_w, grid_h = size
+    env = TetrisEnvironment(grid_w, grid_h, seed=7, start_level=2)
+    env.reset()
+    state = rules.reset_state(grid_w, grid_h, seed=7, start_level=2)
+    assert state == env.snapshot()
+    rng = random.Random(7)
+    games = 0
+    for _ in range(4000):
+        if rng.random() < 0.1 and not state.done:
+            placements = rules.legal_placements(state)
+            assert [p.to_dict() for p in placements] == env.placements()["placements"]
+            if placements:
+                index = rng.randrange(len(placements))
+                result = env.place(index)
+                state, reward, done = rules.place(state, placements[index])
+            else:
+                continue
+        else:
+            action = rng.choice(ACTIONS)
+            result = env.step(action)
+            state, reward, done, _info = rules.step_state(state, action)
+        assert (result["reward"], result["done"]) == (reward, done)
+        assert env.snapshot() == state
+        if done:
+            games += 1
+            env.reset()
+            state = rules.reset_state(grid_w, grid_h, start_level=2, rng_state=state.rng_state)
+            assert env.snapshot() == state
+    assert games > 3
+
+
+def test_clone_continues_like_the_original():
+    env = TetrisEnvironment(10, 20, seed=3)
+    env.reset()
+    rng = random.Random(3)
+    for _ in range(300):
+        env.step(rng.choice(ACTIONS))
+    clone = env.clone()
+    for _ in range(2000):
+        action = rng.choice(ACTIONS)
+        assert clone.step(action)["reward"] == env.step(action)["reward"]
+        assert clone.snapshot() == env.snapshot()
@@ -0,0 +1,34 @@
+"""Tetris delta scenes: applied in order, they rebuild the full scenes."""
+
+import random
+
+import numpy as np
+import pytest
+
+from engine.games.tetris.environment import TetrisEnvironment
+
+ACTIONS = (-1, 0, 1, 2, 3, 4, 5, 5)
+
+
+@pytest.mark.parametrize("keyframe_every", [0, 37])
+def test_delta_scenes_rebuild_full_scenes(keyframe_every):
+    full_env = TetrisEnvironment(8, 12, seed=2)
+    delta_env = TetrisEnvironment(8, 12, seed=2, scene_mode="delta", keyframe_every=keyframe_every)
+    rng = random.Random(2)
+    full, delta = full_env.reset(), delta_env.reset()
+    locked = None
+    for _ in range(3000):
+        expected, scene = full["observation"], delta["observation"]
+        if scene["keyframe"]:
+            locked = np.full((12, 8), -1, dtype=np.int8)
+        locked[scene["rowIndices"]] = scene["rows"]
+        board = locked.copy()
+        piece = scene["currentPiece"]
+        for x, y in piece["cells"]:
+            if 0 <= y < 12 and 0 <= x < 8:
+                board[y, x] = piece["color"]
+        assert np.array_equal(board, expected["board"])
+        assert scene["ghostCells"] == expected["ghostCells"]
+        assert piece == expected["currentPiece"]
+        action = rng.choice(ACTIONS)
+        full, delta = full_env.step(action), delta_env.step(action)
@@ -0,0 +1,64 @@
+"""TetrisVectorEnv: batched steps against one pure-rules game per env."""
+
+import numpy as np
+import pytest
+
+from engine.games.tetris import rules
+from engine.games.tetris.rules import PIECE_COLORS, PIECE_LIST
+from engine.games.tetris.vector import TetrisVectorEnv
+
+
+def render(state):
+    board = np.array(state.board, dtype=np.int8)
+    for x, y in rules.piece_cells(state):
+        board[y, x] = PIECE_COLORS[state.piece]
+    return board
+
+
+def synced(state, env, i):
+    """``state`` with the vector env's pieces, which come from its own bags."""
+    return rules.evolve(state, piece=PIECE_LIST[env.piece[i]], next_piece=PIECE_LIST[env.next_piece[i]])
+
+
+@pytest.mark.parametrize("size", [(6, 8), (7, 12)])
+def test_vector_env_matches_scalar_rules(size):
+    # Narrow boards, so random play clears lines as well as topping out.
+    grid_w, grid_h = size
+    n = 8
+    env = TetrisVectorEnv(n, grid_w, grid_h, seed=0, start_level=3)
+    obs = env.reset()["observation"]
+    states = [synced(rules.reset_state(grid_w, grid_h, seed=i, start_level=3), env, i) for i in range(n)]
+    pieces = [[PIECE_LIST[env.piece[i]]] for i in range(n)]
+    episodes = []
+    actions = np.random.default_rng(1)
+    cleared = 0
+    for _ in range(3000):
+        for i, state in enumerate(states):
+            assert np.array_equal(obs["board"][i], render(state))
+            assert (env.rotation[i], env.x[i], env.y[i]) == (state.rotation, state.x, state.y)
+            assert (env.score[i], env.lines[i], env.level[i]) == (state.score, state.lines_cleared, state.level)
+        step = actions.choice([-1, 0, 1, 2, 3, 4, 5], size=n, p=[0.1, 0.2, 0.2, 0.15, 0.15, 0.1, 0.1])
+        result = env.step(step)
+        obs = result["observation"]
+        for i, state in enumerate(states):
+            nxt, reward, done, info = rules.step_state(state, int(step[i]))
+            assert result["reward"][i] == reward
+            assert result["done"][i] == done
+            assert (result["info"]["score"][i], result["info"]["lines"][i]) == (nxt.score, nxt.lines_cleared)
+            cleared += nxt.lines_cleared - state.lines_cleared
+            if done:
+                episodes.append(pieces[i])
+                pieces[i] = []
+                nxt = rules.reset_state(grid_w, grid_h, start_level=3)
+            elif info["locked"]:
+                # The vector env promotes its next piece like the env does.
+                assert PIECE_LIST[env.piece[i]] == nxt.piece
+            if done or info["locked"]:
+                pieces[i].append(PIECE_LIST[env.piece[i]])
+            states[i] = synced(nxt, env, i)
+    assert len(episodes) > n and cleared > 0
+    # Pieces come from 7-bags: each aligned run of 7 in an episode is a permutation.
+    for episode in episodes + pieces:
+        for start in range(0, len(episode), 7):
+            chunk = episode[start:start + 7]
+            assert len(set(chunk)) == len(chunk)
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Load generator for Agent Studio's backend game API.
+
+Runs many concurrent simulated agents against a local backend, each with its
+own keep-alive connection, and reports throughput plus p50/p95/p99 latency and
+error rates per endpoint.
+
+Usage examples:
+  python load_game_api.py --agents 32 --duration 20 --env-ids Snake,Tetris
+  python load_game_api.py --agents 64 --env-ids Tetris --fields reward,done --think-ms 5
+  python load_game_api.py --agents 16 --transport ws --env-ids Snake   # needs `pip install websockets`
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional, Tuple
+
+from smoke_game_api import parse_actions
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class Recorder:
+    """Latencies and errors per endpoint, merged across agent threads."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def merge(self, latencies: Dict[str, List[float]], errors: Dict[str, int]) -> None:
+        with self._lock:
+            for endpoint, values in latencies.items():
+                self.latencies.setdefault(endpoint, []).extend(values)
+            for endpoint, count in errors.items():
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + count
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class HttpAgentClient:
+    """One persistent HTTP/1.1 connection."""
+
+    def __init__(self, backend_url: str, accept: str):
+        parsed = urllib.parse.urlparse(backend_url)
+        self.conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+        self.accept = accept
+
+    def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Accept": self.accept}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        self.conn.request(method, path, body=body, headers=headers)
+        resp = self.conn.getresponse()
+        raw = resp.read()
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status}: {raw[:200]!r}")
+        if not raw:
+            return None
+        if resp.getheader("Content-Type", "").startswith("application/msgpack"):
+            return msgpack.unpackb(raw, raw=False)
+        return json.loads(raw)
+
+    def start(self, env_id: str, config: Dict[str, Any], query: str) -> Tuple[str, Any]:
+        data = self.request("POST", f"/api/game/start{query}", {"env_id": env_id, "config": config})
+        return data["session_id"], data.get("state")
+
+    def step(self, session_id: str, action: int, query: str) -> Any:
+        return self.request("POST", f"/api/game/{session_id}/step{query}", {"action": action})
+
+    def reset(self, session_id: str, query: str) -> Any:
+        return self.request("POST", f"/api/game/{session_id}/reset{query}")
+
+    def delete(self, session_id: str) -> None:
+        self.request("DELETE", f"/api/game/{session_id}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class WsAgentClient:
+    """One /ws/game socket speaking the session protocol."""
+
+    def __init__(self, backend_url: str, fields: Optional[str]):
+        from websockets.sync.client import connect
+
+        ws_url = backend_url.replace("http://", "ws://").replace("https://", "wss://") + "/ws/game"
+        self.ws = connect(ws_url).__enter__()
+        self.fields = fields
+        self._next_id = 0
+
+    def request(self, message: Dict[str, Any]) -> Any:
+        self._next_id += 1
+        message["id"] = self._next_id
+        if self.fields:
+            message["fields"] = self.fields
+        self.ws.send(json.dumps(message))
+        while True:
+            reply = json.loads(self.ws.recv())
+            if reply.get("op") != "event":
+                break
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error"))
+        return reply
+
+    def start(self, env_id: str, config: Dict[str, Any], query: str) -> Tuple[str, Any]:
+        reply = self.request({"op": "start", "env_id": env_id, "config": config})
+        return reply["session_id"], reply.get("state")
+
+    def step(self, session_id: str, action: int, query: str) -> Any:
+        return self.request({"op": "step", "session_id": session_id, "action": action}).get("state")
+
+    def reset(self, session_id: str, query: str) -> Any:
+        return self.request({"op": "reset", "session_id": session_id}).get("state")
+
+    def delete(self, session_id: str) -> None:
+        self.request({"op": "close", "session_id": session_id})
+
+    def close(self) -> None:
+        self.ws.close()
+
+
+def run_agent(index: int, args: argparse.Namespace, env_ids: List[str], config: Dict[str, Any], deadline: float, recorder: Recorder) -> None:
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    rng = random.Random(args.seed + index)
+    env_id = env_ids[index % len(env_ids)]
+    query = f"?fields={urllib.parse.quote(args.fields)}" if args.fields and args.transport == "http" else ""
+    accept = "application/msgpack" if args.msgpack else "application/json"
+
+    def timed(endpoint: str, fn, *fn_args):
+        start = time.perf_counter()
+        try:
+            return fn(*fn_args)
+        except Exception:
+            errors[endpoint] = errors.get(endpoint, 0) + 1
+            raise
+        finally:
+            latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+
+    client = None
+    session_id = None
+    try:
+        client = WsAgentClient(args.backend_url, args.fields) if args.transport == "ws" else HttpAgentClient(args.backend_url, accept)
+        session_id, _state = timed("start", client.start, env_id, config, query)
+        actions = parse_actions(args.actions, args.episode_steps, None) if args.actions else None
+        step_index = 0
+        while time.perf_counter() < deadline:
+            action = actions[step_index % len(actions)] if actions else rng.randrange(args.random_max)
+            step_index += 1
+            try:
+                state = timed("step", client.step, session_id, action, query)
+            except Exception:
+                continue
+            if step_index % args.episode_steps == 0 or (isinstance(state, dict) and (state.get("done") or state.get("truncated"))):
+                try:
+                    timed("reset", client.reset, session_id, query)
+                except Exception:
+                    pass
+            if args.think_ms > 0:
+                time.sleep(args.think_ms / 1000.0)
+    except Exception as e:
+        print(f"[WARN] agent {index}: {e}", file=sys.stderr)
+    finally:
+        if client is not None and session_id is not None:
+            try:
+                timed("delete", client.delete, session_id)
+            except Exception:
+                pass
+        if client is not None:
+            client.close()
+        recorder.merge(latencies, errors)
+
+
+def report(recorder: Recorder, elapsed: float) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {"elapsed_s": elapsed, "endpoints": {}}
+    print(f"\n{'endpoint':<10} {'count':>9} {'req/s':>10} {'errors':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint in ("start", "step", "reset", "delete"):
+        values = sorted(recorder.latencies.get(endpoint, []))
+        if not values:
+            continue
+        error_count = recorder.errors.get(endpoint, 0)
+        stats = {
+            "count": len(values),
+            "rps": len(values) / elapsed,
+            "errors": error_count,
+            "error_rate": error_count / len(values),
+            "p50_ms": percentile(values, 0.50) * 1e3,
+            "p95_ms": percentile(values, 0.95) * 1e3,
+            "p99_ms": percentile(values, 0.99) * 1e3,
+            "max_ms": values[-1] * 1e3,
+        }
+        summary["endpoints"][endpoint] = stats
+        print(
+            f"{endpoint:<10} {stats['count']:>9} {stats['rps']:>10.1f} {error_count:>8} "
+            f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}"
+        )
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test Agent Studio backend game API.")
+    parser.add_argument("--backend-url", default="http://localhost:8000", help="Base URL, default: http://localhost:8000")
+    parser.add_argument("--env-ids", default="Snake", help="Comma-separated env ids, assigned round-robin to agents")
+    parser.add_argument("--agents", type=int, default=16, help="Concurrent simulated agents")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause after each step, per agent")
+    parser.add_argument("--episode-steps", type=int, default=500, help="Reset after this many steps if not done")
+    parser.add_argument("--actions", default=None, help='Comma-separated actions to cycle, e.g. "0,1,0,1"')
+    parser.add_argument("--random-max", type=int, default=4, help="Random actions in [0, random_max) when --actions is unset")
+    parser.add_argument("--config", default="{}", help="JSON start config shared by all agents")
+    parser.add_argument("--fields", default=None, help='Response projection, e.g. "reward,done"')
+    parser.add_argument("--msgpack", action="store_true", help="Request msgpack responses (HTTP only, needs `pip install msgpack`)")
+    parser.add_argument("--transport", choices=("http", "ws"), default="http")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the summary as JSON to this path")
+    args = parser.parse_args()
+
+    if args.agents <= 0 or args.duration <= 0 or args.episode_steps <= 0 or args.random_max <= 0:
+        print("[ERROR] --agents, --duration, --episode-steps and --random-max must be > 0", file=sys.stderr)
+        return 2
+    try:
+        config = json.loads(args.config) or {}
+    except json.JSONDecodeError as e:
+        print(f"[ERROR] --config is not valid JSON: {e}", file=sys.stderr)
+        return 2
+    if args.msgpack and msgpack is None:
+        print("[ERROR] --msgpack needs `pip install msgpack`", file=sys.stderr)
+        return 2
+    if args.transport == "ws":
+        try:
+            import websockets.sync.client  # noqa: F401
+        except ImportError:
+            print("[ERROR] --transport ws needs `pip install websockets`", file=sys.stderr)
+            return 2
+
+    args.backend_url = args.backend_url.rstrip("/")
+    env_ids = [e.strip() for e in args.env_ids.split(",") if e.strip()]
+    recorder = Recorder()
+    print(f"[..] {args.agents} agents x {args.duration:.0f}s over {args.transport} on {', '.join(env_ids)}")
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=run_agent, args=(i, args, env_ids, config, deadline, recorder), daemon=True)
+        for i in range(args.agents)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    summary = report(recorder, time.perf_counter() - start)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"[OK] wrote {args.output}")
+
+    total_errors = sum(recorder.errors.values())
+    return 1 if total_errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())